@@ -1,7 +1,15 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponseRedirect
 from .models import Session, Booking
+from .search import build_search_query
+from .counters import (
+    SeatsUnavailable, counter_deltas, lock_booking_state, record_booking_changed,
+    record_booking_created, record_booking_deleted
+)
 
 User = get_user_model()
 
@@ -33,7 +41,14 @@ class SessionAdmin(admin.ModelAdmin):
                     'status', 'session_type', 'created_at']
     list_filter = ['status', 'session_type', 'category', 'created_at']
     search_fields = ['title', 'description', 'creator__username']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'bookings_count',
+                       'pending_bookings_count', 'confirmed_attendees', 'reserved_seats']
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Search the full-text index instead of ILIKE over search_fields"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(search_vector=build_search_query(search_term)), False
     
     fieldsets = (
         ('Basic Information', {
@@ -49,6 +64,11 @@ class SessionAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('status',)
         }),
+        ('Booking Counters', {
+            'fields': ('bookings_count', 'pending_bookings_count', 'confirmed_attendees',
+                       'reserved_seats'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -56,14 +76,78 @@ class SessionAdmin(admin.ModelAdmin):
     )
 
 
+class BookingAdminForm(forms.ModelForm):
+    """Refuses edits that need more seats than the booking's session has left"""
+    
+    class Meta:
+        model = Booking
+        fields = '__all__'
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        session = cleaned_data.get('session')
+        status = cleaned_data.get('status')
+        attendees_count = cleaned_data.get('attendees_count')
+        if session is None or status is None or attendees_count is None:
+            return cleaned_data
+        
+        # The form has not applied the edit yet, so the instance still holds the stored booking
+        previous = None
+        if self.instance.pk and self.instance.session_id == session.pk:
+            previous = (self.instance.status, self.instance.attendees_count)
+        needed = counter_deltas(removed=previous, added=(status, attendees_count))['reserved_seats']
+        if needed > session.seats_remaining:
+            raise forms.ValidationError(
+                f'{session} has {session.seats_remaining} seats left; this booking needs {needed} more'
+            )
+        return cleaned_data
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
+    form = BookingAdminForm
     list_display = ['id', 'user', 'session', 'booking_date', 'attendees_count', 
                     'total_price', 'status', 'payment_status', 'created_at']
     list_filter = ['status', 'payment_status', 'booking_date', 'created_at']
     search_fields = ['user__username', 'session__title', 'payment_intent_id']
     readonly_fields = ['created_at', 'updated_at', 'total_price']
     
+    def save_model(self, request, obj, form, change):
+        """
+        Keep session counters in step with admin edits. The form checks the
+        seats; should a concurrent booking take them first, SeatsUnavailable
+        rolls back the save along with its change log entry and is reported
+        by changeform_view.
+        """
+        with transaction.atomic():
+            previous = lock_booking_state(obj.pk) if change else None
+            super().save_model(request, obj, form, change)
+            if previous:
+                record_booking_changed(previous, obj)
+            else:
+                record_booking_created(obj)
+    
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        """
+        Report seats taken between validation and save as an error on the
+        form's page; the admin's transaction has rolled the save back by now.
+        """
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except SeatsUnavailable as exc:
+            self.message_user(request, exc.detail[0], messages.ERROR)
+            return HttpResponseRedirect(request.get_full_path())
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            obj.session_id, obj.status, obj.attendees_count = lock_booking_state(obj.pk)
+            super().delete_model(request, obj)
+            record_booking_deleted(obj)
+    
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+    
     fieldsets = (
         ('Booking Information', {
             'fields': ('user', 'session', 'booking_date', 'attendees_count', 'total_price')
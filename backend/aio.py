@@ -0,0 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# The provider SDKs (requests, stripe, boto3) only block, so async views hand
+# their calls to this pool and the event loop keeps serving other requests.
+# Each in-flight call holds a thread instead of a whole worker.
+PROVIDER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.PROVIDER_IO_THREADS, thread_name_prefix='provider-io'
+)
+
+
+def run_blocking(func, *args, **kwargs):
+    """Await a blocking provider call on the provider I/O pool"""
+    return sync_to_async(func, thread_sensitive=False, executor=PROVIDER_EXECUTOR)(*args, **kwargs)
+
+
+async def parsed_data(request):
+    """request.data parsed off the event loop; multipart bodies may spill to temporary files"""
+    return await sync_to_async(lambda: request.data)()
+
@@ -0,0 +1,174 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import Coalesce, Trunc, TruncDate
+from django.utils import timezone
+from .models import Booking, SessionDailyRollup
+
+# Bookings in these states count towards attendees and revenue
+EARNING_STATUSES = ('confirmed', 'completed')
+
+ROLLUP_FIELDS = ('bookings', 'cancellations', 'confirmed_attendees', 'revenue')
+ANALYTICS_GRANULARITIES = ('day', 'week', 'month')
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 3660
+
+UPSERT_ROLLUPS = """
+INSERT INTO session_daily_rollups
+    (creator_id, session_id, day, currency, bookings, cancellations, confirmed_attendees, revenue)
+SELECT sessions.creator_id, sessions.id, changes.day, sessions.currency,
+       changes.bookings, changes.cancellations, changes.confirmed_attendees, changes.revenue
+FROM (VALUES {values}) AS changes (session_id, day, bookings, cancellations, confirmed_attendees, revenue)
+JOIN sessions ON sessions.id = changes.session_id
+ON CONFLICT (session_id, day) DO UPDATE SET
+    bookings = session_daily_rollups.bookings + EXCLUDED.bookings,
+    cancellations = session_daily_rollups.cancellations + EXCLUDED.cancellations,
+    confirmed_attendees = session_daily_rollups.confirmed_attendees + EXCLUDED.confirmed_attendees,
+    revenue = session_daily_rollups.revenue + EXCLUDED.revenue
+"""
+UPSERT_ROW = '(%s::bigint, %s::date, %s::integer, %s::integer, %s::integer, %s::numeric)'
+
+
+def booking_day(created_at):
+    """The rollup day a booking is counted on"""
+    return timezone.localdate(created_at)
+
+
+def rollup_contribution(status, attendees_count, total_price):
+    """What one booking in the given state adds to its day's rollup"""
+    earning = status in EARNING_STATUSES
+    return {
+        'bookings': 1,
+        'cancellations': 1 if status == 'cancelled' else 0,
+        'confirmed_attendees': attendees_count if earning else 0,
+        'revenue': total_price if earning else Decimal('0.00'),
+    }
+
+
+def rollup_deltas():
+    """Empty {(session_id, day): {field: delta}} accumulator"""
+    return defaultdict(lambda: defaultdict(int))
+
+
+def add_rollup_change(deltas, session_id, created_at, total_price, removed=None, added=None):
+    """
+    Accumulate moving one booking between states. removed/added are
+    (status, attendees_count) tuples, or None when it is created or deleted.
+    """
+    fields = deltas[(session_id, booking_day(created_at))]
+    if removed:
+        for field, value in rollup_contribution(*removed, total_price).items():
+            fields[field] -= value
+    if added:
+        for field, value in rollup_contribution(*added, total_price).items():
+            fields[field] += value
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Apply accumulated deltas with one INSERT ... ON CONFLICT DO UPDATE,
+    creating missing rollup rows. Rows are written in key order so
+    concurrent writers lock them in the same order.
+    """
+    rows = [
+        (session_id, day, *[fields.get(field, 0) for field in ROLLUP_FIELDS])
+        for (session_id, day), fields in sorted(deltas.items())
+        if any(fields.values())
+    ]
+    if not rows:
+        return
+    sql = UPSERT_ROLLUPS.format(values=', '.join([UPSERT_ROW] * len(rows)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def record_rollup_change(booking, removed=None, added=None, session_id=None):
+    """Apply one booking's change; session_id is where it was counted before, if it moved"""
+    deltas = rollup_deltas()
+    if session_id is None or session_id == booking.session_id:
+        add_rollup_change(deltas, booking.session_id, booking.created_at, booking.total_price,
+                          removed, added)
+    else:
+        add_rollup_change(deltas, session_id, booking.created_at, booking.total_price, removed=removed)
+        add_rollup_change(deltas, booking.session_id, booking.created_at, booking.total_price,
+                          added=added)
+    apply_rollup_deltas(deltas)
+
+
+def rebuild_rollups(creator_id=None):
+    """
+    Recompute rollups from the bookings table, for all creators or one,
+    returning the number of rows written. The table is locked against
+    concurrent rollup writes first, so a booking committed before the lock is
+    counted here and one still in flight applies its own delta afterwards.
+    """
+    bookings = Booking.objects.all()
+    rollups = SessionDailyRollup.objects.all()
+    if creator_id is not None:
+        bookings = bookings.filter(session__creator_id=creator_id)
+        rollups = rollups.filter(creator_id=creator_id)
+
+    earning = Q(status__in=EARNING_STATUSES)
+    totals = bookings.annotate(day=TruncDate('created_at')).values(
+        'session_id', 'session__creator_id', 'session__currency', 'day'
+    ).annotate(
+        total=Count('id'),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+        attendees=Coalesce(Sum('attendees_count', filter=earning), 0),
+        earned=Coalesce(Sum('total_price', filter=earning), Decimal('0.00')),
+    ).order_by()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {SessionDailyRollup._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+        rollups.delete()
+        created = SessionDailyRollup.objects.bulk_create([
+            SessionDailyRollup(
+                creator_id=row['session__creator_id'],
+                session_id=row['session_id'],
+                day=row['day'],
+                currency=row['session__currency'],
+                bookings=row['total'],
+                cancellations=row['cancelled'],
+                confirmed_attendees=row['attendees'],
+                revenue=row['earned'],
+            )
+            for row in totals.iterator()
+        ], batch_size=1000)
+    return len(created)
+
+
+def rollup_periods(creator, start, end, granularity='day', session_id=None):
+    """
+    Rollup totals for a creator between two dates (inclusive), grouped into
+    day, week (starting Monday) or month periods. Reads only the rollup
+    table, so the cost follows the number of days, not bookings.
+    """
+    rollups = SessionDailyRollup.objects.filter(creator=creator, day__gte=start, day__lte=end)
+    if session_id is not None:
+        rollups = rollups.filter(session_id=session_id)
+
+    rows = rollups.annotate(
+        period=Trunc('day', granularity, output_field=DateField())
+    ).values('period', 'currency').annotate(
+        **{f'total_{field}': Sum(field) for field in ROLLUP_FIELDS}
+    ).order_by('period', 'currency')
+
+    periods = {}
+    totals = {'bookings': 0, 'cancellations': 0, 'confirmed_attendees': 0, 'revenue': {}}
+    for row in rows:
+        period = periods.setdefault(row['period'], {
+            'period': row['period'], 'bookings': 0, 'cancellations': 0,
+            'confirmed_attendees': 0, 'revenue': {},
+        })
+        for target in (period, totals):
+            for field in ('bookings', 'cancellations', 'confirmed_attendees'):
+                target[field] += row[f'total_{field}']
+            revenue = target['revenue']
+            revenue[row['currency']] = revenue.get(row['currency'], Decimal('0.00')) + row['total_revenue']
+
+    for target in (*periods.values(), totals):
+        target['revenue'] = {currency: str(amount) for currency, amount in target['revenue'].items()}
+    return list(periods.values()), totals
@@ -1,20 +1,126 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
-import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from collections import OrderedDict
+from . import outbound, revocation
+import asyncio
+import hashlib
+import threading
+import time
 
 User = get_user_model()
 
+TOKEN_VERSION_CLAIM = 'ver'
+
 
 def get_tokens_for_user(user):
-    """Generate JWT tokens for a user"""
+    """Generate JWT tokens for a user, carrying their role, staff flag and token version"""
     refresh = RefreshToken.for_user(user)
+    for field in User.CLAIM_FIELDS:
+        refresh[field] = getattr(user, field)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
     }
 
 
+class UserStateCache:
+    """
+    Per-process TTL/LRU cache of {user_id: (token_version, is_active)}, the
+    only per-user state checked when authenticating from token claims.
+    Other processes see a change within AUTH_USER_CACHE_TIMEOUT seconds.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+    
+    def get(self, user_id):
+        """The user's (token_version, is_active), or None if they do not exist"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                return entry[1]
+        
+        state = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        if state is not None:
+            with self.lock:
+                self.entries[user_id] = (now + settings.AUTH_USER_CACHE_TIMEOUT, state)
+                self.entries.move_to_end(user_id)
+                while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                    self.entries.popitem(last=False)
+        return state
+    
+    def forget(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_states = UserStateCache()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds request.user from the access token's
+    claims instead of loading the user row. Only the token version and active
+    flag are checked, through the per-process user_states cache. The user is
+    a User instance with its profile fields deferred; the first one a view
+    reads loads them all in one query. Tokens issued without the claims are
+    authenticated the usual way. Revoked tokens are refused with one cache
+    lookup.
+    """
+    
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation.is_revoked(validated_token):
+            raise InvalidToken('Token has been revoked')
+        return validated_token
+    
+    def get_user(self, validated_token):
+        claims = (api_settings.USER_ID_CLAIM, TOKEN_VERSION_CLAIM, *User.CLAIM_FIELDS)
+        if any(claim not in validated_token for claim in claims):
+            return super().get_user(validated_token)
+        
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        state = user_states.get(user_id)
+        if state is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        token_version, is_active = state
+        if not is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if validated_token[TOKEN_VERSION_CLAIM] != token_version:
+            raise InvalidToken('Token was issued before the user changed; log in again')
+        
+        values = {
+            api_settings.USER_ID_FIELD: user_id,
+            'token_version': token_version,
+            'is_active': is_active,
+            **{field: validated_token[field] for field in User.CLAIM_FIELDS},
+        }
+        return User.from_db(DEFAULT_DB_ALIAS, list(values), [
+            values[field.attname] for field in User._meta.concrete_fields if field.attname in values
+        ])
+
+
+def profile_cache_key(provider, access_token):
+    """Cache key for the profile fetched with an access token; the token itself is never stored"""
+    digest = hashlib.sha256(access_token.encode()).hexdigest()
+    return f'oauth-profile:{provider}:{digest}'
+
+
 class OAuthProvider:
     """Base OAuth provider class"""
     
@@ -31,11 +137,12 @@ class GoogleOAuthProvider:
     """Google OAuth provider"""
     
     @staticmethod
-    def get_user_info(access_token):
+    async def get_user_info(access_token):
         """Fetch user info from Google"""
         try:
-            response = requests.get(
-                'https://www.googleapis.com/oauth2/v2/userinfo',
+            response = await outbound.aget(
+                'google',
+                settings.GOOGLE_USERINFO_URL,
                 headers={'Authorization': f'Bearer {access_token}'}
             )
             response.raise_for_status()
@@ -44,12 +151,12 @@ class GoogleOAuthProvider:
             raise AuthenticationFailed(f'Failed to fetch user info from Google: {str(e)}')
     
     @staticmethod
-    def create_or_update_user(user_info):
+    async def create_or_update_user(user_info):
         """Create or update user from Google user info"""
         email = user_info.get('email')
         oauth_id = f"google_{user_info.get('id')}"
         
-        user, created = User.objects.get_or_create(
+        user, created = await User.objects.aget_or_create(
             oauth_id=oauth_id,
             defaults={
                 'username': email.split('@')[0],
@@ -68,7 +175,7 @@ class GoogleOAuthProvider:
             user.first_name = user_info.get('given_name', user.first_name)
             user.last_name = user_info.get('family_name', user.last_name)
             user.avatar = user_info.get('picture', user.avatar)
-            user.save()
+            await user.asave()
         
         return user, created
 
@@ -77,34 +184,46 @@ class GitHubOAuthProvider:
     """GitHub OAuth provider"""
     
     @staticmethod
-    def get_user_info(access_token):
-        """Fetch user info from GitHub"""
+    async def get_user_info(access_token):
+        """
+        Fetch user info from GitHub. The email list is requested alongside
+        the profile in case its email is private, and the result is cached
+        briefly under a hash of the token.
+        """
+        cache_key = profile_cache_key('github', access_token)
+        user_data = await cache.aget(cache_key)
+        if user_data is not None:
+            return user_data
+        
         try:
-            response = requests.get(
-                'https://api.github.com/user',
-                headers={'Authorization': f'Bearer {access_token}'}
+            headers = {'Authorization': f'Bearer {access_token}'}
+            response, email_response = await asyncio.gather(
+                outbound.aget('github', f'{settings.GITHUB_API_URL}/user', headers=headers),
+                outbound.aget('github', f'{settings.GITHUB_API_URL}/user/emails', headers=headers),
+                return_exceptions=True
             )
+            if isinstance(response, Exception):
+                raise response
             response.raise_for_status()
             user_data = response.json()
             
-            # Get user email if not public
+            # Use the primary email if not public
             if not user_data.get('email'):
-                email_response = requests.get(
-                    'https://api.github.com/user/emails',
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
+                if isinstance(email_response, Exception):
+                    raise email_response
                 email_response.raise_for_status()
                 emails = email_response.json()
                 primary_email = next((e for e in emails if e.get('primary')), None)
                 if primary_email:
                     user_data['email'] = primary_email.get('email')
             
+            await cache.aset(cache_key, user_data, settings.OAUTH_PROFILE_CACHE_TIMEOUT)
             return user_data
         except Exception as e:
             raise AuthenticationFailed(f'Failed to fetch user info from GitHub: {str(e)}')
     
     @staticmethod
-    def create_or_update_user(user_info):
+    async def create_or_update_user(user_info):
         """Create or update user from GitHub user info"""
         email = user_info.get('email')
         oauth_id = f"github_{user_info.get('id')}"
@@ -115,7 +234,7 @@ class GitHubOAuthProvider:
         first_name = name_parts[0]
         last_name = name_parts[1] if len(name_parts) > 1 else ''
         
-        user, created = User.objects.get_or_create(
+        user, created = await User.objects.aget_or_create(
             oauth_id=oauth_id,
             defaults={
                 'username': user_info.get('login'),
@@ -138,6 +257,6 @@ class GitHubOAuthProvider:
             github_bio = user_info.get('bio')
             if github_bio:
                 user.bio = github_bio
-            user.save()
+            await user.asave()
         
         return user, created
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from itertools import islice
+
+from dateutil.rrule import rrulestr
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .analytics import add_rollup_change, apply_rollup_deltas, rollup_deltas
+from .cache import invalidate_catalog
+from .counters import apply_counter_deltas, counter_deltas
+from .models import Session, Booking
+
+# action -> (target status, statuses it may be applied to, who may apply it)
+BULK_BOOKING_ACTIONS = {
+    'confirm': ('confirmed', ('pending',), 'creator'),
+    'cancel': ('cancelled', ('pending', 'confirmed'), 'owner_or_creator'),
+    'complete': ('completed', ('confirmed',), 'creator'),
+}
+
+# Limits for one import request / one recurring series
+SESSION_IMPORT_MAX_ROWS = 5000
+SESSION_SERIES_MAX_OCCURRENCES = 520
+
+# Rows per INSERT statement in bulk_create
+SESSION_INSERT_BATCH_SIZE = 500
+
+# Bookings cancelled per transaction when expiring unpaid holds
+EXPIRY_BATCH_SIZE = 1000
+
+# Per-ID outcomes of a bulk booking action
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+INVALID_STATUS = 'invalid_status'
+FORBIDDEN = 'forbidden'
+NOT_FOUND = 'not_found'
+
+
+def can_see_booking(user, booking_user_id, creator_id):
+    # Mirrors BookingViewSet.get_queryset
+    if user.role == 'user':
+        return booking_user_id == user.id
+    if user.role == 'creator':
+        return user.id in (booking_user_id, creator_id)
+    return True
+
+
+def bulk_transition_bookings(user, booking_ids, action):
+    """
+    Apply a bulk action to bookings and return ({id: (result, status)}, updated count).
+
+    One locking query checks visibility, permission and current status for
+    every ID, one conditional UPDATE moves the permitted bookings, and one
+    UPDATE adjusts the counters of every affected session, and one upsert
+    their analytics rollups.
+    """
+    target, sources, allowed = BULK_BOOKING_ACTIONS[action]
+    results = {}
+    deltas = defaultdict(lambda: defaultdict(int))
+    rollups = rollup_deltas()
+
+    with transaction.atomic():
+        rows = Booking.objects.select_for_update(of=('self',)).filter(
+            id__in=booking_ids
+        ).values_list('id', 'user_id', 'session_id', 'session__creator_id',
+                      'status', 'attendees_count', 'created_at', 'total_price')
+
+        updatable = []
+        for (booking_id, booking_user_id, session_id, creator_id, status, attendees,
+             created_at, total_price) in rows:
+            if not can_see_booking(user, booking_user_id, creator_id):
+                continue
+            permitted = user.id == creator_id or (
+                allowed == 'owner_or_creator' and user.id == booking_user_id
+            )
+            if not permitted:
+                results[booking_id] = (FORBIDDEN, status)
+            elif status == target:
+                results[booking_id] = (UNCHANGED, status)
+            elif status not in sources:
+                results[booking_id] = (INVALID_STATUS, status)
+            else:
+                updatable.append(booking_id)
+                results[booking_id] = (UPDATED, target)
+                for field, delta in counter_deltas((status, attendees), (target, attendees)).items():
+                    deltas[session_id][field] += delta
+                add_rollup_change(rollups, session_id, created_at, total_price,
+                                  (status, attendees), (target, attendees))
+
+        updated = 0
+        if updatable:
+            # The rows are locked, so the status condition matches every one of them
+            updated = Booking.objects.filter(id__in=updatable, status__in=sources).update(
+                status=target, updated_at=timezone.now()
+            )
+            apply_counter_deltas(deltas)
+            apply_rollup_deltas(rollups)
+
+    for booking_id in booking_ids:
+        results.setdefault(booking_id, (NOT_FOUND, None))
+    return results, updated
+
+
+def unpaid_holds(cutoff):
+    """
+    Bookings of paid sessions created before cutoff that are still pending with no
+    payment under way (none started, or the last attempt failed)
+    """
+    return Booking.objects.filter(
+        Q(payment_intent_id__isnull=True) | Q(payment_status='failed'),
+        status='pending', payment_status__in=('pending', 'failed'),
+        total_price__gt=0, created_at__lt=cutoff,
+    )
+
+
+def expire_unpaid_bookings(cutoff, batch_size=EXPIRY_BATCH_SIZE):
+    """
+    Cancel unpaid holds created before cutoff and release their seats,
+    returning how many were cancelled. Each batch locks its rows with SKIP
+    LOCKED, so bookings being paid or edited right now are left for the next
+    run, and moves the counters (and rollups) of all its sessions in one
+    statement each.
+    """
+    expired = 0
+    while True:
+        deltas = defaultdict(lambda: defaultdict(int))
+        rollups = rollup_deltas()
+        with transaction.atomic():
+            rows = list(
+                unpaid_holds(cutoff).select_for_update(skip_locked=True)
+                .values_list('id', 'session_id', 'attendees_count', 'created_at', 'total_price')[:batch_size]
+            )
+            if not rows:
+                return expired
+            for booking_id, session_id, attendees, created_at, total_price in rows:
+                removed, added = ('pending', attendees), ('cancelled', attendees)
+                for field, delta in counter_deltas(removed, added).items():
+                    deltas[session_id][field] += delta
+                add_rollup_change(rollups, session_id, created_at, total_price, removed, added)
+            expired += Booking.objects.filter(id__in=[row[0] for row in rows]).update(
+                status='cancelled', updated_at=timezone.now()
+            )
+            apply_counter_deltas(deltas)
+            apply_rollup_deltas(rollups)
+
+
+def expand_recurrence(rule, starts_at):
+    """
+    Start times of a series described by an RFC 5545 RRULE (e.g.
+    "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=12") beginning at starts_at.
+    Raises ValueError for invalid or oversized rules.
+    """
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[len('RRULE:'):]
+    if 'DTSTART' in rule.upper():
+        raise ValueError('Give the first occurrence as starts_at, not DTSTART')
+    occurrences = list(islice(rrulestr(rule, dtstart=starts_at), SESSION_SERIES_MAX_OCCURRENCES + 1))
+    if not occurrences:
+        raise ValueError('The rule produces no occurrences')
+    if len(occurrences) > SESSION_SERIES_MAX_OCCURRENCES:
+        raise ValueError(
+            f'A series may have at most {SESSION_SERIES_MAX_OCCURRENCES} occurrences; '
+            'limit it with COUNT or UNTIL'
+        )
+    return occurrences
+
+
+def validate_session_rows(serializer_class, rows):
+    """
+    Validate many sessions in one pass, returning their validated data or
+    raising a ValidationError that maps each invalid (1-based) row number to
+    its errors
+    """
+    serializer = serializer_class(
+        data=rows, many=True, allow_empty=False, max_length=SESSION_IMPORT_MAX_ROWS
+    )
+    if serializer.is_valid():
+        return serializer.validated_data
+    errors = serializer.errors
+    if isinstance(errors, dict):
+        raise ValidationError(errors)
+    raise ValidationError({'rows': {index: row for index, row in enumerate(errors, 1) if row}})
+
+
+def create_sessions(creator, rows, **fields):
+    """Insert sessions from validated rows with bulk_create in one transaction"""
+    sessions = [Session(creator=creator, **row, **fields) for row in rows]
+    with transaction.atomic():
+        Session.objects.bulk_create(sessions, batch_size=SESSION_INSERT_BATCH_SIZE)
+        # bulk_create sends no post_save signals
+        invalidate_catalog()
+    return sessions
@@ -0,0 +1,109 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# Every cached catalog entry is stored under the current catalog version.
+# Bumping the version orphans all entries at once; the backend's LRU eviction
+# reclaims them, so no key scans or explicit deletes are needed.
+CATALOG_VERSION_KEY = 'sessions:catalog-version'
+
+
+def _initial_version():
+    # Seeded from the clock so a version key lost to eviction never
+    # resurrects entries cached under an earlier version
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, _initial_version(), timeout=None)
+
+
+def invalidate_catalog():
+    """
+    Orphan every cached catalog entry. Bumped again on commit so a read
+    between the write and the commit cannot leave pre-commit data cached
+    under the new version.
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def catalog_cache_key(name, request):
+    """Key for one catalog response; the absolute URI covers host, filters and cursor"""
+    uri = request.build_absolute_uri()
+    return f'sessions:{name}:{hashlib.md5(uri.encode()).hexdigest()}'
+
+
+def cached_catalog_value(name, request, compute):
+    """Return a value cached for this request under the catalog version, computing it on a miss"""
+    version = get_catalog_version()
+    key = catalog_cache_key(name, request)
+    value = cache.get(key, version=version)
+    if value is None:
+        value = compute()
+        cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT, version=version)
+    return value
+
+
+def cached_catalog_response(name, request, build_response):
+    """
+    Serve a catalog response from the cache, or build and store it.
+    The version is read before building so a write racing the build can only
+    leave its result under an already-orphaned version.
+    """
+    version = get_catalog_version()
+    key = catalog_cache_key(name, request)
+    data = cache.get(key, version=version)
+    if data is not None:
+        return Response(data)
+
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT, version=version)
+    return response
+
+
+class CatalogCacheMixin:
+    """Serve list and retrieve from the versioned catalog cache"""
+
+    def list(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            'list', request, lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_catalog_response(
+            'detail', request, lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+
+def snapshot_response(name, etag, build_response):
+    """
+    Serve a response cached under the ETag computed for it, or build and
+    store it. Any write to the rows behind the ETag changes it, so a stale
+    snapshot is never read again and simply ages out.
+    """
+    key = 'snapshot:{}:{}'.format(name, etag.strip('"'))
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.SNAPSHOT_CACHE_TIMEOUT)
+    return response
@@ -0,0 +1,94 @@
+import hashlib
+from calendar import timegm
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .cache import snapshot_response
+
+
+def compute_validators(request, values, private=True):
+    """
+    Build (etag, last_modified) from an aggregate row. The ETag also covers
+    the URI (filters, cursor), the Accept header and, for private
+    validators, the user, since all of them shape the payload.
+    """
+    parts = [request.get_full_path(), request.META.get('HTTP_ACCEPT', '')]
+    if private:
+        parts.append(str(request.user.pk))
+    parts.extend(f'{key}={values[key]}' for key in sorted(values))
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+    timestamps = [value for value in values.values() if isinstance(value, datetime)]
+    last_modified = timegm(max(timestamps).utctimetuple()) if timestamps else None
+    return etag, last_modified
+
+
+def conditional_response(request, values, build_response, private=True, snapshot=None):
+    """
+    Return 304 Not Modified when the client's validators still match values,
+    otherwise build the response and attach fresh validators to it. With a
+    snapshot name the built response is also cached under its ETag, so other
+    clients (or one without the validators) skip building it too.
+    """
+    etag, last_modified = compute_validators(request, values, private)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None and snapshot:
+        response = snapshot_response(snapshot, etag, build_response)
+    elif response is None:
+        response = build_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Always revalidate; never let a browser reuse a payload heuristically
+        if private:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True, public=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and retrieve. Validators come from
+    one aggregate query (get_validator_aggregates) over the rows the response
+    would contain, so an unchanged resource is answered with 304 before any
+    serialization happens.
+    """
+    private_validators = True
+
+    def get_validator_aggregates(self):
+        raise NotImplementedError
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def aggregate_validators(self, queryset):
+        return queryset.order_by().aggregate(**self.get_validator_aggregates())
+
+    def list(self, request, *args, **kwargs):
+        values = self.aggregate_validators(self.get_validator_queryset())
+        return conditional_response(
+            request, values,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+            private=self.private_validators
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        def build_response():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_validator_queryset().filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookups 404 in get_object()
+            return build_response()
+        values = self.aggregate_validators(queryset)
+        return conditional_response(
+            request, values, build_response, private=self.private_validators
+        )
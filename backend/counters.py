@@ -0,0 +1,199 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .analytics import record_rollup_change
+from .cache import invalidate_catalog
+from .models import Session, Booking
+
+COUNTER_FIELDS = Session.COUNTER_FIELDS
+
+
+class SeatsUnavailable(ValidationError):
+    """A booking needs more seats than its session has left"""
+    default_detail = 'Not enough seats remaining for this session'
+    default_code = 'seats_unavailable'
+
+
+def booking_contribution(status, attendees_count):
+    """What one booking in the given state adds to its session's counters"""
+    return {
+        'bookings_count': 1,
+        'pending_bookings_count': 1 if status == 'pending' else 0,
+        'confirmed_attendees': attendees_count if status == 'confirmed' else 0,
+        'reserved_seats': 0 if status in Booking.RELEASED_STATUSES else attendees_count,
+    }
+
+
+def counter_deltas(removed=None, added=None):
+    """
+    Counter changes for moving one booking from one state to another.
+    removed/added are (status, attendees_count) tuples, or None when a
+    booking is being created or deleted.
+    """
+    deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+    if removed:
+        for field, value in booking_contribution(*removed).items():
+            deltas[field] -= value
+    if added:
+        for field, value in booking_contribution(*added).items():
+            deltas[field] += value
+    return deltas
+
+
+def adjust_session_counters(session_id, removed=None, added=None):
+    """Move a session's counters from one booking state to another with a single F() UPDATE"""
+    apply_counter_deltas({session_id: counter_deltas(removed, added)})
+
+
+def apply_counter_deltas(deltas):
+    """
+    Apply {session_id: {field: delta}} with one UPDATE, however many sessions
+    are involved; per-session deltas are picked with CASE.
+
+    Seat reservations are part of the same UPDATE, whose WHERE clause only
+    matches a reserving session while max_attendees still covers the new
+    total. Concurrent reservations queue on the row lock and Postgres
+    re-checks the condition against the committed row, so a session is never
+    oversold; if any session lacks the seats nothing is applied and
+    SeatsUnavailable is raised, rolling back the caller's transaction.
+    """
+    deltas = {
+        session_id: {field: delta for field, delta in fields.items() if delta}
+        for session_id, fields in deltas.items()
+    }
+    deltas = {session_id: fields for session_id, fields in deltas.items() if fields}
+    if not deltas:
+        return
+
+    updates = {}
+    for field in COUNTER_FIELDS:
+        changes = {
+            session_id: fields[field] for session_id, fields in deltas.items() if field in fields
+        }
+        if not changes:
+            continue
+        if len(deltas) == 1:
+            updates[field] = F(field) + changes.popitem()[1]
+        else:
+            updates[field] = F(field) + Case(
+                *[When(pk=session_id, then=Value(delta)) for session_id, delta in changes.items()],
+                default=Value(0), output_field=IntegerField()
+            )
+    queryset = Session.objects.filter(pk__in=deltas)
+    reserving = [
+        session_id for session_id, fields in deltas.items() if fields.get('reserved_seats', 0) > 0
+    ]
+    if reserving:
+        # Releases always apply; reservations only where they fit
+        queryset = queryset.filter(
+            ~Q(pk__in=reserving) | Q(max_attendees__gte=updates['reserved_seats'])
+        )
+    # updated_at moves with the counters so ETag validators notice the change
+    updated = queryset.update(updated_at=timezone.now(), **updates)
+    if reserving and updated < len(deltas):
+        raise SeatsUnavailable()
+    invalidate_catalog()
+
+
+def record_booking_created(booking):
+    state = (booking.status, booking.attendees_count)
+    adjust_session_counters(booking.session_id, added=state)
+    record_rollup_change(booking, added=state)
+
+
+def record_booking_deleted(booking):
+    state = (booking.status, booking.attendees_count)
+    adjust_session_counters(booking.session_id, removed=state)
+    record_rollup_change(booking, removed=state)
+
+
+def lock_booking_state(booking_id):
+    """Lock a booking row and return its counted (session_id, status, attendees_count)"""
+    return Booking.objects.select_for_update().values_list(
+        'session_id', 'status', 'attendees_count'
+    ).get(pk=booking_id)
+
+
+def record_booking_changed(previous, booking):
+    """Apply an arbitrary booking edit, given its state from lock_booking_state()"""
+    session_id, status, attendees_count = previous
+    current = (booking.status, booking.attendees_count)
+    if session_id == booking.session_id:
+        adjust_session_counters(session_id, removed=(status, attendees_count), added=current)
+    else:
+        adjust_session_counters(session_id, removed=(status, attendees_count))
+        adjust_session_counters(booking.session_id, added=current)
+    record_rollup_change(booking, removed=(status, attendees_count), added=current, session_id=session_id)
+
+
+def transition_booking(booking, status, **fields):
+    """
+    Move booking to status (and set any extra fields) together with its
+    session's counters. The booking UPDATE is conditional on the status
+    this process last saw, so concurrent transitions are counted once; a lost
+    race re-reads the status and retries from there.
+    """
+    while True:
+        old_status = booking.status
+        now = timezone.now()
+        with transaction.atomic():
+            updated = Booking.objects.filter(pk=booking.pk, status=old_status).update(
+                status=status, updated_at=now, **fields
+            )
+            if updated:
+                removed = (old_status, booking.attendees_count)
+                added = (status, booking.attendees_count)
+                adjust_session_counters(booking.session_id, removed=removed, added=added)
+                record_rollup_change(booking, removed=removed, added=added)
+        if updated:
+            break
+        booking.refresh_from_db(fields=['status'])
+
+    booking.status = status
+    booking.updated_at = now
+    for field, value in fields.items():
+        setattr(booking, field, value)
+    return booking
+
+
+def expected_counters():
+    """Counter expressions recomputed from each session's bookings, for annotate() or update()"""
+    bookings = Booking.objects.filter(session=OuterRef('pk')).order_by().values('session')
+
+    def subquery(aggregate):
+        return Coalesce(
+            Subquery(bookings.annotate(value=aggregate).values('value'), output_field=IntegerField()),
+            Value(0),
+        )
+
+    return {
+        'bookings_count': subquery(Count('id')),
+        'pending_bookings_count': subquery(Count('id', filter=Q(status='pending'))),
+        'confirmed_attendees': subquery(Sum('attendees_count', filter=Q(status='confirmed'))),
+        'reserved_seats': subquery(
+            Sum('attendees_count', filter=~Q(status__in=Booking.RELEASED_STATUSES))
+        ),
+    }
+
+
+def drifted_sessions(queryset=None):
+    """Sessions whose stored counters disagree with their bookings"""
+    queryset = Session.objects.all() if queryset is None else queryset
+    expected = expected_counters()
+    annotated = queryset.annotate(**{f'expected_{field}': value for field, value in expected.items()})
+    in_sync = Q()
+    for field in COUNTER_FIELDS:
+        in_sync &= Q(**{field: F(f'expected_{field}')})
+    return annotated.exclude(in_sync)
+
+
+def repair_session_counters(session_ids):
+    """Recompute counters for the given sessions in one UPDATE"""
+    repaired = Session.objects.filter(pk__in=session_ids).update(
+        updated_at=timezone.now(), **expected_counters()
+    )
+    if repaired:
+        invalidate_catalog()
+    return repaired
@@ -0,0 +1,63 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+# Histogram bucket lower edges; the last bucket is open-ended
+PRICE_BUCKETS = [Decimal('0.00'), Decimal('25.00'), Decimal('50.00'), Decimal('100.00'), Decimal('200.00')]
+DURATION_BUCKETS = [0, 30, 60, 90, 120]
+
+FACET_FIELDS = ['category', 'session_type', 'currency']
+
+
+def bucket_index(field, edges):
+    """CASE expression mapping field to the index of its bucket in edges"""
+    whens = [
+        When(Q(**{f'{field}__gte': low, f'{field}__lt': high}), then=Value(index))
+        for index, (low, high) in enumerate(zip(edges, edges[1:]))
+    ]
+    return Case(*whens, default=Value(len(edges) - 1), output_field=IntegerField())
+
+
+def histogram(edges, counts, render=None):
+    render = render or (lambda edge: edge)
+    buckets = []
+    for index, low in enumerate(edges):
+        high = edges[index + 1] if index + 1 < len(edges) else None
+        buckets.append({
+            'min': render(low),
+            'max': render(high) if high is not None else None,
+            'count': counts.get(index, 0),
+        })
+    return buckets
+
+
+def session_facets(queryset):
+    """
+    Facet counts for a filtered session queryset from a single grouped
+    aggregation. Rows are grouped by every facet at once and folded into
+    the individual facets here; the number of rows is bounded by the
+    distinct facet combinations, not by the number of sessions.
+    """
+    rows = queryset.order_by().annotate(
+        price_bucket=bucket_index('price', PRICE_BUCKETS),
+        duration_bucket=bucket_index('duration_minutes', DURATION_BUCKETS),
+    ).values(*FACET_FIELDS, 'price_bucket', 'duration_bucket').annotate(count=Count('id'))
+
+    counters = {name: Counter() for name in FACET_FIELDS + ['price_bucket', 'duration_bucket']}
+    total = 0
+    for row in rows:
+        total += row['count']
+        for name, counter in counters.items():
+            counter[row[name]] += row['count']
+
+    facets = {'total': total}
+    for name in FACET_FIELDS:
+        facets[name] = [
+            {'value': value, 'count': count}
+            for value, count in sorted(counters[name].items(), key=lambda item: (-item[1], item[0]))
+        ]
+    # Prices render as strings, like the serializers' DecimalField output
+    facets['price'] = histogram(PRICE_BUCKETS, counters['price_bucket'], render=str)
+    facets['duration_minutes'] = histogram(DURATION_BUCKETS, counters['duration_bucket'])
+    return facets
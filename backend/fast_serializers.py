@@ -0,0 +1,179 @@
+from functools import cached_property, lru_cache
+from operator import itemgetter
+
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from .fieldsets import FieldsetSerializerMixin
+from .models import Booking
+from .serializers import SessionListSerializer, BookingListSerializer
+
+# Fields whose to_representation() returns database values unchanged, so rows
+# are copied into the output without a call per value
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.URLField, serializers.EmailField,
+    serializers.SlugField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField,
+)
+
+# Lookups keyset pagination reads from each row to build its cursors
+CURSOR_LOOKUPS = ('id', 'created_at')
+
+
+def is_passthrough(field):
+    if isinstance(field, PrimaryKeyRelatedField):
+        return field.pk_field is None
+    return type(field) in PASSTHROUGH_FIELDS
+
+
+def full_name(first_name, last_name):
+    # Same as AbstractUser.get_full_name()
+    return f'{first_name} {last_name}'.strip()
+
+
+def seats_remaining(max_attendees, reserved_seats):
+    # Same as Session.seats_remaining
+    return max(max_attendees - reserved_seats, 0)
+
+
+def image_srcset(renditions):
+    # Same as Session.image_srcset
+    return {
+        name: ', '.join(f"{rendition['url']} {rendition['width']}w" for rendition in sizes)
+        for name, sizes in renditions.items()
+    }
+
+
+class RowSerializer:
+    """
+    Read-only twin of a list ModelSerializer that serializes .values() rows.
+
+    Accessors are compiled once from the serializer's fields: plain fields
+    read the values() lookup named by their source, fields backed by a method
+    or property are computed from the columns listed in COMPUTED_FIELDS, and
+    expanded relations are nested RowSerializers over the joined columns.
+    Values pass through the original field's to_representation() unless it is
+    the identity, so the output equals serializer_class(instances, many=True).data.
+    """
+
+    def __init__(self, serializer_class, fields=None, expand=None, prefix=''):
+        self.serializer_class = serializer_class
+        self.fields = fields
+        self.expand = expand
+        self.prefix = prefix
+
+    def restrict(self, fields=None, expand=None):
+        """Row serializer for a ?fields= / ?expand= request"""
+        if fields is None and expand is None:
+            return self
+        return restricted_rows(self.serializer_class, fields, expand)
+
+    def get_serializer(self):
+        if issubclass(self.serializer_class, FieldsetSerializerMixin):
+            return self.serializer_class(fields=self.fields, expand=self.expand)
+        return self.serializer_class()
+
+    @cached_property
+    def accessors(self):
+        computed = COMPUTED_FIELDS.get(self.serializer_class, {})
+        accessors = []
+        for name, field in self.get_serializer().fields.items():
+            if field.write_only:
+                continue
+            if name in computed:
+                lookups, function = computed[name]
+                lookups = tuple(f'{self.prefix}{lookup}' for lookup in lookups)
+                accessors.append((name, lookups, self.compute(lookups, function)))
+                continue
+            lookup = self.prefix + '__'.join(field.source_attrs)
+            if isinstance(field, serializers.BaseSerializer):
+                nested = RowSerializer(type(field), prefix=f'{lookup}__')
+                accessors.append((name, tuple(nested.lookups), nested.serialize_related))
+            elif is_passthrough(field):
+                accessors.append((name, (lookup,), itemgetter(lookup)))
+            else:
+                accessors.append((name, (lookup,), self.convert(lookup, field.to_representation)))
+        return accessors
+
+    @staticmethod
+    def compute(lookups, function):
+        getter = itemgetter(*lookups)
+        if len(lookups) == 1:
+            return lambda row: function(getter(row))
+        return lambda row: function(*getter(row))
+
+    @staticmethod
+    def convert(lookup, to_representation):
+        def accessor(row):
+            value = row[lookup]
+            return None if value is None else to_representation(value)
+        return accessor
+
+    @cached_property
+    def lookups(self):
+        if self.prefix:
+            lookups = {f'{self.prefix}id': None}
+        else:
+            lookups = dict.fromkeys(CURSOR_LOOKUPS)
+        for name, field_lookups, accessor in self.accessors:
+            lookups.update(dict.fromkeys(field_lookups))
+        return list(lookups)
+
+    @cached_property
+    def row_accessors(self):
+        return [(name, accessor) for name, lookups, accessor in self.accessors]
+
+    def values(self, queryset):
+        return queryset.values(*self.lookups)
+
+    def serialize_row(self, row):
+        return {name: accessor(row) for name, accessor in self.row_accessors}
+
+    def serialize_related(self, row):
+        # A null foreign key leaves every joined column None
+        if row[f'{self.prefix}id'] is None:
+            return None
+        return self.serialize_row(row)
+
+    def serialize(self, rows):
+        accessors = self.row_accessors
+        return [{name: accessor(row) for name, accessor in accessors} for row in rows]
+
+
+@lru_cache(maxsize=128)
+def restricted_rows(serializer_class, fields, expand):
+    return RowSerializer(serializer_class, fields=fields, expand=expand)
+
+
+COMPUTED_FIELDS = {
+    SessionListSerializer: {
+        'creator_name': (('creator__first_name', 'creator__last_name'), full_name),
+        'seats_remaining': (('max_attendees', 'reserved_seats'), seats_remaining),
+        'image_srcset': (('image_renditions',), image_srcset),
+    },
+    BookingListSerializer: {
+        'creator_name': (('session__creator__first_name', 'session__creator__last_name'), full_name),
+        'user_name': (('user__first_name', 'user__last_name'), full_name),
+        'is_active': (('status',), lambda status: status in Booking.ACTIVE_STATUSES),
+        'is_past': (('status',), lambda status: status in Booking.PAST_STATUSES),
+    },
+}
+
+session_list_rows = RowSerializer(SessionListSerializer)
+booking_list_rows = RowSerializer(BookingListSerializer)
+
+
+class RowListMixin:
+    """Serve the list action from row_serializer instead of the ModelSerializer"""
+    row_serializer = None
+
+    def get_row_serializer(self, rows=None):
+        return rows or self.row_serializer
+
+    def list(self, request, *args, **kwargs):
+        rows = self.get_row_serializer()
+        queryset = rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.serialize(page))
+        return Response(rows.serialize(queryset))
@@ -0,0 +1,129 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_names(request, param):
+    """Comma-separated names from a query parameter, or None when it is absent"""
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+
+
+class FieldsetSerializerMixin:
+    """
+    Sparse fieldsets and expansion for a ModelSerializer.
+
+    expandable_fields maps a relation to the serializer it is rendered with
+    when expanded; default_expand lists the relations expanded when the
+    request has no ?expand=. An unexpanded relation that is in Meta.fields
+    renders as its primary key, any other is left out.
+    """
+    expandable_fields = {}
+    default_expand = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.requested_fields = fields
+        self.requested_expand = expand
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def fieldset_names(cls):
+        return list(dict.fromkeys([*cls.Meta.fields, *cls.expandable_fields]))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.default_expand if self.requested_expand is None else self.requested_expand
+        for name, serializer_class in self.expandable_fields.items():
+            if name in expand:
+                fields[name] = serializer_class(read_only=True)
+        if self.requested_fields:
+            fields = {name: field for name, field in fields.items() if name in self.requested_fields}
+        return fields
+
+
+def serializer_columns(serializer, model, prefix=''):
+    """
+    (only, select_related) lookups covering everything serializer reads from
+    model, or None if some field is backed by a method or property
+    """
+    only, related = [f'{prefix}{model._meta.pk.name}'], []
+    for field in serializer.fields.values():
+        current = model
+        path = prefix
+        for index, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return None
+            path = f'{path}{attr}'
+            last = index == len(field.source_attrs) - 1
+            if last and not isinstance(field, serializers.BaseSerializer):
+                if not model_field.concrete:
+                    return None
+                only.append(path)
+                break
+            if not (model_field.many_to_one or model_field.one_to_one):
+                return None
+            # select_related() needs the foreign key itself loaded
+            only.append(path)
+            related.append(path)
+            current = model_field.related_model
+            path = f'{path}__'
+        if isinstance(field, serializers.BaseSerializer):
+            nested = serializer_columns(field, current, path)
+            if nested is None:
+                return None
+            only.extend(nested[0])
+            related.extend(nested[1])
+    return list(dict.fromkeys(only)), list(dict.fromkeys(related))
+
+
+class FieldsetMixin:
+    """
+    ?fields= and ?expand= for a viewset. Names are checked against the
+    response serializer. When a fieldset is requested, list rows are limited
+    to its columns, and list/retrieve querysets to its joins and columns.
+    """
+    fieldset_actions = ['list', 'retrieve']
+
+    def get_fieldset(self, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        if not issubclass(serializer_class, FieldsetSerializerMixin):
+            return {}
+        fieldset = {}
+        for param, allowed in ((FIELDS_PARAM, serializer_class.fieldset_names()),
+                               (EXPAND_PARAM, serializer_class.expandable_fields)):
+            names = parse_names(self.request, param)
+            if names is None:
+                continue
+            unknown = [name for name in names if name not in allowed]
+            if unknown:
+                raise ValidationError({param: f"Unknown field(s): {', '.join(unknown)}"})
+            fieldset[param] = names
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_row_serializer(self, rows=None):
+        rows = super().get_row_serializer(rows)
+        return rows.restrict(**self.get_fieldset(rows.serializer_class))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in self.fieldset_actions or not self.get_fieldset():
+            return queryset
+        columns = serializer_columns(self.get_serializer(), queryset.model)
+        if columns is None:
+            return queryset
+        only, related = columns
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
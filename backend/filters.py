@@ -0,0 +1,25 @@
+import django_filters
+from .models import Session, Booking
+
+
+class SessionFilter(django_filters.FilterSet):
+    """Catalog filters shared by the session list and its facet counts"""
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lt')
+    min_duration = django_filters.NumberFilter(field_name='duration_minutes', lookup_expr='gte')
+    max_duration = django_filters.NumberFilter(field_name='duration_minutes', lookup_expr='lt')
+    
+    class Meta:
+        model = Session
+        fields = ['category', 'session_type', 'currency']
+
+
+class BookingExportFilter(django_filters.FilterSet):
+    """Filters for the creator booking export, applied in SQL"""
+    date_from = django_filters.IsoDateTimeFilter(field_name='booking_date', lookup_expr='gte')
+    date_to = django_filters.IsoDateTimeFilter(field_name='booking_date', lookup_expr='lt')
+    status = django_filters.MultipleChoiceFilter(choices=Booking.STATUS_CHOICES)
+    
+    class Meta:
+        model = Booking
+        fields = ['session']
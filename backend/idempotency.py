@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+# Seconds a key stays claimed by a request that is still running; bounds
+# how long a crashed worker can block retries of the same key
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+
+
+def get_idempotency_key(request):
+    return request.headers.get(IDEMPOTENCY_HEADER, '').strip() or None
+
+
+def idempotency_cache_key(scope, user_id, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'idempotency:{scope}:{user_id}:{digest}'
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, so a key cannot be reused for a different request"""
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def error_response(message, status_code):
+    return Response({'error': message}, status=status_code)
+
+
+def idempotent(scope):
+    """
+    Honour an Idempotency-Key header on a view or viewset handler, sync or async.
+
+    The first request with a key claims it with cache.add() and runs the
+    handler; a successful (2xx) response is stored with the request's
+    fingerprint for IDEMPOTENCY_KEY_TIMEOUT seconds. Retries with the same
+    key and body get the stored response back without running the handler
+    again. Failed responses are not stored, so they can be retried with the
+    same key. Requests without the header, or from anonymous users, are
+    handled as usual.
+    """
+    def decorator(handler):
+        if asyncio.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(*args, **kwargs):
+                request = next(arg for arg in args if isinstance(arg, Request))
+                cache_key, fingerprint, response = claim_details(scope, request)
+                if response is not None:
+                    return response
+                if cache_key is None:
+                    return await handler(*args, **kwargs)
+
+                claimed = await cache.aadd(
+                    cache_key, processing_entry(fingerprint), timeout=IDEMPOTENCY_LOCK_TIMEOUT
+                )
+                if not claimed:
+                    return replay(await cache.aget(cache_key) or processing_entry(), fingerprint)
+
+                try:
+                    response = await handler(*args, **kwargs)
+                except Exception:
+                    await cache.adelete(cache_key)
+                    raise
+
+                if status.is_success(response.status_code):
+                    await cache.aset(cache_key, completed_entry(fingerprint, response),
+                                     timeout=settings.IDEMPOTENCY_KEY_TIMEOUT)
+                else:
+                    await cache.adelete(cache_key)
+                return response
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            request = next(arg for arg in args if isinstance(arg, Request))
+            cache_key, fingerprint, response = claim_details(scope, request)
+            if response is not None:
+                return response
+            if cache_key is None:
+                return handler(*args, **kwargs)
+
+            claimed = cache.add(
+                cache_key, processing_entry(fingerprint), timeout=IDEMPOTENCY_LOCK_TIMEOUT
+            )
+            if not claimed:
+                # An entry that expired since add() is reported as in progress; a retry claims it
+                return replay(cache.get(cache_key) or processing_entry(), fingerprint)
+
+            try:
+                response = handler(*args, **kwargs)
+            except Exception:
+                cache.delete(cache_key)
+                raise
+
+            if status.is_success(response.status_code):
+                cache.set(cache_key, completed_entry(fingerprint, response),
+                          timeout=settings.IDEMPOTENCY_KEY_TIMEOUT)
+            else:
+                cache.delete(cache_key)
+            return response
+        return wrapper
+    return decorator
+
+
+def claim_details(scope, request):
+    """
+    (cache_key, fingerprint, None) for a request carrying a usable key,
+    (None, None, None) when it is handled as usual, or (None, None, response)
+    when the key is rejected
+    """
+    key = get_idempotency_key(request)
+    if key is None or not request.user.is_authenticated:
+        return None, None, None
+    if len(key) > MAX_KEY_LENGTH:
+        return None, None, error_response(
+            f'{IDEMPOTENCY_HEADER} may be at most {MAX_KEY_LENGTH} characters',
+            status.HTTP_400_BAD_REQUEST
+        )
+    return idempotency_cache_key(scope, request.user.pk, key), request_fingerprint(request), None
+
+
+def processing_entry(fingerprint=None):
+    entry = {'state': PROCESSING}
+    if fingerprint is not None:
+        entry['fingerprint'] = fingerprint
+    return entry
+
+
+def completed_entry(fingerprint, response):
+    return {
+        'state': COMPLETED,
+        'fingerprint': fingerprint,
+        'status': response.status_code,
+        'data': response.data,
+    }
+
+
+def replay(entry, fingerprint):
+    """Response for a request whose key is already claimed"""
+    if entry.get('fingerprint', fingerprint) != fingerprint:
+        return error_response(
+            f'{IDEMPOTENCY_HEADER} was already used for a different request',
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if entry['state'] == PROCESSING:
+        return error_response(
+            f'A request with this {IDEMPOTENCY_HEADER} is still being processed',
+            status.HTTP_409_CONFLICT
+        )
+    return Response(entry['data'], status=entry['status'], headers={REPLAYED_HEADER: 'true'})
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from backend.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the daily creator analytics rollups from the bookings table.
+    Run once after deploying the rollups, and any time they need repairing;
+    booking writes keep them up to date in between.
+    """
+    help = 'Recompute session daily rollups from bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creator', type=int,
+                            help='Only rebuild the rollups of this creator (user ID)')
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(options['creator'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows'))
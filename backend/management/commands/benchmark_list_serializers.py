@@ -0,0 +1,113 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from backend.fast_serializers import session_list_rows, booking_list_rows
+from backend.models import Session, Booking
+from backend.renderers import FastJSONRenderer
+from backend.serializers import SessionListSerializer, BookingListSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Time list serialization through ModelSerializer + JSONRenderer against
+    RowSerializer + FastJSONRenderer on generated rows, checking both paths
+    render identical bytes. The data is created in a transaction that is
+    rolled back afterwards.
+    """
+    help = 'Benchmark the row serializers used by list endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000],
+                            help='Row counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per measurement; the fastest is reported')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            creator, user = self.create_users()
+            seeded = 0
+            for rows in sorted(options['rows']):
+                self.seed(creator, user, rows - seeded)
+                seeded = rows
+                self.report(rows, options['repeat'])
+            transaction.set_rollback(True)
+
+    def create_users(self):
+        creator = User.objects.create(
+            username='benchmark-creator', email='creator@benchmark.invalid',
+            first_name='Bench', last_name='Creator', role='creator'
+        )
+        user = User.objects.create(
+            username='benchmark-user', email='user@benchmark.invalid',
+            first_name='Bench', last_name='User', role='user'
+        )
+        return creator, user
+
+    def seed(self, creator, user, count):
+        sessions = Session.objects.bulk_create([
+            Session(
+                creator=creator,
+                title=f'Benchmark session {index}',
+                description='Generated for the list serializer benchmark',
+                category='Programming',
+                duration_minutes=60,
+                price=Decimal('19.99'),
+                status='published',
+            )
+            for index in range(count)
+        ])
+        statuses = [status for status, label in Booking.STATUS_CHOICES]
+        Booking.objects.bulk_create([
+            Booking(
+                user=user,
+                session=session,
+                booking_date=timezone.now(),
+                total_price=session.price,
+                status=statuses[index % len(statuses)],
+            )
+            for index, session in enumerate(sessions)
+        ])
+
+    def report(self, rows, repeat):
+        cases = [
+            ('sessions', Session.objects.select_related('creator'),
+             SessionListSerializer, session_list_rows),
+            ('bookings', Booking.objects.select_related('user', 'session', 'session__creator'),
+             BookingListSerializer, booking_list_rows),
+        ]
+        for name, queryset, serializer_class, row_serializer in cases:
+            queryset = queryset.order_by('-created_at', '-id')[:rows]
+
+            def model_path():
+                data = serializer_class(list(queryset), many=True).data
+                return JSONRenderer().render(data)
+
+            def row_path():
+                data = row_serializer.serialize(list(row_serializer.values(queryset)))
+                return FastJSONRenderer().render(data)
+
+            model_time, model_output = self.measure(model_path, repeat)
+            row_time, row_output = self.measure(row_path, repeat)
+            if model_output != row_output:
+                raise CommandError(f'{name}: row serializer output differs at {rows} rows')
+
+            self.stdout.write(
+                f'{name:>8} {rows:>6} rows  ModelSerializer {model_time * 1000:8.1f} ms  '
+                f'RowSerializer {row_time * 1000:8.1f} ms  {model_time / row_time:5.1f}x'
+            )
+
+    def measure(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
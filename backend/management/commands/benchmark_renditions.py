@@ -0,0 +1,98 @@
+import io
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image, ImageDraw
+from backend.renditions import decode, encode, rendition_widths, resize, supported_formats
+
+# Generated corpus: (name, size, Pillow format); photos carry EXIF like camera output
+SAMPLE_IMAGES = (
+    ('camera-12mp.jpg', (4000, 3000), 'JPEG'),
+    ('portrait-rotated.jpg', (4032, 3024), 'JPEG'),
+    ('screenshot-1080p.png', (1920, 1080), 'PNG'),
+    ('logo-alpha.png', (1200, 800), 'PNG'),
+    ('banner.webp', (2400, 800), 'WEBP'),
+)
+
+
+class Command(BaseCommand):
+    """
+    Time decoding and each rendition's resize + encode on a corpus of sample
+    images: the files in --images, or generated ones. Decoding is timed with
+    and without JPEG draft mode to show what downscaling in the decoder saves.
+    """
+    help = 'Benchmark image rendition decode and encode times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=Path,
+                            help='Directory of sample images (default: a generated corpus)')
+        parser.add_argument('--widths', type=int, nargs='+', default=settings.IMAGE_RENDITION_WIDTHS,
+                            help='Rendition widths')
+        parser.add_argument('--formats', nargs='+', default=settings.IMAGE_RENDITION_FORMATS,
+                            help='Rendition formats')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per measurement; the fastest is reported')
+
+    def handle(self, *args, **options):
+        formats = supported_formats(options['formats'])
+        skipped = sorted(set(options['formats']) - set(formats))
+        if skipped:
+            self.stdout.write(f'Skipping formats Pillow cannot write: {", ".join(skipped)}')
+
+        corpus = self.load(options['images']) if options['images'] else self.generate()
+        for name, data in corpus:
+            self.report(name, data, options['widths'], formats, options['repeat'])
+
+    def load(self, directory):
+        paths = sorted(path for path in directory.iterdir() if path.is_file())
+        if not paths:
+            raise CommandError(f'No images in {directory}')
+        return [(path.name, path.read_bytes()) for path in paths]
+
+    def generate(self):
+        corpus = []
+        for name, size, pil_format in SAMPLE_IMAGES:
+            mode = 'RGBA' if 'alpha' in name else 'RGB'
+            image = Image.linear_gradient('L').resize(size).convert(mode)
+            draw = ImageDraw.Draw(image)
+            for offset in range(0, size[0], max(size[0] // 24, 1)):
+                draw.ellipse((offset, offset // 2, offset + size[0] // 6, offset // 2 + size[1] // 4),
+                             fill=(offset % 256, 90, 255 - offset % 256, 200)[:len(mode)])
+            options = {}
+            if pil_format == 'JPEG':
+                exif = Image.Exif()
+                exif[0x010F] = 'Benchmark camera'
+                exif[0x0112] = 6 if 'rotated' in name else 1
+                options = {'quality': 92, 'exif': exif.tobytes()}
+            output = io.BytesIO()
+            image.save(output, format=pil_format, **options)
+            corpus.append((name, output.getvalue()))
+        return corpus
+
+    def report(self, name, data, widths, formats, repeat):
+        full_time, full = self.measure(lambda: decode(io.BytesIO(data), 10 ** 6), repeat)
+        decode_time, image = self.measure(lambda: decode(io.BytesIO(data), max(widths)), repeat)
+        self.stdout.write(
+            f'{name}: {len(data) / 1024:.0f} KB {full.width}x{full.height}  '
+            f'decode {full_time * 1000:.1f} ms, for {max(widths)}w {decode_time * 1000:.1f} ms '
+            f'({image.width}x{image.height})'
+        )
+        for width in rendition_widths(image.width, widths):
+            resize_time, resized = self.measure(lambda: resize(image, width), repeat)
+            for format_name in formats:
+                encode_time, output = self.measure(lambda: encode(resized, format_name), repeat)
+                self.stdout.write(
+                    f'  {width:>5}w {format_name:<5} resize {resize_time * 1000:7.1f} ms  '
+                    f'encode {encode_time * 1000:7.1f} ms  {len(output) / 1024:7.1f} KB'
+                )
+
+    def measure(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
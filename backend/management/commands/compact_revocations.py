@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from backend.revocation import compact
+
+
+class Command(BaseCommand):
+    """
+    Delete revocations whose tokens have expired and put back into the cache
+    any live ones it lost, e.g. after a cache restart. Meant to run from cron
+    hourly, and once after the cache is flushed.
+    """
+    help = 'Delete expired token revocations and restore live ones to the cache'
+
+    def handle(self, *args, **options):
+        deleted, restored = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired revocations, restored {restored} to the cache'
+        ))
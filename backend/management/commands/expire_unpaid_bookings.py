@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from backend.bulk import expire_unpaid_bookings, unpaid_holds
+
+
+class Command(BaseCommand):
+    """
+    Cancel pending bookings that were never paid within the seat hold
+    timeout, returning their seats to the session. Meant to run from cron
+    every few minutes.
+    """
+    help = 'Release the seats of unpaid bookings older than the hold timeout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=int, default=settings.BOOKING_SEAT_HOLD_TIMEOUT,
+                            help='Seconds an unpaid booking may hold its seats')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report expired holds without cancelling them')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['timeout'])
+        if options['dry_run']:
+            self.stdout.write(f'{unpaid_holds(cutoff).count()} unpaid bookings have expired')
+            return
+        expired = expire_unpaid_bookings(cutoff)
+        self.stdout.write(self.style.SUCCESS(f'Cancelled {expired} unpaid bookings'))
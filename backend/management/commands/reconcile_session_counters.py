@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from backend.counters import COUNTER_FIELDS, drifted_sessions, repair_session_counters
+
+
+class Command(BaseCommand):
+    """
+    Recompute Session booking counters from the bookings table and repair any
+    session whose stored counters have drifted
+    """
+    help = 'Repair drifted booking counters on sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted sessions without repairing them')
+
+    def handle(self, *args, **options):
+        fields = [field for name in COUNTER_FIELDS for field in (name, f'expected_{name}')]
+        drifted = list(drifted_sessions().values('id', *fields))
+
+        for row in drifted:
+            changes = ', '.join(
+                f"{name} {row[name]} -> {row[f'expected_{name}']}"
+                for name in COUNTER_FIELDS
+                if row[name] != row[f'expected_{name}']
+            )
+            self.stdout.write(f"Session {row['id']}: {changes}")
+
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} sessions have drifted counters')
+            return
+
+        repaired = repair_session_counters([row['id'] for row in drifted]) if drifted else 0
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {repaired} sessions'))
@@ -0,0 +1,53 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from backend.models import Session
+from backend.views import SessionViewSet
+
+
+class Command(BaseCommand):
+    """
+    Pre-populate the catalog cache by rendering catalog pages and session
+    details through SessionViewSet, so cached payloads match live responses
+    """
+    help = 'Warm the session catalog cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5,
+                            help='Number of catalog pages to cache')
+        parser.add_argument('--details', type=int, default=500,
+                            help='Number of most recent published sessions to cache details for')
+        parser.add_argument('--host', default=settings.ALLOWED_HOSTS[0],
+                            help='Host clients use, which appears in pagination links')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        host = options['host']
+        # Throttles are per client address; the warm-up is not a client
+        list_view = SessionViewSet.as_view({'get': 'list'}, throttle_classes=[])
+        detail_view = SessionViewSet.as_view({'get': 'retrieve'}, throttle_classes=[])
+
+        path = '/api/sessions/'
+        pages = 0
+        while path and pages < options['pages']:
+            response = list_view(factory.get(path, HTTP_HOST=host))
+            pages += 1
+            next_link = response.data.get('next')
+            path = None
+            if next_link:
+                parts = urlsplit(next_link)
+                path = f'{parts.path}?{parts.query}'
+
+        session_ids = Session.objects.filter(status='published').order_by(
+            '-created_at', '-id'
+        ).values_list('id', flat=True)[:options['details']]
+        details = 0
+        for session_id in session_ids:
+            detail_view(factory.get(f'/api/sessions/{session_id}/', HTTP_HOST=host), pk=session_id)
+            details += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Cached {pages} catalog pages and {details} session details'
+        ))
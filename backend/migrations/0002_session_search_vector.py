@@ -0,0 +1,74 @@
+# Generated by Django 4.2.8 on 2026-10-17 12:29
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# The search document weights title (A), category (B), creator name (C) and
+# description (D). Triggers keep it current on every write path, including
+# bulk_create and queryset.update(), which bypass model signals.
+CREATE_TRIGGERS = """
+CREATE FUNCTION sessions_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    creator_name text;
+BEGIN
+    SELECT concat_ws(' ', first_name, last_name, username) INTO creator_name
+    FROM users WHERE id = NEW.creator_id;
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(creator_name, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sessions_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, category, description, creator_id ON sessions
+    FOR EACH ROW EXECUTE FUNCTION sessions_search_vector_update();
+
+CREATE FUNCTION users_session_search_refresh() RETURNS trigger AS $$
+BEGIN
+    UPDATE sessions SET title = title WHERE creator_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_session_search_trigger
+    AFTER UPDATE OF first_name, last_name, username ON users
+    FOR EACH ROW
+    WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name
+          OR OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION users_session_search_refresh();
+
+UPDATE sessions SET title = title;
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS users_session_search_trigger ON users;
+DROP FUNCTION IF EXISTS users_session_search_refresh();
+DROP TRIGGER IF EXISTS sessions_search_vector_trigger ON sessions;
+DROP FUNCTION IF EXISTS sessions_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='sessions_search_gin'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
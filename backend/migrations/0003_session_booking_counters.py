@@ -0,0 +1,46 @@
+# Generated by Django 4.2.8 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+
+BACKFILL_COUNTERS = """
+UPDATE sessions SET
+    bookings_count = counts.total,
+    pending_bookings_count = counts.pending,
+    confirmed_attendees = counts.confirmed
+FROM (
+    SELECT session_id,
+           COUNT(*) AS total,
+           COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+           COALESCE(SUM(attendees_count) FILTER (WHERE status = 'confirmed'), 0) AS confirmed
+    FROM bookings
+    GROUP BY session_id
+) AS counts
+WHERE sessions.id = counts.session_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_session_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='bookings_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='confirmed_attendees',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='pending_bookings_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_COUNTERS, migrations.RunSQL.noop),
+    ]
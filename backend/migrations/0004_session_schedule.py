@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_session_booking_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='series_id',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.8 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+BACKFILL_RESERVED_SEATS = """
+UPDATE sessions SET reserved_seats = seats.reserved
+FROM (
+    SELECT session_id, SUM(attendees_count) AS reserved
+    FROM bookings
+    WHERE status <> 'cancelled'
+    GROUP BY session_id
+) AS seats
+WHERE sessions.id = seats.session_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_session_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='reserved_seats',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_RESERVED_SEATS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.8 on 2026-10-17 17:20
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_session_reserved_seats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('currency', models.CharField(max_length=3)),
+                ('bookings', models.IntegerField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('confirmed_attendees', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='backend.session')),
+            ],
+            options={
+                'db_table': 'session_daily_rollups',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['creator', 'day'], name='session_dai_creator_60962c_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sessiondailyrollup',
+            constraint=models.UniqueConstraint(fields=('session', 'day'), name='session_daily_rollup_unique'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.8 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_token_revocations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['image_url'], name='sessions_image_url_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
@@ -20,15 +22,83 @@ class User(AbstractUser):
     oauth_provider = models.CharField(max_length=50, blank=True, null=True)
     oauth_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
     
+    # Bumped whenever a field copied into access tokens, the active flag or
+    # the password changes, which outdates every token issued before
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields access tokens carry as claims
+    CLAIM_FIELDS = ('username', 'role', 'is_staff')
+    # Fields the cached session catalog shows for creators
+    CATALOG_FIELDS = ('username', 'first_name', 'last_name')
+    
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
     
     def __str__(self):
         return f"{self.username} ({self.role})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._loaded_claims = user.claim_values()
+        user._loaded_catalog = user.catalog_values()
+        return user
+    
+    def claim_values(self):
+        # Read from __dict__ so deferred fields are not loaded
+        return {field: self.__dict__[field] for field in self.CLAIM_FIELDS + ('is_active', 'password')
+                if field in self.__dict__}
+    
+    def catalog_values(self):
+        return {field: self.__dict__[field] for field in self.CATALOG_FIELDS if field in self.__dict__}
+    
+    def refresh_from_db(self, using=None, fields=None):
+        """Loading any deferred field loads all of them, in one query"""
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.intersection(fields):
+            fields = deferred.union(fields)
+        super().refresh_from_db(using, fields)
+        # Deferred fields just loaded are stored values too
+        for loaded, current in ((getattr(self, '_loaded_claims', None), self.claim_values()),
+                                (getattr(self, '_loaded_catalog', None), self.catalog_values())):
+            if loaded is not None:
+                loaded.update({field: value for field, value in current.items() if field in deferred})
+    
+    def save(self, *args, **kwargs):
+        # Django only writes the loaded fields of a partly deferred instance (such
+        # as a user built from token claims); updated_at has to go with them, as
+        # ETags are derived from it
+        deferred = self.get_deferred_fields()
+        if kwargs.get('update_fields') is None and deferred and not self._state.adding:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        if kwargs.get('update_fields'):
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
+        
+        # As with the catalog below, a field assigned while deferred counts as changed
+        loaded = getattr(self, '_loaded_claims', None)
+        if loaded is not None and any(
+            field not in loaded or loaded[field] != value for field, value in self.claim_values().items()
+        ):
+            self.token_version = (self.token_version or 0) + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        # Read by the post_save handler that invalidates the catalog cache. A field
+        # assigned while still deferred has no stored value, so it counts as changed
+        loaded_catalog = getattr(self, '_loaded_catalog', None)
+        self.catalog_changed = loaded_catalog is None or any(
+            field not in loaded_catalog or loaded_catalog[field] != value
+            for field, value in self.catalog_values().items()
+        )
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.claim_values()
+        self._loaded_catalog = self.catalog_values()
 
 
 class Session(models.Model):
@@ -55,9 +125,26 @@ class Session(models.Model):
     # Media
     image_url = models.URLField(blank=True, null=True)
     thumbnail_url = models.URLField(blank=True, null=True)
+    # {format: [{"width", "height", "url"}, ...]} made from image_url by backend.storage
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     
+    # Scheduling; sessions expanded from one recurrence rule share a series_id
+    starts_at = models.DateTimeField(null=True, blank=True)
+    series_id = models.UUIDField(null=True, blank=True, db_index=True)
+    
+    # Booking counters, maintained with F() updates by backend.counters
+    bookings_count = models.IntegerField(default=0, editable=False)
+    pending_bookings_count = models.IntegerField(default=0, editable=False)
+    confirmed_attendees = models.IntegerField(default=0, editable=False)
+    # Seats held by bookings that are not cancelled; reservations never take it past max_attendees
+    reserved_seats = models.IntegerField(default=0, editable=False)
+    COUNTER_FIELDS = ('bookings_count', 'pending_bookings_count', 'confirmed_attendees', 'reserved_seats')
+    
+    # Full-text search document, maintained by database triggers (see migration 0002)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -67,14 +154,44 @@ class Session(models.Model):
         indexes = [
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['creator', 'status']),
+            GinIndex(fields=['search_vector'], name='sessions_search_gin'),
+            # Renditions are attached to the sessions showing an image by its URL
+            models.Index(fields=['image_url'], name='sessions_image_url_idx'),
         ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # A full save would write back stale in-memory counters over concurrent F()
+        # updates, or renditions stored by the rendition job after this instance was loaded
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = self.full_save_fields()
+        super().save(*args, **kwargs)
+    
+    def full_save_fields(self):
+        """Fields written by a save() without update_fields"""
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            and field.name != 'image_renditions'
+        ]
+    
     @property
     def is_available(self):
         return self.status == 'published'
+    
+    @property
+    def seats_remaining(self):
+        return max(self.max_attendees - self.reserved_seats, 0)
+    
+    @property
+    def image_srcset(self):
+        """{format: srcset} for the image renditions, e.g. {"webp": "<url> 320w, <url> 640w"}"""
+        return {
+            name: ', '.join(f"{rendition['url']} {rendition['width']}w" for rendition in renditions)
+            for name, renditions in self.image_renditions.items()
+        }
 
 
 class Booking(models.Model):
@@ -93,6 +210,11 @@ class Booking(models.Model):
         ('refunded', 'Refunded'),
     ]
     
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    PAST_STATUSES = ('completed', 'cancelled')
+    # Every status except these holds attendees_count seats on the session
+    RELEASED_STATUSES = ('cancelled',)
+    
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
     session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='bookings')
     
@@ -130,9 +252,56 @@ class Booking(models.Model):
     
     @property
     def is_active(self):
-        return self.status in ['pending', 'confirmed']
+        return self.status in self.ACTIVE_STATUSES
     
     @property
     def is_past(self):
-        return self.status in ['completed', 'cancelled']
+        return self.status in self.PAST_STATUSES
+
+
 
+class SessionDailyRollup(models.Model):
+    """
+    Per-session, per-day booking totals for creator analytics. Each booking
+    is counted on the day it was made, in its current state; rows are kept in
+    step with booking writes by backend.analytics.
+    """
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    
+    bookings = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    confirmed_attendees = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        db_table = 'session_daily_rollups'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'day'], name='session_daily_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['creator', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.session_id} on {self.day}"
+
+
+class TokenRevocation(models.Model):
+    """
+    Durable copy of one entry in the revocation cache: a revoked token's JTI
+    or a user's revoke-everything cutoff. Rows outlive their cache entries
+    so a lost cache can be re-seeded, and are compacted once expired.
+    """
+    key = models.CharField(max_length=255, primary_key=True)
+    value = models.FloatField()
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        db_table = 'token_revocations'
+    
+    def __str__(self):
+        return self.key
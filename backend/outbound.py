@@ -0,0 +1,155 @@
+import http.cookiejar
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from .aio import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Methods that may be retried after any failure; other methods are only
+# retried when the connection could not be opened, i.e. nothing was sent
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Full-jitter backoff: attempt n sleeps a random time up to min(MAX, BASE * 2**n)
+RETRY_BACKOFF_BASE = 0.1
+RETRY_BACKOFF_MAX = 2.0
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def build_session():
+    """
+    A requests session keeping up to OUTBOUND_POOL_SIZE idle keep-alive
+    connections per host. Retries are done by request(), not urllib3. The
+    session is shared by every user's calls, so it accepts no cookies.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(
+        pool_connections=16, pool_maxsize=settings.OUTBOUND_POOL_SIZE, max_retries=0
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+SESSION = build_session()
+
+
+class OutboundMetrics:
+    """Per-service call counts and latency histograms for this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.services = {}
+
+    def record(self, service, elapsed, attempts, failed):
+        elapsed_ms = elapsed * 1000
+        with self.lock:
+            stats = self.services.get(service)
+            if stats is None:
+                stats = self.services[service] = {
+                    'calls': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            stats['calls'] += 1
+            stats['errors'] += failed
+            stats['retries'] += attempts - 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['buckets'][bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def snapshot(self):
+        """{service: stats} with mean latency and cumulative bucket counts keyed by upper bound"""
+        with self.lock:
+            services = {service: dict(stats, buckets=list(stats['buckets']))
+                        for service, stats in self.services.items()}
+        for stats in services.values():
+            cumulative, buckets = 0, {}
+            for bound, count in zip((*LATENCY_BUCKETS_MS, '+Inf'), stats['buckets']):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            stats['buckets'] = buckets
+            stats['mean_ms'] = round(stats['total_ms'] / stats['calls'], 2)
+            stats['total_ms'] = round(stats['total_ms'], 2)
+            stats['max_ms'] = round(stats['max_ms'], 2)
+        return services
+
+    def reset(self):
+        with self.lock:
+            self.services = {}
+
+
+metrics = OutboundMetrics()
+
+
+def should_retry(method, response=None, error=None):
+    if method in IDEMPOTENT_METHODS:
+        return error is not None or response.status_code in RETRY_STATUSES
+    return isinstance(error, requests.ConnectTimeout)
+
+
+def backoff(attempt):
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+
+def request(service, method, url, **kwargs):
+    """
+    Make a provider call over the shared keep-alive pools with connect/read
+    timeouts and up to OUTBOUND_MAX_RETRIES jittered retries, recording its
+    latency under service. Returns the last response or raises the last
+    requests exception.
+    """
+    method = method.upper()
+    kwargs.setdefault('timeout', (settings.OUTBOUND_CONNECT_TIMEOUT, settings.OUTBOUND_READ_TIMEOUT))
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        response = error = None
+        try:
+            response = SESSION.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            error = e
+        if attempt >= settings.OUTBOUND_MAX_RETRIES or not should_retry(method, response, error):
+            break
+        if response is not None:
+            response.close()
+        time.sleep(backoff(attempt))
+        attempt += 1
+
+    elapsed = time.monotonic() - started
+    failed = error is not None or response.status_code >= 500
+    metrics.record(service, elapsed, attempt + 1, failed)
+    # Path only: query strings may carry credentials
+    parts = urlsplit(url)
+    logger.info(
+        'outbound %s %s %s%s -> %s in %.1fms (%d attempts)',
+        service, method, parts.netloc, parts.path,
+        type(error).__name__ if error else response.status_code,
+        elapsed * 1000, attempt + 1
+    )
+    if error is not None:
+        raise error
+    return response
+
+
+async def arequest(service, method, url, **kwargs):
+    """request() for async views, run on the provider I/O pool"""
+    return await run_blocking(request, service, method, url, **kwargs)
+
+
+async def aget(service, url, **kwargs):
+    return await arequest(service, 'GET', url, **kwargs)
+
+
+async def apost(service, url, **kwargs):
+    return await arequest(service, 'POST', url, **kwargs)
@@ -0,0 +1,205 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def approximate_count(queryset):
+    """
+    Estimate the number of rows a queryset matches from Postgres planner
+    statistics (EXPLAIN), without scanning the rows like COUNT(*) does
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id)
+
+    Each page is a range scan that starts right after the last row of the
+    previous page, so page 1000 costs the same as page 1 and no COUNT(*) is
+    run. Clients can opt in to an approximate total with ?approximate_count=true.
+    The order is fixed to newest first; ?ordering= is refused rather than ignored.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'approximate_count'
+    invalid_cursor_message = 'Invalid cursor'
+    ordering_query_param = api_settings.ORDERING_PARAM
+    ordering = '-created_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.check_ordering(request)
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.total = None
+        if self.wants_count(request):
+            self.total = approximate_count(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+
+        if position is not None:
+            created_at, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+
+        # Fetch one extra row to learn whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.total is not None:
+            response['approximate_count'] = self.total
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'approximate_count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def check_ordering(self, request):
+        requested = request.query_params.get(self.ordering_query_param)
+        if requested not in (None, '', self.ordering):
+            raise ValidationError({
+                self.ordering_query_param: [f'Only "{self.ordering}" is supported with cursor pagination']
+            })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def wants_count(self, request):
+        value = request.query_params.get(self.count_query_param, '')
+        return value.lower() in ('1', 'true', 'yes')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        # Pages hold model instances or .values() rows
+        if isinstance(row, dict):
+            created_at, pk = row['created_at'], row['id']
+        else:
+            created_at, pk = row.created_at, row.pk
+        tokens = {'c': created_at.isoformat(), 'i': str(pk)}
+        if reverse:
+            tokens['r'] = '1'
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """Return ((created_at, id), reverse) for the requested cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'))
+            created_at = parse_datetime(tokens['c'][0])
+            pk = int(tokens['i'][0])
+            reverse = tokens.get('r', ['0'])[0] == '1'
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+
+class NamedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination for one of several lists in a single response (dashboards).
+    Each list reads its own cursor parameter, e.g. ?sessions_cursor=
+    """
+
+    def __init__(self, name):
+        self.cursor_query_param = f'{name}_cursor'
+
+    def get_links(self):
+        return {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+
+
+class RankedPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination for relevance-ordered results, which have no
+    stable keyset. Fetches one extra row instead of running COUNT(*).
+    """
+    max_limit = 50
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
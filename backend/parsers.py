@@ -0,0 +1,26 @@
+import codecs
+import csv
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """
+    Parse a text/csv body with a header row into a list of dicts.
+    Empty cells are left out so model defaults apply.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            reader = csv.DictReader(codecs.iterdecode(stream, encoding))
+            return [
+                {field: value for field, value in row.items() if field and value not in ('', None)}
+                for row in reader
+            ]
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ParseError(f'CSV parse error - {e}')
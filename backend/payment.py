@@ -1,28 +1,32 @@
 import stripe
+from adrf.decorators import api_view as async_api_view
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from rest_framework.permissions import IsAuthenticated
+from django.http import Http404
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes, throttle_classes
+)
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.throttling import UserRateThrottle
 from .models import Booking
-from django.shortcuts import get_object_or_404
+from .counters import transition_booking
+from .idempotency import idempotent, get_idempotency_key
+from .aio import run_blocking
+from .ratelimit import PaymentThrottle
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
-# Custom throttle for payment operations
-class PaymentThrottle(UserRateThrottle):
-    rate = '10/hour'
-
-
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([PaymentThrottle])
-def create_payment_intent(request):
+@idempotent('payment-intent')
+async def create_payment_intent(request):
     """
     Create a Stripe payment intent for a booking
     Rate limited to 10 requests per hour
+    Retries carrying the same Idempotency-Key replay the first response
     """
     booking_id = request.data.get('booking_id')
     
@@ -32,7 +36,12 @@ def create_payment_intent(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    try:
+        booking = await Booking.objects.select_related('session').aget(
+            id=booking_id, user=request.user
+        )
+    except Booking.DoesNotExist:
+        raise Http404
     
     if booking.payment_status == 'paid':
         return Response(
@@ -40,9 +49,16 @@ def create_payment_intent(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    # Forwarded so Stripe also dedupes a retry this process did not see
+    idempotency_key = get_idempotency_key(request)
+    if idempotency_key:
+        idempotency_key = f'create-intent:{request.user.pk}:{booking.pk}:{idempotency_key}'
+    
     try:
         # Create payment intent
-        intent = stripe.PaymentIntent.create(
+        intent = await run_blocking(
+            stripe.PaymentIntent.create,
+            idempotency_key=idempotency_key,
             amount=int(booking.total_price * 100),  # Convert to cents
             currency=booking.session.currency.lower(),
             metadata={
@@ -57,7 +73,7 @@ def create_payment_intent(request):
         
         # Save payment intent ID
         booking.payment_intent_id = intent.id
-        booking.save()
+        await booking.asave(update_fields=['payment_intent_id', 'updated_at'])
         
         return Response({
             'client_secret': intent.client_secret,
@@ -71,10 +87,10 @@ def create_payment_intent(request):
         )
 
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @throttle_classes([PaymentThrottle])
-def confirm_payment(request):
+async def confirm_payment(request):
     """
     Confirm payment after successful Stripe transaction
     Rate limited to 10 requests per hour
@@ -89,19 +105,21 @@ def confirm_payment(request):
     
     try:
         # Retrieve payment intent from Stripe
-        intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+        intent = await run_blocking(stripe.PaymentIntent.retrieve, payment_intent_id)
         
         if intent.status == 'succeeded':
             # Update booking
-            booking = get_object_or_404(
-                Booking,
-                payment_intent_id=payment_intent_id,
-                user=request.user
+            try:
+                booking = await Booking.objects.aget(
+                    payment_intent_id=payment_intent_id,
+                    user=request.user
+                )
+            except Booking.DoesNotExist:
+                raise Http404
+            await sync_to_async(transition_booking)(
+                booking, 'confirmed',
+                payment_status='paid', payment_method=intent.payment_method
             )
-            booking.payment_status = 'paid'
-            booking.status = 'confirmed'
-            booking.payment_method = intent.payment_method
-            booking.save()
             
             return Response({
                 'message': 'Payment confirmed successfully',
@@ -121,9 +139,12 @@ def confirm_payment(request):
 
 
 @api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def stripe_webhook(request):
     """
     Handle Stripe webhooks
+    Stripe sends no credentials; requests are verified by their signature
     """
     payload = request.body
     sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
@@ -146,9 +167,7 @@ def stripe_webhook(request):
             booking = Booking.objects.get(
                 payment_intent_id=payment_intent['id']
             )
-            booking.payment_status = 'paid'
-            booking.status = 'confirmed'
-            booking.save()
+            transition_booking(booking, 'confirmed', payment_status='paid')
         except Booking.DoesNotExist:
             pass
     
@@ -161,7 +180,7 @@ def stripe_webhook(request):
                 payment_intent_id=payment_intent['id']
             )
             booking.payment_status = 'failed'
-            booking.save()
+            booking.save(update_fields=['payment_status', 'updated_at'])
         except Booking.DoesNotExist:
             pass
     
@@ -21,7 +21,7 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
         
         # Write permissions are only allowed to the creator of the session
-        return obj.creator == request.user
+        return obj.creator_id == request.user.id
 
 
 class IsBookingOwnerOrSessionCreator(permissions.BasePermission):
@@ -31,11 +31,11 @@ class IsBookingOwnerOrSessionCreator(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Booking owner can access their booking
-        if obj.user == request.user:
+        if obj.user_id == request.user.id:
             return True
         
         # Session creator can access bookings for their session
-        if obj.session.creator == request.user:
+        if obj.session.creator_id == request.user.id:
             return True
         
         return False
@@ -0,0 +1,142 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework import throttling
+
+# Generic cell rate algorithm: a limit of n requests per period admits one
+# request every period / n seconds with bursts of up to n, so no window of
+# length period ever sees more than n. The only state per key is its
+# theoretical arrival time (TAT). Returns the seconds to wait, 0 if admitted.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local wait = tat + interval - period - now
+if wait > 0 then
+    return tostring(wait)
+end
+redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', math.ceil((tat + interval - now) * 1000))
+return '0'
+"""
+
+# Keys the in-process stand-in tracks before dropping the least recently used
+LOCAL_LIMITER_MAX_KEYS = 100000
+
+
+class RedisLimiter:
+    """GCRA in one server-side script call, shared by every worker"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.script = None
+
+    def hit(self, key, limit, period):
+        key = self.backend.make_and_validate_key(key)
+        client = self.backend._cache.get_client(key, write=True)
+        if self.script is None:
+            self.script = client.register_script(GCRA_SCRIPT)
+        return float(self.script(keys=[key], args=[period / limit, period], client=client))
+
+
+class LocalLimiter:
+    """GCRA for caches local to the process, with the same results per worker"""
+
+    def __init__(self, max_keys=LOCAL_LIMITER_MAX_KEYS):
+        self.lock = threading.Lock()
+        self.arrivals = OrderedDict()
+        self.max_keys = max_keys
+
+    def hit(self, key, limit, period):
+        interval = period / limit
+        with self.lock:
+            now = time.monotonic()
+            tat = max(self.arrivals.get(key, now), now)
+            wait = tat + interval - period - now
+            if wait > 0:
+                return wait
+            self.arrivals[key] = tat + interval
+            self.arrivals.move_to_end(key)
+            # Keys whose TAT has passed hold no state worth keeping
+            while len(self.arrivals) > self.max_keys:
+                self.arrivals.popitem(last=False)
+            return 0.0
+
+    def clear(self):
+        with self.lock:
+            self.arrivals.clear()
+
+
+def build_limiter(backend=cache):
+    try:
+        from django.core.cache.backends.redis import RedisCache
+    except ImportError:
+        return LocalLimiter()
+    if isinstance(getattr(backend, '_wrapped', backend), RedisCache):
+        return RedisLimiter(getattr(backend, '_wrapped', backend))
+    return LocalLimiter()
+
+
+limiter = build_limiter()
+
+
+class GCRAThrottleMixin:
+    """
+    Throttle with limiter instead of SimpleRateThrottle's request history:
+    one atomic call per check, and a smooth limit rather than fixed windows.
+    The rate still comes from DEFAULT_THROTTLE_RATES[scope].
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.retry_after = limiter.hit(self.key, self.num_requests, self.duration)
+        return self.retry_after == 0
+
+    def wait(self):
+        return math.ceil(self.retry_after)
+
+
+class AnonRateThrottle(GCRAThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(GCRAThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class ClientIPThrottle(GCRAThrottleMixin, throttling.SimpleRateThrottle):
+    """Limits requests per client IP, signed in or not"""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AuthRateThrottle(ClientIPThrottle):
+    scope = 'auth'
+
+
+class BookingCreateThrottle(UserRateThrottle):
+    scope = 'booking'
+
+
+class SessionCreateThrottle(UserRateThrottle):
+    scope = 'session_create'
+
+
+class PaymentThrottle(UserRateThrottle):
+    scope = 'payment'
+
+
+class UploadThrottle(UserRateThrottle):
+    scope = 'upload'
@@ -0,0 +1,72 @@
+import csv
+import io
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson.
+
+    Output is byte-for-byte what DRF's compact renderer produces: datetimes
+    and other non-JSON types go through DRF's encoder, and U+2028/U+2029 are
+    escaped the same way. The one difference is float formatting outside
+    1e-4..1e16 (orjson writes 0.00001 where json writes 1e-05); the API's only
+    floats are search ranks, which stay inside that range. Indented output
+    (?indent in the Accept header) and anything orjson refuses fall back to
+    the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if not self.compact or self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by DRF for JavaScript compatibility
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Negotiates ?format=csv / Accept: text/csv for streaming exports, which
+    write their own rows. Only error responses are rendered here, as
+    field,message lines.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else [('detail', data)]
+        for field, messages in items:
+            for message in messages if isinstance(messages, list) else [messages]:
+                writer.writerow([field, message])
+        return buffer.getvalue().encode(self.charset)
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Negotiates ?format=ndjson / Accept: application/x-ndjson for streaming
+    exports. Error responses are rendered as a single JSON line.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return super().render(data, accepted_media_type, renderer_context) + b'\n'
@@ -0,0 +1,105 @@
+import hashlib
+import io
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+try:
+    # Registers an AVIF encoder with Pillow versions that lack one
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Rendition format -> (Pillow format, content type, file extension, save options)
+RENDITION_FORMATS = {
+    'avif': ('AVIF', 'image/avif', 'avif', {'quality': 60}),
+    'webp': ('WEBP', 'image/webp', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+EXIF_ORIENTATION = 0x0112
+
+
+def supported_formats(formats=None):
+    """The requested rendition formats (IMAGE_RENDITION_FORMATS by default) Pillow can write"""
+    Image.init()
+    return [
+        name for name in (formats or settings.IMAGE_RENDITION_FORMATS)
+        if name in RENDITION_FORMATS and RENDITION_FORMATS[name][0] in Image.SAVE
+    ]
+
+
+def decode(source, max_width):
+    """
+    Open an image upright, decoded no larger than needed for max_width.
+    JPEGs are decoded in draft mode, which scales by 1/2, 1/4 or 1/8 inside
+    the decoder instead of decoding every pixel and resizing afterwards.
+    """
+    image = Image.open(source)
+    if image.format == 'JPEG':
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+            # max_width applies to the upright image, i.e. the stored height
+            width, height = height, width
+            target = (max_width * height // width, max_width)
+        else:
+            target = (max_width, max_width * height // width)
+        image.draft('RGB', target)
+    # Applies and drops the orientation; no other metadata is ever written
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def rendition_widths(source_width, widths):
+    """Widths to render, largest first; images are never upscaled"""
+    fitting = sorted({width for width in widths if width <= source_width}, reverse=True)
+    return fitting or [source_width]
+
+
+def resize(image, width):
+    height = max(round(image.height * width / image.width), 1)
+    if (width, height) == image.size:
+        return image
+    return image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def encode(image, name):
+    """Encode one rendition, returning its bytes"""
+    pil_format, content_type, extension, options = RENDITION_FORMATS[name]
+    if pil_format == 'JPEG' and image.mode == 'RGBA':
+        flattened = Image.new('RGB', image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel('A'))
+        image = flattened
+    output = io.BytesIO()
+    image.save(output, format=pil_format, **options)
+    return output.getvalue()
+
+
+def render_image(source, widths=None, formats=None):
+    """
+    Renditions of an image file in every width and supported format,
+    as dicts of format, width, height, content_type, extension and data
+    """
+    widths = widths or settings.IMAGE_RENDITION_WIDTHS
+    formats = supported_formats(formats)
+    image = decode(source, max(widths))
+    renditions = []
+    for width in rendition_widths(image.width, widths):
+        resized = resize(image, width)
+        for name in formats:
+            pil_format, content_type, extension, options = RENDITION_FORMATS[name]
+            renditions.append({
+                'format': name, 'width': resized.width, 'height': resized.height,
+                'content_type': content_type, 'extension': extension,
+                'data': encode(resized, name),
+            })
+    return renditions
+
+
+def renditions_cache_key(image_url):
+    """Cache key for the rendition URLs of an uploaded image, read when a session is saved with it"""
+    return f'renditions:{hashlib.sha256(image_url.encode()).hexdigest()}'
@@ -0,0 +1,122 @@
+import time
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from .models import TokenRevocation
+
+# Cache entries: a revoked token's JTI, and the time before which every
+# token issued to a user is revoked. Each lives until the tokens it
+# revokes would have expired anyway.
+REVOKED_TOKEN_KEY = 'revoked:jti:{}'
+REVOKED_BEFORE_KEY = 'revoked:user:{}'
+
+# Held for TOKEN_REVOCATION_PRUNE_INTERVAL by the process that last pruned
+PRUNED_KEY = 'revoked:pruned'
+
+# Durable rows re-seeded into the cache per batch by compact()
+COMPACTION_BATCH_SIZE = 1000
+
+
+def token_key(token):
+    return REVOKED_TOKEN_KEY.format(token[api_settings.JTI_CLAIM])
+
+
+def user_key(user_id):
+    return REVOKED_BEFORE_KEY.format(user_id)
+
+
+def cache_timeout(expires_at):
+    return max(int(expires_at - time.time()) + 1, 1)
+
+
+def record(entries):
+    """Store {key: (value, expires_at timestamp)} in the cache and the durable log"""
+    for key, (value, expires_at) in entries.items():
+        cache.set(key, value, cache_timeout(expires_at))
+    TokenRevocation.objects.bulk_create([
+        TokenRevocation(
+            key=key, value=value,
+            expires_at=datetime.fromtimestamp(expires_at, tz=dt_timezone.utc),
+        )
+        for key, (value, expires_at) in entries.items()
+    ], update_conflicts=True, unique_fields=['key'], update_fields=['value', 'expires_at'])
+    prune_periodically()
+
+
+def revoke_tokens(*tokens):
+    """Revoke individual tokens (e.g. on logout) by JTI"""
+    record({token_key(token): (1.0, token['exp']) for token in tokens})
+
+
+def revoke_all(user_id):
+    """Revoke every token issued to a user until now"""
+    now = time.time()
+    longest = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+    record({user_key(user_id): (now, now + longest.total_seconds())})
+
+
+def is_revoked(token):
+    """Whether a token is revoked, in one cache round trip whatever the number of revocations"""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    keys = [token_key(token), user_key(user_id)]
+    found = cache.get_many(keys)
+    if keys[0] in found:
+        return True
+    # iat has one-second resolution, so a token issued within the second after
+    # the cutoff is refused too
+    cutoff = found.get(keys[1])
+    return cutoff is not None and token.get('iat', 0) < cutoff
+
+
+def consume(token):
+    """
+    Revoke a refresh token that is being rotated, returning False if it was
+    already revoked or used. cache.add() lets only one of several concurrent
+    refreshes with the same token through. Rotation is the hot path, so this
+    touches only the cache; a rotated token lost with the cache could be
+    exchanged once more, unlike the explicit revocations record() makes durable.
+    """
+    if is_revoked(token):
+        return False
+    return cache.add(token_key(token), 1.0, cache_timeout(token['exp']))
+
+
+def prune_expired():
+    """Delete durable entries whose tokens have expired, returning how many"""
+    deleted, _ = TokenRevocation.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def prune_periodically():
+    """
+    prune_expired() at most once per TOKEN_REVOCATION_PRUNE_INTERVAL across
+    processes, so even when compact_revocations is not scheduled the table
+    holds the live revocations plus at most one interval of expired ones.
+    """
+    if cache.add(PRUNED_KEY, 1, settings.TOKEN_REVOCATION_PRUNE_INTERVAL):
+        prune_expired()
+
+
+def compact():
+    """
+    Delete durable entries whose tokens have expired, and restore unexpired
+    ones missing from the cache (after a restart or eviction). Returns
+    (deleted, restored).
+    """
+    deleted = prune_expired()
+    now = timezone.now()
+
+    restored = 0
+    rows = TokenRevocation.objects.filter(expires_at__gt=now).values_list(
+        'key', 'value', 'expires_at'
+    ).iterator(chunk_size=COMPACTION_BATCH_SIZE)
+    while batch := list(islice(rows, COMPACTION_BATCH_SIZE)):
+        present = cache.get_many([key for key, _, _ in batch])
+        for key, value, expires_at in batch:
+            if key not in present:
+                restored += cache.add(key, value, cache_timeout(expires_at.timestamp()))
+    return deleted, restored
@@ -0,0 +1,86 @@
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F
+from django.utils.html import escape
+from rest_framework.filters import BaseFilterBackend
+from .models import Session
+
+# Text search configuration used by the sessions_search_vector_update trigger
+SEARCH_CONFIG = 'english'
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+# Private-use characters ts_headline wraps matches in; they pass through
+# escape() untouched and are swapped for the HTML marks afterwards
+START_SEL = '\ue000'
+STOP_SEL = '\ue001'
+
+
+def build_search_query(text):
+    """Parse user input with web-search syntax ("quoted phrases", -exclusions, or)"""
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def search_sessions(queryset, text):
+    """Filter sessions matching text through the GIN index, best matches first"""
+    query = build_search_query(text)
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-created_at', '-id')
+
+
+def snippet_html(headline):
+    """Escape a ts_headline snippet, then turn its selection markers into <mark> tags"""
+    # Markers typed by the user would otherwise become unbalanced tags
+    marked = escape(headline)
+    if marked.count(START_SEL) != marked.count(STOP_SEL):
+        return marked.replace(START_SEL, '').replace(STOP_SEL, '')
+    return marked.replace(START_SEL, HIGHLIGHT_START).replace(STOP_SEL, HIGHLIGHT_STOP)
+
+
+def highlight_sessions(sessions, text):
+    """
+    Attach title_highlight and description_highlight snippets to sessions.
+
+    Headlines re-parse the source text, so they are only computed for the
+    rows being returned, in one query. The snippets are HTML: the user's
+    text is escaped and only the <mark> tags are markup.
+    """
+    if not sessions:
+        return sessions
+    query = build_search_query(text)
+    options = {
+        'config': SEARCH_CONFIG,
+        'start_sel': START_SEL,
+        'stop_sel': STOP_SEL,
+    }
+    snippets = Session.objects.filter(
+        pk__in=[session.pk for session in sessions]
+    ).annotate(
+        title_highlight=SearchHeadline('title', query, highlight_all=True, **options),
+        description_highlight=SearchHeadline(
+            'description', query, max_words=35, min_words=15, max_fragments=2, **options
+        ),
+    ).values_list('pk', 'title_highlight', 'description_highlight')
+
+    by_pk = {
+        pk: (snippet_html(title), snippet_html(description))
+        for pk, title, description in snippets
+    }
+    for session in sessions:
+        session.title_highlight, session.description_highlight = by_pk[session.pk]
+    return sessions
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for DRF's SearchFilter on sessions that matches the
+    ?search= parameter against the indexed search_vector instead of ILIKE
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return queryset.filter(search_vector=build_search_query(text))
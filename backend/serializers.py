@@ -1,11 +1,27 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from django.db import transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import revocation
+from .authentication import TOKEN_VERSION_CLAIM, user_states
 from .models import Session, Booking
+from .counters import SeatsUnavailable, record_booking_created
+from .fieldsets import FieldsetSerializerMixin
+from .bulk import BULK_BOOKING_ACTIONS, expand_recurrence
+from .renditions import renditions_cache_key
+from .analytics import ANALYTICS_DEFAULT_DAYS, ANALYTICS_GRANULARITIES, ANALYTICS_MAX_DAYS
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for User model"""
     
     class Meta:
@@ -23,36 +39,54 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
         fields = ['first_name', 'last_name', 'avatar', 'bio', 'phone']
 
 
-class SessionListSerializer(serializers.ModelSerializer):
+class SessionListSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for listing sessions (catalog)"""
     creator_name = serializers.CharField(source='creator.get_full_name', read_only=True)
     creator_username = serializers.CharField(source='creator.username', read_only=True)
-    bookings_count = serializers.IntegerField(source='bookings.count', read_only=True)
+    seats_remaining = serializers.IntegerField(read_only=True)
+    image_srcset = serializers.ReadOnlyField()
+    expandable_fields = {'creator': UserSerializer}
     
     class Meta:
         model = Session
         fields = ['id', 'title', 'description', 'category', 'duration_minutes', 
                   'price', 'currency', 'max_attendees', 'location', 'session_type',
-                  'image_url', 'thumbnail_url', 'status', 'creator_name', 
-                  'creator_username', 'bookings_count', 'created_at']
+                  'image_url', 'thumbnail_url', 'image_srcset', 'status', 'starts_at', 'series_id',
+                  'creator_name', 'creator_username', 'bookings_count', 'seats_remaining',
+                  'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class SessionDetailSerializer(serializers.ModelSerializer):
+class SessionDetailSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for session detail view"""
-    creator = UserSerializer(read_only=True)
-    bookings_count = serializers.IntegerField(source='bookings.count', read_only=True)
     is_available = serializers.BooleanField(read_only=True)
+    seats_remaining = serializers.IntegerField(read_only=True)
+    image_srcset = serializers.ReadOnlyField()
+    expandable_fields = {'creator': UserSerializer}
+    default_expand = ('creator',)
     
     class Meta:
         model = Session
         fields = ['id', 'creator', 'title', 'description', 'category', 
                   'duration_minutes', 'price', 'currency', 'max_attendees', 
-                  'location', 'session_type', 'image_url', 'thumbnail_url', 
-                  'status', 'is_available', 'bookings_count', 'created_at', 'updated_at']
+                  'location', 'session_type', 'image_url', 'thumbnail_url', 'image_srcset',
+                  'status', 'starts_at', 'series_id', 'is_available', 'bookings_count',
+                  'seats_remaining', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class SessionSearchSerializer(SessionListSerializer):
+    """Serializer for full-text search results with highlight snippets"""
+    rank = serializers.FloatField(read_only=True)
+    title_highlight = serializers.CharField(read_only=True)
+    description_highlight = serializers.CharField(read_only=True)
+    
+    class Meta(SessionListSerializer.Meta):
+        fields = SessionListSerializer.Meta.fields + [
+            'rank', 'title_highlight', 'description_highlight'
+        ]
+
+
 class SessionCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating sessions"""
     
@@ -60,7 +94,7 @@ class SessionCreateUpdateSerializer(serializers.ModelSerializer):
         model = Session
         fields = ['title', 'description', 'category', 'duration_minutes', 'price', 
                   'currency', 'max_attendees', 'location', 'session_type', 
-                  'image_url', 'thumbnail_url', 'status']
+                  'image_url', 'thumbnail_url', 'status', 'starts_at']
     
     def validate_price(self, value):
         if value < 0:
@@ -71,9 +105,42 @@ class SessionCreateUpdateSerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("Duration must be positive")
         return value
+    
+    def validate(self, data):
+        # A newly set image brings the renditions made when it was uploaded, if ready
+        if 'image_url' in data and (self.instance is None or data['image_url'] != self.instance.image_url):
+            renditions = data['image_url'] and cache.get(renditions_cache_key(data['image_url']))
+            data['image_renditions'] = renditions or {}
+        return data
+    
+    def update(self, instance, validated_data):
+        if 'image_renditions' not in validated_data:
+            return super().update(instance, validated_data)
+        # A full save leaves image_renditions alone, so name it explicitly
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*instance.full_save_fields(), 'image_renditions'])
+        return instance
 
 
-class BookingListSerializer(serializers.ModelSerializer):
+class SessionSeriesSerializer(SessionCreateUpdateSerializer):
+    """Serializer for a session template repeated by an RFC 5545 recurrence rule"""
+    recurrence = serializers.CharField(write_only=True)
+    
+    class Meta(SessionCreateUpdateSerializer.Meta):
+        fields = SessionCreateUpdateSerializer.Meta.fields + ['recurrence']
+        extra_kwargs = {'starts_at': {'required': True, 'allow_null': False}}
+    
+    def validate(self, data):
+        data = super().validate(data)
+        try:
+            data['occurrences'] = expand_recurrence(data.pop('recurrence'), data['starts_at'])
+        except ValueError as e:
+            raise serializers.ValidationError({'recurrence': str(e)})
+        return data
+
+
+class BookingListSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for listing bookings"""
     session_title = serializers.CharField(source='session.title', read_only=True)
     session_image = serializers.URLField(source='session.thumbnail_url', read_only=True)
@@ -81,6 +148,7 @@ class BookingListSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     is_active = serializers.BooleanField(read_only=True)
     is_past = serializers.BooleanField(read_only=True)
+    expandable_fields = {'session': SessionListSerializer, 'user': UserSerializer}
     
     class Meta:
         model = Booking
@@ -90,10 +158,10 @@ class BookingListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class BookingDetailSerializer(serializers.ModelSerializer):
+class BookingDetailSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for booking detail view"""
-    session = SessionDetailSerializer(read_only=True)
-    user = UserSerializer(read_only=True)
+    expandable_fields = {'session': SessionDetailSerializer, 'user': UserSerializer}
+    default_expand = ('session', 'user')
     
     class Meta:
         model = Booking
@@ -125,6 +193,12 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                 f"Maximum {session.max_attendees} attendees allowed for this session"
             )
         
+        # Early answer only; create() reserves the seats atomically
+        if attendees_count > session.seats_remaining:
+            raise serializers.ValidationError(
+                f"Only {session.seats_remaining} seats remaining for this session"
+            )
+        
         return data
     
     def create(self, validated_data):
@@ -134,17 +208,23 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         # Calculate total price
         total_price = session.price * attendees_count
         
-        # Create booking with the user from request context
-        booking = Booking.objects.create(
-            user=self.context['request'].user,
-            session=session,
-            booking_date=validated_data['booking_date'],
-            attendees_count=attendees_count,
-            user_notes=validated_data.get('user_notes', ''),
-            total_price=total_price,
-            status='pending',
-            payment_status='pending'
-        )
+        # Create booking with the user from request context; its seats are
+        # reserved last so the session row is locked only until commit
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.create(
+                    user=self.context['request'].user,
+                    session=session,
+                    booking_date=validated_data['booking_date'],
+                    attendees_count=attendees_count,
+                    user_notes=validated_data.get('user_notes', ''),
+                    total_price=total_price,
+                    status='pending',
+                    payment_status='pending'
+                )
+                record_booking_created(booking)
+        except SeatsUnavailable as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
         
         return booking
 
@@ -157,9 +237,72 @@ class BookingUpdateSerializer(serializers.ModelSerializer):
         fields = ['status', 'payment_status', 'creator_notes']
 
 
+class BookingBulkActionSerializer(serializers.Serializer):
+    """Serializer for applying one action to many bookings"""
+    action = serializers.ChoiceField(choices=list(BULK_BOOKING_ACTIONS))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), min_length=1, max_length=1000
+    )
+    
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
 class OAuthLoginSerializer(serializers.Serializer):
     """Serializer for OAuth login"""
     provider = serializers.ChoiceField(choices=['google', 'github'])
     access_token = serializers.CharField()
     role = serializers.ChoiceField(choices=['user', 'creator'], required=False, default='user')
 
+
+
+class CreatorAnalyticsQuerySerializer(serializers.Serializer):
+    """Query parameters for creator analytics; from and to are inclusive dates"""
+    to = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=ANALYTICS_GRANULARITIES, default='day')
+    session = serializers.IntegerField(required=False, min_value=1)
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a keyword, so it cannot be declared on the class
+        fields['from'] = serializers.DateField(required=False)
+        return fields
+    
+    def validate(self, data):
+        end = data.get('to') or timezone.localdate()
+        start = data.get('from') or end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({'from': 'Must not be after to'})
+        if (end - start).days >= ANALYTICS_MAX_DAYS:
+            raise serializers.ValidationError(
+                {'from': f'The range may span at most {ANALYTICS_MAX_DAYS} days'}
+            )
+        data['from'], data['to'] = start, end
+        return data
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that refuses revoked refresh tokens, and tokens issued
+    before the user's token version changed or the user was deactivated,
+    and when rotating revokes the one being exchanged so it cannot be used twice
+    """
+    
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        state = user_states.get(refresh.get(api_settings.USER_ID_CLAIM))
+        if state is None:
+            raise TokenError('User not found')
+        token_version, is_active = state
+        if not is_active:
+            raise TokenError('User is inactive')
+        if TOKEN_VERSION_CLAIM in refresh and refresh[TOKEN_VERSION_CLAIM] != token_version:
+            raise TokenError('Token was issued before the user changed; log in again')
+        
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            usable = revocation.consume(refresh)
+        else:
+            usable = not revocation.is_revoked(refresh)
+        if not usable:
+            raise TokenError('Token has been revoked')
+        return super().validate(attrs)
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import user_states
+from .cache import invalidate_catalog
+from .models import Session, Booking, User
+
+
+@receiver([post_save, post_delete], sender=Session)
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Invalidate the catalog cache when a session or booking changes"""
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=User)
+def invalidate_catalog_for_creator(sender, instance, created, **kwargs):
+    """Invalidate the catalog cache when a user's displayed name or username changes"""
+    if not created and getattr(instance, 'catalog_changed', True):
+        invalidate_catalog()
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user_state(sender, instance, **kwargs):
+    """Drop this process's cached token version and active flag for the user"""
+    user_states.forget(instance.pk)
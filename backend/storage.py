@@ -1,21 +1,50 @@
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
+from adrf.decorators import api_view
+from boto3.s3.transfer import TransferConfig
 from django.conf import settings
-from rest_framework.decorators import api_view, permission_classes, parser_classes, throttle_classes
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework.decorators import permission_classes, parser_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
-from rest_framework.throttling import UserRateThrottle
 from botocore.exceptions import ClientError
 from PIL import Image
+from .aio import parsed_data, run_blocking
+from .cache import invalidate_catalog
+from .models import Session
+from .renditions import render_image, renditions_cache_key
+from .ratelimit import UploadThrottle
 import io
 import uuid
 import os
 
+logger = logging.getLogger(__name__)
+
+# Thumbnails are made here, off the request. Each upload reserves a slot before
+# sending its original, so at most THUMBNAIL_QUEUE_SIZE wait for a worker.
+THUMBNAIL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnail'
+)
+THUMBNAIL_SLOTS = threading.BoundedSemaphore(settings.THUMBNAIL_QUEUE_SIZE)
+
+# Seconds clients are asked to wait when every slot is taken
+THUMBNAIL_RETRY_AFTER = 5
+
+# Upload rules, shared by proxied uploads and presigned POST policies
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+UPLOAD_ALLOWED_TYPES = ('image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp')
 
-# Custom throttle for file uploads
-class UploadThrottle(UserRateThrottle):
-    rate = '30/hour'
+THUMBNAIL_PENDING = 'pending'
+THUMBNAIL_READY = 'ready'
+THUMBNAIL_FAILED = 'failed'
 
 
 def get_s3_client():
@@ -50,15 +79,152 @@ def create_thumbnail(image_file, max_size=(300, 300)):
         raise Exception(f"Failed to create thumbnail: {str(e)}")
 
 
+def upload_error(size, content_type):
+    """Why an upload of this size and type is refused, or None"""
+    if size > UPLOAD_MAX_SIZE:
+        return 'File size exceeds 10MB limit'
+    if content_type not in UPLOAD_ALLOWED_TYPES:
+        return 'Invalid file type. Only images are allowed'
+    return None
+
+
+def upload_keys(folder, filename):
+    """Fresh (original key, thumbnail key, original filename) for an upload"""
+    ext = os.path.splitext(filename)[1]
+    base_filename = str(uuid.uuid4())
+    original_filename = f"{base_filename}{ext}"
+    thumbnail_filename = f"{base_filename}_thumb{ext}"
+    return (
+        f"{folder}/{original_filename}",
+        f"{folder}/thumbnails/{thumbnail_filename}",
+        original_filename,
+    )
+
+
+def public_url(key):
+    """URL an uploaded object is served from"""
+    if settings.AWS_S3_CUSTOM_DOMAIN:
+        return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+    # For MinIO in Docker, use localhost:9000 for external access
+    endpoint = settings.AWS_S3_ENDPOINT_URL.replace('minio', 'localhost')
+    return f"{endpoint}/{settings.AWS_STORAGE_BUCKET_NAME}/{key}"
+
+
+def transfer_config():
+    """Multipart settings that stream an upload in UPLOAD_CHUNK_SIZE parts"""
+    return TransferConfig(
+        multipart_threshold=settings.UPLOAD_CHUNK_SIZE,
+        multipart_chunksize=settings.UPLOAD_CHUNK_SIZE,
+    )
+
+
+def pending_upload_key(original_key):
+    return f'upload:{original_key}'
+
+
+def thumbnail_status_key(original_key):
+    return f'thumbnail:{original_key}'
+
+
+def rendition_key(original_key, rendition):
+    folder, filename = os.path.split(original_key)
+    base = os.path.splitext(filename)[0]
+    return f"{folder}/renditions/{base}_{rendition['width']}w.{rendition['extension']}"
+
+
+def upload_image(s3_client, data, key, content_type):
+    s3_client.upload_fileobj(
+        data,
+        settings.AWS_STORAGE_BUCKET_NAME,
+        key,
+        ExtraArgs={
+            'ContentType': content_type,
+            'ACL': 'public-read'
+        }
+    )
+
+
+def generate_thumbnail(s3_client, original_key, thumbnail_key):
+    """
+    Download an original from storage, create its thumbnail and responsive
+    renditions and upload them, returning the renditions' URLs by format
+    """
+    with tempfile.SpooledTemporaryFile(max_size=settings.THUMBNAIL_SPOOL_SIZE) as original:
+        s3_client.download_fileobj(settings.AWS_STORAGE_BUCKET_NAME, original_key, original)
+        original.seek(0)
+        thumbnail_io = create_thumbnail(original)
+        original.seek(0)
+        rendered = render_image(original)
+    upload_image(s3_client, thumbnail_io, thumbnail_key, 'image/jpeg')
+    
+    renditions = {}
+    for rendition in rendered:
+        key = rendition_key(original_key, rendition)
+        upload_image(s3_client, io.BytesIO(rendition['data']), key, rendition['content_type'])
+        renditions.setdefault(rendition['format'], []).append({
+            'width': rendition['width'], 'height': rendition['height'], 'url': public_url(key),
+        })
+    for sizes in renditions.values():
+        sizes.sort(key=lambda size: size['width'])
+    return renditions
+
+
+def attach_renditions(image_url, renditions):
+    """
+    Record renditions for sessions showing image_url, now and (through the
+    cache) when a session is saved with it later
+    """
+    cache.set(renditions_cache_key(image_url), renditions, settings.THUMBNAIL_STATUS_TIMEOUT)
+    # updated_at moves too, so ETag validators built from it notice the renditions
+    if Session.objects.filter(image_url=image_url).update(
+        image_renditions=renditions, updated_at=timezone.now()
+    ):
+        invalidate_catalog()
+
+
+def run_thumbnail_job(s3_client, original_key, thumbnail_key, user_id):
+    """Worker body: make the images, record the outcome and free the slot"""
+    status_key = thumbnail_status_key(original_key)
+    try:
+        renditions = generate_thumbnail(s3_client, original_key, thumbnail_key)
+        attach_renditions(public_url(original_key), renditions)
+    except Exception:
+        logger.exception('Thumbnail of %s failed', original_key)
+        cache.set(status_key, {'status': THUMBNAIL_FAILED, 'user_id': user_id},
+                  settings.THUMBNAIL_STATUS_TIMEOUT)
+    else:
+        cache.set(status_key, {
+            'status': THUMBNAIL_READY, 'user_id': user_id,
+            'thumbnail_url': public_url(thumbnail_key),
+            'renditions': renditions,
+        }, settings.THUMBNAIL_STATUS_TIMEOUT)
+    finally:
+        THUMBNAIL_SLOTS.release()
+        # Worker threads outlive requests, so nothing else closes their connections
+        close_old_connections()
+
+
+def schedule_thumbnail(s3_client, original_key, thumbnail_key, user_id):
+    """
+    Queue a thumbnail on a slot already taken from THUMBNAIL_SLOTS, returning
+    the worker's future. Its progress is readable with thumbnail_status.
+    """
+    cache.set(thumbnail_status_key(original_key), {'status': THUMBNAIL_PENDING, 'user_id': user_id},
+              settings.THUMBNAIL_STATUS_TIMEOUT)
+    return THUMBNAIL_EXECUTOR.submit(run_thumbnail_job, s3_client, original_key, thumbnail_key, user_id)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser])
 @throttle_classes([UploadThrottle])
-def upload_file(request):
+async def upload_file(request):
     """
     Upload file to S3/MinIO with automatic thumbnail generation for images
     Returns both image_url and thumbnail_url
     Rate limited to 30 uploads per hour
+    The original is streamed to storage; the thumbnail is made after the
+    response, at thumbnail_url once thumbnail_status reports it ready
     """
     if not settings.USE_S3:
         return Response(
@@ -66,6 +232,7 @@ def upload_file(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    await parsed_data(request)
     file_obj = request.FILES.get('file')
     if not file_obj:
         return Response(
@@ -73,91 +240,210 @@ def upload_file(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Validate file size (max 10MB)
-    if file_obj.size > 10 * 1024 * 1024:
-        return Response(
-            {'error': 'File size exceeds 10MB limit'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    error = upload_error(file_obj.size, file_obj.content_type)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Validate file type (images only for now)
-    allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp']
-    if file_obj.content_type not in allowed_types:
+    if not THUMBNAIL_SLOTS.acquire(blocking=False):
         return Response(
-            {'error': 'Invalid file type. Only images are allowed'},
-            status=status.HTTP_400_BAD_REQUEST
+            {'error': 'Too many uploads are being processed, retry shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(THUMBNAIL_RETRY_AFTER)}
         )
     
     try:
-        # Read file into memory first to avoid "closed file" issues
-        file_obj.seek(0)
-        file_content = file_obj.read()
-        file_obj.seek(0)
-        
-        # Generate unique filename
-        ext = os.path.splitext(file_obj.name)[1]
-        base_filename = str(uuid.uuid4())
-        original_filename = f"{base_filename}{ext}"
-        thumbnail_filename = f"{base_filename}_thumb{ext}"
-        
-        folder = request.data.get('folder', 'sessions')
-        original_key = f"{folder}/{original_filename}"
-        thumbnail_key = f"{folder}/thumbnails/{thumbnail_filename}"
-        
-        s3_client = get_s3_client()
+        original_key, thumbnail_key, original_filename = upload_keys(
+            request.data.get('folder', 'sessions'), file_obj.name
+        )
+        s3_client = await run_blocking(get_s3_client)
         
-        # Upload original image using BytesIO
-        original_io = io.BytesIO(file_content)
-        s3_client.upload_fileobj(
-            original_io,
+        # Stream the original from the uploaded file (spooled to disk past
+        # FILE_UPLOAD_MAX_MEMORY_SIZE) in UPLOAD_CHUNK_SIZE parts
+        file_obj.seek(0)
+        await run_blocking(
+            s3_client.upload_fileobj,
+            file_obj,
             settings.AWS_STORAGE_BUCKET_NAME,
             original_key,
             ExtraArgs={
                 'ContentType': file_obj.content_type,
                 'ACL': 'public-read'
-            }
+            },
+            Config=transfer_config()
         )
-        
-        # Create and upload thumbnail using a fresh BytesIO
-        thumbnail_source = io.BytesIO(file_content)
-        thumbnail_io = create_thumbnail(thumbnail_source)
-        s3_client.upload_fileobj(
-            thumbnail_io,
-            settings.AWS_STORAGE_BUCKET_NAME,
-            thumbnail_key,
-            ExtraArgs={
-                'ContentType': 'image/jpeg',
-                'ACL': 'public-read'
-            }
-        )
-        
-        # Generate URLs
-        if settings.AWS_S3_CUSTOM_DOMAIN:
-            image_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{original_key}"
-            thumbnail_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{thumbnail_key}"
-        else:
-            # For MinIO in Docker, use localhost:9000 for external access
-            endpoint = settings.AWS_S3_ENDPOINT_URL.replace('minio', 'localhost')
-            image_url = f"{endpoint}/{settings.AWS_STORAGE_BUCKET_NAME}/{original_key}"
-            thumbnail_url = f"{endpoint}/{settings.AWS_STORAGE_BUCKET_NAME}/{thumbnail_key}"
-        
-        return Response({
-            'image_url': image_url,
-            'thumbnail_url': thumbnail_url,
-            'filename': original_filename,
-            'key': original_key,
-        })
-    
     except Exception as e:
+        THUMBNAIL_SLOTS.release()
         return Response(
             {'error': f'Upload failed: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    
+    schedule_thumbnail(s3_client, original_key, thumbnail_key, request.user.pk)
+    return Response({
+        'image_url': public_url(original_key),
+        'thumbnail_url': public_url(thumbnail_key),
+        'thumbnail_status': THUMBNAIL_PENDING,
+        'filename': original_filename,
+        'key': original_key,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+async def thumbnail_status(request):
+    """
+    Progress of the thumbnail of an upload (?key=<key from the upload>):
+    pending, ready (with thumbnail_url and renditions) or failed
+    """
+    key = request.query_params.get('key')
+    if not key:
+        return Response(
+            {'error': 'File key is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    entry = await cache.aget(thumbnail_status_key(key))
+    if entry is None or entry['user_id'] != request.user.pk:
+        return Response({'error': 'No thumbnail for this key'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'key': key,
+        'status': entry['status'],
+        'thumbnail_url': entry.get('thumbnail_url'),
+        'renditions': entry.get('renditions'),
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([UploadThrottle])
+async def upload_url(request):
+    """
+    Presigned POST for uploading an image straight to S3/MinIO
+    Accepts filename, content_type and optional folder; the policy pins the
+    key and content type and caps the size. POST the returned fields plus
+    the file to url, then call complete with the key.
+    Rate limited to 30 uploads per hour
+    """
+    if not settings.USE_S3:
+        return Response(
+            {'error': 'File storage is not configured'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    filename = request.data.get('filename')
+    content_type = request.data.get('content_type')
+    if not filename or not content_type:
+        return Response(
+            {'error': 'filename and content_type are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    error = upload_error(0, content_type)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    original_key, thumbnail_key, original_filename = upload_keys(
+        request.data.get('folder', 'sessions'), filename
+    )
+    s3_client = await run_blocking(get_s3_client)
+    post = await run_blocking(
+        s3_client.generate_presigned_post,
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=original_key,
+        Fields={'acl': 'public-read', 'Content-Type': content_type},
+        Conditions=[
+            {'acl': 'public-read'},
+            {'Content-Type': content_type},
+            ['content-length-range', 1, UPLOAD_MAX_SIZE],
+        ],
+        ExpiresIn=settings.UPLOAD_URL_EXPIRY
+    )
+    await cache.aset(pending_upload_key(original_key), {
+        'user_id': request.user.pk,
+        'thumbnail_key': thumbnail_key,
+        'filename': original_filename,
+    }, settings.UPLOAD_URL_EXPIRY + settings.UPLOAD_COMPLETION_GRACE)
+    
+    url = post['url']
+    if settings.AWS_S3_ENDPOINT_URL:
+        # For MinIO in Docker, use localhost:9000 for external access
+        endpoint = settings.AWS_S3_ENDPOINT_URL
+        url = url.replace(endpoint, endpoint.replace('minio', 'localhost'))
+    return Response({
+        'url': url,
+        'fields': post['fields'],
+        'key': original_key,
+        'expires_in': settings.UPLOAD_URL_EXPIRY,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+async def complete_upload(request):
+    """
+    Finish a presigned upload: check the stored object against the upload
+    rules and start its thumbnail
+    Returns the same fields as upload_file
+    """
+    if not settings.USE_S3:
+        return Response(
+            {'error': 'File storage is not configured'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    key = request.data.get('key')
+    if not key:
+        return Response(
+            {'error': 'File key is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    pending_key = pending_upload_key(key)
+    entry = await cache.aget(pending_key)
+    if entry is None or entry['user_id'] != request.user.pk:
+        return Response({'error': 'No pending upload for this key'}, status=status.HTTP_404_NOT_FOUND)
+    
+    s3_client = await run_blocking(get_s3_client)
+    try:
+        head = await run_blocking(
+            s3_client.head_object, Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key
+        )
+    except ClientError:
+        return Response(
+            {'error': 'The file has not been uploaded'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    error = upload_error(head['ContentLength'], head.get('ContentType'))
+    if error:
+        await cache.adelete(pending_key)
+        await run_blocking(
+            s3_client.delete_object, Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key
+        )
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not THUMBNAIL_SLOTS.acquire(blocking=False):
+        return Response(
+            {'error': 'Too many uploads are being processed, retry shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(THUMBNAIL_RETRY_AFTER)}
+        )
+    # Only one of several concurrent completions gets to remove the entry
+    if not await cache.adelete(pending_key):
+        THUMBNAIL_SLOTS.release()
+        return Response({'error': 'Upload already completed'}, status=status.HTTP_409_CONFLICT)
+    
+    schedule_thumbnail(s3_client, key, entry['thumbnail_key'], request.user.pk)
+    return Response({
+        'image_url': public_url(key),
+        'thumbnail_url': public_url(entry['thumbnail_key']),
+        'thumbnail_status': THUMBNAIL_PENDING,
+        'filename': entry['filename'],
+        'key': key,
+    })
 
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
-def delete_file(request):
+async def delete_file(request):
     """
     Delete file from S3/MinIO
     """
@@ -175,8 +461,9 @@ def delete_file(request):
         )
     
     try:
-        s3_client = get_s3_client()
-        s3_client.delete_object(
+        s3_client = await run_blocking(get_s3_client)
+        await run_blocking(
+            s3_client.delete_object,
             Bucket=settings.AWS_STORAGE_BUCKET_NAME,
             Key=key
         )
@@ -1,10 +1,50 @@
-from django.test import TestCase
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import BoundedSemaphore, Event, Thread
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.admin.models import LogEntry
+from django.contrib.messages import get_messages
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import status
-from backend.models import Session, Booking
+from rest_framework.renderers import JSONRenderer
+from backend.models import Session, Booking, SessionDailyRollup, TokenRevocation
+from backend.authentication import get_tokens_for_user, user_states
+from backend import outbound, revocation
+from backend.renditions import decode, render_image, supported_formats
+from backend.storage import THUMBNAIL_SLOTS, attach_renditions, pending_upload_key, thumbnail_status_key
+from backend.ratelimit import AuthRateThrottle, LocalLimiter, PaymentThrottle, UploadThrottle, limiter
+from backend.counters import SeatsUnavailable, drifted_sessions, record_booking_created, transition_booking
+from backend.idempotency import idempotency_cache_key
+from backend.fast_serializers import session_list_rows, booking_list_rows
+from backend.renderers import FastJSONRenderer
+from backend.serializers import (
+    SessionListSerializer, BookingListSerializer, BookingCreateSerializer, UserSerializer
+)
+from rest_framework.exceptions import ValidationError
+from botocore.exceptions import ClientError
+from datetime import datetime, timedelta
 from decimal import Decimal
 from django.utils import timezone
+from unittest import mock
+from io import BytesIO, StringIO
+from PIL import Image
+import asyncio
+import base64
+import csv
+import requests
+import json
+import time
+import warnings
 
 User = get_user_model()
 
@@ -184,13 +224,14 @@ class BookingTests(TestCase):
         
         response = self.client.get('/api/bookings/my_bookings/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 
 class DashboardTests(TestCase):
     """Test dashboard endpoints"""
     
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.creator = User.objects.create_user(
             username='creator',
@@ -227,6 +268,2502 @@ class DashboardTests(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get('/api/dashboard/creator/')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_creator_dashboard_stats(self):
+        """Test the stats come from conditional aggregation over all rows"""
+        sessions = [
+            Session.objects.create(
+                creator=self.creator, title=f'Session {index}', description='Description',
+                category='Programming', duration_minutes=60, price=Decimal('10.00'),
+                max_attendees=10, status=session_status
+            )
+            for index, session_status in enumerate(['published', 'published', 'draft'])
+        ]
+        for booking_status in ['pending', 'pending', 'confirmed', 'cancelled']:
+            Booking.objects.create(
+                user=self.user, session=sessions[0], booking_date=timezone.now(),
+                total_price=Decimal('10.00'), status=booking_status
+            )
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get('/api/dashboard/creator/')
+        self.assertEqual(response.data['stats'], {
+            'total_sessions': 3,
+            'published_sessions': 2,
+            'total_bookings': 4,
+            'pending_bookings': 2,
+            'confirmed_bookings': 1,
+            'revenue': '10.00',
+        })
+        
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get('/api/dashboard/user/').data['total_bookings'], 4)
+    
+    def test_dashboard_snapshots(self):
+        """Test repeated dashboards are served from the snapshot until a write changes them"""
+        session = Session.objects.create(
+            creator=self.creator, title='Snapshot', description='Description',
+            category='Programming', duration_minutes=60, price=Decimal('10.00'),
+            max_attendees=10, status='published'
+        )
+        for user, url, validator_queries in [(self.user, '/api/dashboard/user/', 1),
+                                             (self.creator, '/api/dashboard/creator/', 2)]:
+            self.client.force_authenticate(user=user)
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                second = self.client.get(url)
+            # Only the validator aggregates run; the snapshot is reused
+            self.assertEqual(len(queries), validator_queries)
+            self.assertEqual(second.data, first.data)
+            self.assertEqual(second['ETag'], first['ETag'])
+        
+        self.client.force_authenticate(user=self.user)
+        self.client.post('/api/bookings/', {
+            'session': session.id, 'booking_date': timezone.now().isoformat()
+        })
+        self.assertEqual(len(self.client.get('/api/dashboard/user/').data['active_bookings']), 1)
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get('/api/dashboard/creator/')
+        self.assertEqual(response.data['stats']['pending_bookings'], 1)
+        self.assertEqual(response.data['sessions'][0]['bookings_count'], 1)
+
+
+class PaginationTests(TestCase):
+    """Test keyset pagination on list endpoints"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        # Identical created_at values force the id tie-breaker to be used
+        created_at = timezone.now()
+        for index in range(7):
+            session = Session.objects.create(
+                creator=self.creator,
+                title=f'Session {index}',
+                description='Description',
+                category='Programming',
+                duration_minutes=60,
+                price=Decimal('10.00'),
+                status='published'
+            )
+            Session.objects.filter(pk=session.pk).update(created_at=created_at)
+    
+    def test_walk_catalog_forward_and_back(self):
+        """Test every session appears exactly once and previous links return"""
+        seen = []
+        pages = []
+        url = '/api/sessions/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([row['id'] for row in response.data['results']])
+            seen.extend(pages[-1])
+            url = response.data['next']
+        
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(sorted(seen), sorted(Session.objects.values_list('id', flat=True)))
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], pages[1])
+    
+    def test_approximate_count_is_opt_in(self):
+        """Test approximate_count only appears when requested"""
+        response = self.client.get('/api/sessions/')
+        self.assertNotIn('approximate_count', response.data)
+        
+        response = self.client.get('/api/sessions/?approximate_count=true')
+        self.assertIsInstance(response.data['approximate_count'], int)
+    
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get('/api/sessions/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_unsupported_ordering_is_rejected(self):
+        """Test ?ordering= other than the cursor's own order is a 400, not ignored"""
+        response = self.client.get('/api/sessions/?ordering=price')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ordering', response.data)
+        
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get('/api/bookings/?ordering=-total_price')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get('/api/sessions/?ordering=-created_at')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_creator_dashboard_lists_are_paginated(self):
+        """Test dashboard lists are bounded and link to their next page"""
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.get('/api/dashboard/creator/?page_size=5')
+        self.assertEqual(len(response.data['sessions']), 5)
+        self.assertEqual(response.data['stats']['total_sessions'], 7)
+        
+        next_url = response.data['pagination']['sessions']['next']
+        self.assertIn('sessions_cursor=', next_url)
+        response = self.client.get(next_url)
+        self.assertEqual(len(response.data['sessions']), 2)
+        self.assertIsNone(response.data['pagination']['sessions']['next'])
+
+class SearchTests(TestCase):
+    """Test full-text session search"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            first_name='Ada',
+            last_name='Lovelace',
+            role='creator'
+        )
+        self.title_match = self.create_session('Python for Beginners', 'An introduction to programming')
+        self.description_match = self.create_session(
+            'Data Analysis', 'Learn pandas and Python notebooks for everyday analysis'
+        )
+        self.create_session('Watercolor Basics', 'Painting with water and pigment')
+        self.create_session('Python Internals', 'How CPython works', status='draft')
+    
+    def create_session(self, title, description, status='published'):
+        return Session.objects.create(
+            creator=self.creator,
+            title=title,
+            description=description,
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status=status
+        )
+    
+    def test_search_ranks_title_matches_first(self):
+        """Test title matches outrank description matches and drafts are excluded"""
+        response = self.client.get('/api/sessions/search/?q=python')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, [self.title_match.id, self.description_match.id])
+        
+        first = response.data['results'][0]
+        self.assertIn('<mark>Python</mark>', first['title_highlight'])
+        self.assertGreater(first['rank'], response.data['results'][1]['rank'])
+        self.assertIn('<mark>Python</mark>', response.data['results'][1]['description_highlight'])
+    
+    def test_highlights_escape_session_text(self):
+        """Test HTML in titles and descriptions comes back escaped, with only the marks as tags"""
+        self.create_session('<script>alert(1)</script> Rust basics', '<img src=x onerror=alert(1)> rust & more')
+        response = self.client.get('/api/sessions/search/?q=rust')
+        result = response.data['results'][0]
+        self.assertEqual(
+            result['title_highlight'],
+            '&lt;script&gt;alert(1)&lt;/script&gt; <mark>Rust</mark> basics'
+        )
+        self.assertNotIn('<img', result['description_highlight'])
+        self.assertIn('alert(1)&gt; <mark>rust</mark> &amp; more', result['description_highlight'])
+    
+    def test_search_matches_creator_name_changes(self):
+        """Test the search document follows creator renames"""
+        response = self.client.get('/api/sessions/search/?q=lovelace')
+        self.assertEqual(len(response.data['results']), 3)
+        
+        self.creator.last_name = 'Byron'
+        self.creator.save()
+        response = self.client.get('/api/sessions/search/?q=lovelace')
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/sessions/search/?q=byron')
+        self.assertEqual(len(response.data['results']), 3)
+    
+    def test_search_requires_query(self):
+        """Test search without q is rejected"""
+        response = self.client.get('/api/sessions/search/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_catalog_search_param(self):
+        """Test ?search= on the catalog uses the search index"""
+        response = self.client.get('/api/sessions/?search=watercolour OR painting')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['title'], 'Watercolor Basics')
+
+class CatalogCacheTests(TestCase):
+    """Test the versioned catalog cache"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Cached Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status='published'
+        )
+    
+    def test_repeat_reads_skip_the_database(self):
+        """Test the second catalog and detail read are served from cache"""
+        for url in ['/api/sessions/', f'/api/sessions/{self.session.id}/']:
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.data, second.data)
+    
+    def test_booking_write_invalidates(self):
+        """Test a new booking is reflected in cached counts"""
+        url = f'/api/sessions/{self.session.id}/'
+        self.assertEqual(self.client.get(url).data['bookings_count'], 0)
+        self.client.force_authenticate(user=self.user)
+        self.client.post('/api/bookings/', {
+            'session': self.session.id,
+            'booking_date': timezone.now().isoformat()
+        })
+        self.assertEqual(self.client.get(url).data['bookings_count'], 1)
+    
+    def test_session_delete_invalidates(self):
+        """Test deleted sessions drop out of the cached catalog"""
+        self.assertEqual(len(self.client.get('/api/sessions/').data['results']), 1)
+        self.session.delete()
+        self.assertEqual(len(self.client.get('/api/sessions/').data['results']), 0)
+    
+    def test_creator_rename_invalidates(self):
+        """Test cached catalog pages pick up a creator's new name"""
+        self.assertEqual(self.client.get('/api/sessions/').data['results'][0]['creator_username'], 'creator')
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.patch('/api/users/update_profile/', {'first_name': 'Ada'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get('/api/sessions/').data['results'][0]['creator_name'], 'Ada')
+        
+        creator = User.objects.get(pk=self.creator.pk)
+        creator.username = 'ada'
+        creator.save()
+        self.assertEqual(self.client.get('/api/sessions/').data['results'][0]['creator_username'], 'ada')
+        
+        # Other profile edits keep the cached pages
+        self.client.get('/api/sessions/')
+        creator.bio = 'Teaches Python'
+        creator.save()
+        with self.assertNumQueries(0):
+            self.client.get('/api/sessions/')
+    
+    def test_creator_rename_with_bearer_token_invalidates(self):
+        """Test renames by token-authenticated users, whose names load lazily, are noticed too"""
+        self.client.get('/api/sessions/')
+        access = get_tokens_for_user(self.creator)['access']
+        response = self.client.patch('/api/users/update_profile/', {'last_name': 'Lovelace'},
+                                     format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Lovelace', self.client.get('/api/sessions/').data['results'][0]['creator_name'])
+    
+    def test_warm_session_cache_command(self):
+        """Test the warm-up command fills the cache for list and detail"""
+        out = StringIO()
+        call_command('warm_session_cache', host='testserver', stdout=out)
+        self.assertIn('Cached 1 catalog pages and 1 session details', out.getvalue())
+        with self.assertNumQueries(0):
+            self.client.get('/api/sessions/')
+            self.client.get(f'/api/sessions/{self.session.id}/')
+
+class FacetTests(TestCase):
+    """Test catalog facet counts"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        for category, session_type, price, duration in [
+            ('Programming', 'online', '10.00', 30),
+            ('Programming', 'online', '60.00', 90),
+            ('Design', 'in-person', '30.00', 60),
+            ('Design', 'online', '250.00', 180),
+        ]:
+            self.create_session(category, session_type, price, duration)
+        self.create_session('Music', 'online', '10.00', 30, status='draft')
+    
+    def create_session(self, category, session_type, price, duration, status='published'):
+        return Session.objects.create(
+            creator=self.creator,
+            title=f'{category} Session',
+            description='Description',
+            category=category,
+            duration_minutes=duration,
+            price=Decimal(price),
+            session_type=session_type,
+            status=status
+        )
+    
+    def test_facet_counts(self):
+        """Test counts per field and histogram buckets over published sessions"""
+        response = self.client.get('/api/sessions/facets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 4)
+        self.assertEqual(response.data['category'], [
+            {'value': 'Design', 'count': 2},
+            {'value': 'Programming', 'count': 2},
+        ])
+        self.assertEqual(response.data['session_type'], [
+            {'value': 'online', 'count': 3},
+            {'value': 'in-person', 'count': 1},
+        ])
+        self.assertEqual(response.data['currency'], [{'value': 'USD', 'count': 4}])
+        self.assertEqual(
+            [bucket['count'] for bucket in response.data['price']], [1, 1, 1, 0, 1]
+        )
+        self.assertEqual(response.data['price'][0], {'min': '0.00', 'max': '25.00', 'count': 1})
+        self.assertEqual(response.data['duration_minutes'][-1], {'min': 120, 'max': None, 'count': 1})
+    
+    def test_facets_follow_filters(self):
+        """Test facets are computed for the applied catalog filters"""
+        response = self.client.get('/api/sessions/facets/?session_type=online&min_price=50')
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual(response.data['category'], [
+            {'value': 'Design', 'count': 1},
+            {'value': 'Programming', 'count': 1},
+        ])
+        
+        response = self.client.get('/api/sessions/?session_type=online&min_price=50')
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_facets_are_cached_until_a_write(self):
+        """Test repeat facet reads skip the database until sessions change"""
+        self.client.get('/api/sessions/facets/?category=Design')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/sessions/facets/?category=Design')
+        self.assertEqual(response.data['total'], 2)
+        
+        self.create_session('Design', 'online', '20.00', 45)
+        response = self.client.get('/api/sessions/facets/?category=Design')
+        self.assertEqual(response.data['total'], 3)
+
+class ConditionalGetTests(TestCase):
+    """Test ETag / Last-Modified validators"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Conditional Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status='published'
+        )
+        self.booking = Booking.objects.create(
+            user=self.user,
+            session=self.session,
+            booking_date=timezone.now(),
+            total_price=self.session.price
+        )
+    
+    def assertNotModified(self, url, queries):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        return response['ETag']
+    
+    def test_not_modified_without_serialization(self):
+        """Test unchanged resources answer 304 from the validator query alone"""
+        self.assertNotModified('/api/sessions/', 0)
+        self.assertNotModified(f'/api/sessions/{self.session.id}/', 0)
+        
+        self.client.force_authenticate(user=self.user)
+        self.assertNotModified('/api/bookings/', 1)
+        self.assertNotModified(f'/api/bookings/{self.booking.id}/', 1)
+        self.assertNotModified('/api/dashboard/user/', 1)
+        
+        self.client.force_authenticate(user=self.creator)
+        self.assertNotModified('/api/dashboard/creator/', 2)
+    
+    def test_writes_change_the_etag(self):
+        """Test booking changes invalidate session and dashboard validators"""
+        self.client.force_authenticate(user=self.user)
+        urls = [f'/api/sessions/{self.session.id}/', '/api/bookings/', '/api/dashboard/user/']
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        
+        self.client.post('/api/bookings/', {
+            'session': self.session.id,
+            'booking_date': timezone.now().isoformat()
+        })
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            self.assertNotEqual(response['ETag'], etags[url])
+    
+    def test_bearer_profile_update_changes_the_etag(self):
+        """A profile saved by a token-authenticated (partly deferred) user moves updated_at"""
+        auth = f"Bearer {get_tokens_for_user(self.user)['access']}"
+        etag = self.client.get('/api/dashboard/user/', HTTP_AUTHORIZATION=auth)['ETag']
+        response = self.client.patch('/api/users/update_profile/', {'first_name': 'Renamed'},
+                                     format='json', HTTP_AUTHORIZATION=auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get('/api/dashboard/user/', HTTP_AUTHORIZATION=auth,
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_public_validators_are_shared(self):
+        """The catalog's ETag and Cache-Control are the same for every user"""
+        url = f'/api/sessions/{self.session.id}/'
+        anonymous = self.client.get(url)
+        self.assertEqual(anonymous['Cache-Control'], 'no-cache, public')
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.get('/api/dashboard/user/')
+        self.assertEqual(response['Cache-Control'], 'no-cache, private')
+        self.client.force_authenticate(user=self.creator)
+        other = self.client.get('/api/dashboard/user/')
+        self.assertNotEqual(other['ETag'], response['ETag'])
+    
+    def test_etag_varies_by_query(self):
+        """Test different pages of the same list do not share validators"""
+        first = self.client.get('/api/sessions/')
+        second = self.client.get('/api/sessions/?page_size=1', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+
+class SessionCounterTests(TestCase):
+    """Test the booking counters maintained on Session"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Counted Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=10,
+            status='published'
+        )
+    
+    def book(self, attendees_count=1):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/bookings/', {
+            'session': self.session.id,
+            'booking_date': timezone.now().isoformat(),
+            'attendees_count': attendees_count
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Booking.objects.get(id=response.data['id'])
+    
+    def assertCounters(self, bookings, pending, attendees):
+        self.session.refresh_from_db()
+        self.assertEqual(
+            (self.session.bookings_count, self.session.pending_bookings_count,
+             self.session.confirmed_attendees),
+            (bookings, pending, attendees)
+        )
+    
+    def test_booking_lifecycle(self):
+        """Test create, confirm, cancel and delete move the counters"""
+        first = self.book(attendees_count=3)
+        second = self.book(attendees_count=2)
+        self.assertCounters(2, 2, 0)
+        
+        self.client.force_authenticate(user=self.creator)
+        self.client.post(f'/api/bookings/{first.id}/confirm/')
+        self.assertCounters(2, 1, 3)
+        # Repeating a transition is counted once
+        self.client.post(f'/api/bookings/{first.id}/confirm/')
+        self.assertCounters(2, 1, 3)
+        
+        self.client.post(f'/api/bookings/{first.id}/cancel/')
+        self.assertCounters(2, 1, 0)
+        
+        self.client.patch(f'/api/bookings/{second.id}/', {'status': 'confirmed'})
+        self.assertCounters(2, 0, 2)
+        
+        self.client.delete(f'/api/bookings/{second.id}/')
+        self.assertCounters(1, 0, 0)
+    
+    def test_confirm_payment_counts_attendees(self):
+        """Test a confirmed payment moves the booking out of pending"""
+        booking = self.book(attendees_count=4)
+        Booking.objects.filter(id=booking.id).update(payment_intent_id='pi_counter')
+        intent = mock.Mock(status='succeeded', payment_method='pm_card')
+        with mock.patch('stripe.PaymentIntent.retrieve', return_value=intent):
+            response = self.client.post('/api/payment/confirm/', {'payment_intent_id': 'pi_counter'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCounters(1, 0, 4)
+        booking.refresh_from_db()
+        self.assertEqual(booking.payment_status, 'paid')
+    
+    def test_session_save_keeps_counters(self):
+        """Test saving a stale Session instance does not overwrite its counters"""
+        stale = Session.objects.get(id=self.session.id)
+        self.book()
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertCounters(1, 1, 0)
+    
+    def test_reconcile_command_repairs_drift(self):
+        """Test the reconcile command finds and fixes drifted counters"""
+        self.book()
+        Booking.objects.create(
+            user=self.user,
+            session=self.session,
+            booking_date=timezone.now(),
+            status='confirmed',
+            attendees_count=2,
+            total_price=self.session.price
+        )
+        self.assertCounters(1, 1, 0)
+        
+        out = StringIO()
+        call_command('reconcile_session_counters', dry_run=True, stdout=out)
+        self.assertIn('1 sessions have drifted counters', out.getvalue())
+        self.assertCounters(1, 1, 0)
+        
+        call_command('reconcile_session_counters', stdout=out)
+        self.assertIn('Repaired counters on 1 sessions', out.getvalue())
+        self.assertCounters(2, 1, 2)
+
+
+class RowSerializerTests(TestCase):
+    """Test the .values() read path matches the ModelSerializers byte for byte"""
+    
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            first_name='Zoë',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        for index, status_value in enumerate(['pending', 'confirmed', 'completed', 'cancelled']):
+            session = Session.objects.create(
+                creator=self.creator,
+                title=f'Séance {index} \u2028 "quoted"',
+                description='Line one\nLine two',
+                category='Programming',
+                duration_minutes=45,
+                price=Decimal('12.5'),
+                thumbnail_url='https://example.com/thumb.png' if index % 2 else None,
+                status='published'
+            )
+            Booking.objects.create(
+                user=self.user,
+                session=session,
+                booking_date=timezone.now(),
+                total_price=Decimal('12.5'),
+                status=status_value
+            )
+    
+    def assertSameBytes(self, queryset, serializer_class, rows):
+        queryset = queryset.order_by('-created_at', '-id')
+        expected = JSONRenderer().render(serializer_class(list(queryset), many=True).data)
+        actual = FastJSONRenderer().render(rows.serialize(rows.values(queryset)))
+        self.assertEqual(actual, expected)
+    
+    def test_session_rows_match(self):
+        self.assertSameBytes(Session.objects.all(), SessionListSerializer, session_list_rows)
+    
+    def test_booking_rows_match(self):
+        self.assertSameBytes(Booking.objects.all(), BookingListSerializer, booking_list_rows)
+    
+    def test_renderer_matches_json_renderer(self):
+        """Test datetimes, decimals and line separators render like DRF"""
+        data = {
+            'when': timezone.now(),
+            'amount': Decimal('1.10'),
+            'text': 'a\u2028b\u2029c é',
+            1: [None, True, 0.25],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+    
+    def test_list_endpoints_paginate_rows(self):
+        """Test keyset cursors work on .values() pages"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get('/api/bookings/?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        response = client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+    
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_list_serializers', rows=[5], repeat=1, stdout=out)
+        self.assertIn('RowSerializer', out.getvalue())
+        self.assertEqual(Session.objects.count(), 4)
+
+
+class FieldsetTests(TestCase):
+    """Test ?fields= and ?expand= on the session, booking and user endpoints"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            first_name='Cree',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Fieldset Session',
+            description='A long description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status='published'
+        )
+        self.booking = Booking.objects.create(
+            user=self.user,
+            session=self.session,
+            booking_date=timezone.now(),
+            total_price=self.session.price
+        )
+    
+    def get_with_sql(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        # The last query loads the payload; earlier ones compute validators
+        return response, queries[-1]['sql']
+    
+    def test_sparse_catalog_cards(self):
+        """Test a sparse list returns and selects only the requested columns"""
+        response, sql = self.get_with_sql('/api/sessions/?fields=id,title,price,thumbnail_url')
+        self.assertEqual(
+            list(response.data['results'][0]), ['id', 'title', 'price', 'thumbnail_url']
+        )
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"users"', sql)
+    
+    def test_expand_creator_on_list(self):
+        response = self.client.get('/api/sessions/?expand=creator')
+        self.assertEqual(
+            response.data['results'][0]['creator'], UserSerializer(self.creator).data
+        )
+    
+    def test_sparse_detail_narrows_query(self):
+        response, sql = self.get_with_sql(f'/api/sessions/{self.session.id}/?fields=id,title')
+        self.assertEqual(response.data, {'id': self.session.id, 'title': 'Fieldset Session'})
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('JOIN', sql)
+    
+    def test_booking_detail_expansion(self):
+        """Test nested session and user are opt-out via ?expand="""
+        self.client.force_authenticate(user=self.user)
+        url = f'/api/bookings/{self.booking.id}/'
+        default = self.client.get(url).data
+        self.assertEqual(default['session']['creator']['username'], 'creator')
+        self.assertEqual(default['user']['username'], 'user')
+        
+        response, sql = self.get_with_sql(f'{url}?expand=&fields=id,session,user,status')
+        self.assertEqual(response.data, {
+            'id': self.booking.id, 'user': self.user.id,
+            'session': self.session.id, 'status': 'pending'
+        })
+        self.assertNotIn('"sessions"."title"', sql)
+        
+        response = self.client.get(f'{url}?expand=session')
+        self.assertEqual(response.data['session'], default['session'])
+        self.assertEqual(response.data['user'], self.user.id)
+    
+    def test_booking_list_expansion_matches_serializer(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/bookings/?expand=session,user&fields=id,session,user')
+        expected = BookingListSerializer(
+            Booking.objects.all(), many=True, fields=('id', 'session', 'user'),
+            expand=('session', 'user')
+        ).data
+        self.assertEqual(response.data['results'], expected)
+    
+    def test_user_fields(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/users/me/?fields=id,username')
+        self.assertEqual(response.data, {'id': self.user.id, 'username': 'user'})
+    
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get('/api/sessions/?fields=id,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        response = self.client.get('/api/sessions/?expand=bookings')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingExportTests(TestCase):
+    """Test the streaming booking export"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.other_creator = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            first_name='=cmd',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Export, "Session"',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status='published'
+        )
+        other_session = Session.objects.create(
+            creator=self.other_creator,
+            title='Other Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            status='published'
+        )
+        self.start = timezone.now()
+        for day, status_value in enumerate(['pending', 'confirmed', 'cancelled']):
+            Booking.objects.create(
+                user=self.user,
+                session=self.session,
+                booking_date=self.start + timezone.timedelta(days=day),
+                total_price=Decimal('10.00'),
+                status=status_value
+            )
+        Booking.objects.create(
+            user=self.user,
+            session=other_session,
+            booking_date=self.start,
+            total_price=Decimal('10.00')
+        )
+        self.client.force_authenticate(user=self.creator)
+    
+    def export(self, query):
+        response = self.client.get(f'/api/bookings/export/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_csv_export(self):
+        rows = list(csv.DictReader(StringIO(self.export('format=csv'))))
+        self.assertEqual([row['status'] for row in rows], ['pending', 'confirmed', 'cancelled'])
+        self.assertEqual(rows[0]['session_title'], 'Export, "Session"')
+        self.assertEqual(rows[0]['total_price'], '10.00')
+        # Formula-like cells are neutralised for spreadsheet apps
+        self.assertEqual(rows[0]['attendee_first_name'], "'=cmd")
+    
+    def test_ndjson_export_with_filters(self):
+        start = self.start.isoformat().replace('+00:00', 'Z')
+        end = (self.start + timezone.timedelta(days=2)).isoformat().replace('+00:00', 'Z')
+        lines = self.export(
+            f'format=ndjson&date_from={start}&date_to={end}&status=pending&status=cancelled'
+        ).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['status'], 'pending')
+        self.assertEqual(rows[0]['attendee_username'], 'user')
+    
+    def test_accept_header_selects_format(self):
+        response = self.client.get('/api/bookings/export/', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('bookings.ndjson', response['Content-Disposition'])
+    
+    def test_invalid_filters(self):
+        response = self.client.get('/api/bookings/export/?format=ndjson&status=unknown')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(b'status', response.content)
+    
+    def test_users_cannot_export(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/bookings/export/?format=csv')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    async def test_asgi_export_streams_asynchronously(self):
+        auth = {'Authorization': f"Bearer {get_tokens_for_user(self.creator)['access']}"}
+        with warnings.catch_warnings():
+            # Raised when Django has to drain a sync iterator into memory under ASGI
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = await AsyncClient().get('/api/bookings/export/?format=csv', headers=auth)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.is_async)
+            content = b''.join([part async for part in response]).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([row['status'] for row in rows], ['pending', 'confirmed', 'cancelled'])
+
+
+class BulkBookingActionTests(TestCase):
+    """Test bulk booking actions"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.other_creator = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.sessions = [
+            Session.objects.create(
+                creator=creator,
+                title='Workshop',
+                description='Description',
+                category='Programming',
+                duration_minutes=60,
+                price=Decimal('10.00'),
+                max_attendees=10,
+                status='published'
+            )
+            for creator in (self.creator, self.creator, self.other_creator)
+        ]
+        self.client.force_authenticate(user=self.user)
+        self.bookings = {}
+        for session in self.sessions:
+            for attendees in (1, 2):
+                response = self.client.post('/api/bookings/', {
+                    'session': session.id,
+                    'booking_date': timezone.now().isoformat(),
+                    'attendees_count': attendees
+                })
+                self.bookings.setdefault(session.id, []).append(response.data['id'])
+    
+    def bulk(self, user, action, ids):
+        self.client.force_authenticate(user=user)
+        return self.client.post('/api/bookings/bulk/', {'action': action, 'ids': ids}, format='json')
+    
+    def results(self, response):
+        return {row['id']: row['result'] for row in response.data['results']}
+    
+    def test_creator_confirms_across_sessions(self):
+        mine = self.bookings[self.sessions[0].id] + self.bookings[self.sessions[1].id]
+        theirs = self.bookings[self.sessions[2].id]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk(self.creator, 'confirm', mine + theirs + [999999])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Lock + permission query, bookings UPDATE, counters UPDATE and rollup upsert,
+        # plus the savepoint pair
+        self.assertEqual(len(queries), 6)
+        self.assertEqual(response.data['updated'], 4)
+        results = self.results(response)
+        self.assertEqual({results[booking_id] for booking_id in mine}, {'updated'})
+        self.assertEqual({results[booking_id] for booking_id in theirs + [999999]}, {'not_found'})
+        
+        for session in self.sessions[:2]:
+            session.refresh_from_db()
+            self.assertEqual((session.pending_bookings_count, session.confirmed_attendees), (0, 3))
+        self.assertEqual(Booking.objects.filter(status='confirmed').count(), 4)
+        
+        response = self.bulk(self.creator, 'confirm', mine[:1])
+        self.assertEqual(self.results(response), {mine[0]: 'unchanged'})
+        response = self.bulk(self.creator, 'complete', mine[:1])
+        self.assertEqual(self.results(response), {mine[0]: 'updated'})
+        self.assertEqual(response.data['results'][0]['status'], 'completed')
+    
+    def test_attendee_permissions(self):
+        ids = self.bookings[self.sessions[0].id]
+        response = self.bulk(self.user, 'confirm', ids)
+        self.assertEqual(set(self.results(response).values()), {'forbidden'})
+        
+        response = self.bulk(self.user, 'cancel', ids)
+        self.assertEqual(set(self.results(response).values()), {'updated'})
+        response = self.bulk(self.creator, 'confirm', ids)
+        self.assertEqual(set(self.results(response).values()), {'invalid_status'})
+        self.sessions[0].refresh_from_db()
+        self.assertEqual(self.sessions[0].pending_bookings_count, 0)
+    
+    def test_validation(self):
+        response = self.bulk(self.creator, 'delete', [1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.bulk(self.creator, 'confirm', [])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SessionImportTests(TestCase):
+    """Test bulk session import and recurring series"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.client.force_authenticate(user=self.creator)
+    
+    def row(self, index, **overrides):
+        row = {
+            'title': f'Class {index}', 'description': 'Weekly class', 'category': 'Yoga',
+            'duration_minutes': 60, 'price': '15.00', 'status': 'published'
+        }
+        row.update(overrides)
+        return row
+    
+    def test_json_import_uses_one_insert(self):
+        rows = [self.row(index) for index in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/sessions/import/', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['created'], 50)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Session.objects.filter(creator=self.creator).count(), 50)
+        # Imported sessions reach the (cached) catalog and search index
+        self.assertEqual(len(self.client.get('/api/sessions/?page_size=100').data['results']), 50)
+        self.assertEqual(len(self.client.get('/api/sessions/search/?q=class&limit=100').data['results']), 50)
+    
+    def test_csv_import(self):
+        body = (
+            'title,description,category,duration_minutes,price,location\r\n'
+            'Morning Flow,Gentle start,Yoga,45,12.50,\r\n'
+            'Evening Flow,Wind down,Yoga,60,15.00,Studio 2\r\n'
+        )
+        response = self.client.post('/api/sessions/import/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        sessions = Session.objects.order_by('id')
+        self.assertEqual([session.location for session in sessions], ['', 'Studio 2'])
+        self.assertEqual(sessions[0].price, Decimal('12.50'))
+        self.assertEqual(sessions[0].status, 'draft')
+    
+    def test_invalid_rows_create_nothing(self):
+        rows = [self.row(1), self.row(2, price='-1'), self.row(3, duration_minutes=0)]
+        response = self.client.post('/api/sessions/import/', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['rows']), [2, 3])
+        self.assertIn('price', response.data['rows'][2])
+        self.assertIn('duration_minutes', response.data['rows'][3])
+        self.assertFalse(Session.objects.exists())
+    
+    def test_weekly_series(self):
+        data = self.row(0, starts_at='2026-11-02T18:00:00Z', recurrence='FREQ=WEEKLY;COUNT=4')
+        response = self.client.post('/api/sessions/series/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['created'], 4)
+        sessions = Session.objects.filter(series_id=response.data['series_id']).order_by('starts_at')
+        self.assertEqual(
+            [session.starts_at.date().isoformat() for session in sessions],
+            ['2026-11-02', '2026-11-09', '2026-11-16', '2026-11-23']
+        )
+    
+    def test_series_rules_are_validated(self):
+        for rule in ['FREQ=SOMETIMES', 'FREQ=DAILY', 'DTSTART:20260101T000000Z\nRRULE:FREQ=DAILY;COUNT=2']:
+            data = self.row(0, starts_at='2026-11-02T18:00:00Z', recurrence=rule)
+            response = self.client.post('/api/sessions/series/', data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, rule)
+            self.assertIn('recurrence', response.data)
+        response = self.client.post('/api/sessions/series/', self.row(0, recurrence='FREQ=DAILY;COUNT=2'),
+                                    format='json')
+        self.assertIn('starts_at', response.data)
+        self.assertFalse(Session.objects.exists())
+    
+    def test_users_cannot_import(self):
+        user = User.objects.create_user(username='user', password='testpass123', role='user')
+        self.client.force_authenticate(user=user)
+        response = self.client.post('/api/sessions/import/', [self.row(1)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class IdempotencyTests(TestCase):
+    """Test Idempotency-Key handling on booking and payment intent creation"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Retried Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=10,
+            status='published'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.data = {
+            'session': self.session.id,
+            'booking_date': '2026-11-02T18:00:00Z',
+            'attendees_count': 2
+        }
+    
+    def book(self, key, data=None):
+        return self.client.post('/api/bookings/', data or self.data, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+    
+    def test_retry_replays_booking(self):
+        first = self.book('retry-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.book('retry-1')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.reserved_seats, 2)
+        
+        # Other keys and other users are separate requests
+        self.assertEqual(self.book('retry-2').status_code, status.HTTP_201_CREATED)
+        other = User.objects.create_user(username='other', password='testpass123', role='user')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.book('retry-1').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Booking.objects.count(), 3)
+    
+    def test_key_reused_for_different_request(self):
+        self.book('reused')
+        response = self.book('reused', dict(self.data, attendees_count=3))
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.objects.count(), 1)
+    
+    def test_failed_request_is_not_replayed(self):
+        response = self.book('fix-and-retry', dict(self.data, attendees_count=50))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.book('fix-and-retry').status_code, status.HTTP_201_CREATED)
+    
+    def test_request_in_progress(self):
+        # A first request that is still running holds the key
+        cache.add(idempotency_cache_key('booking-create', self.user.pk, 'slow'), {'state': 'processing'})
+        response = self.book('slow')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Booking.objects.exists())
+    
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.client.post('/api/bookings/', self.data, format='json')
+        self.client.post('/api/bookings/', self.data, format='json')
+        self.assertEqual(Booking.objects.count(), 2)
+    
+    def test_retry_replays_payment_intent(self):
+        booking_id = self.book('booking').data['id']
+        intent = mock.Mock(id='pi_once', client_secret='secret_once')
+        with mock.patch('stripe.PaymentIntent.create', return_value=intent) as create:
+            responses = [
+                self.client.post('/api/payment/create-intent/', {'booking_id': booking_id},
+                                 format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+                for _ in range(3)
+            ]
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(create.call_args.kwargs['idempotency_key'],
+                         f'create-intent:{self.user.pk}:{booking_id}:pay-1')
+        self.assertEqual([response.data['payment_intent_id'] for response in responses], ['pi_once'] * 3)
+
+
+class SeatInventoryTests(TestCase):
+    """Test seat reservation against max_attendees"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Small Group',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=5,
+            status='published'
+        )
+    
+    def book(self, attendees_count=1):
+        self.client.force_authenticate(user=self.user)
+        return self.client.post('/api/bookings/', {
+            'session': self.session.id,
+            'booking_date': timezone.now().isoformat(),
+            'attendees_count': attendees_count
+        })
+    
+    def assertSeats(self, reserved):
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.reserved_seats, reserved)
+    
+    def test_bookings_stop_at_capacity(self):
+        self.assertEqual(self.book(3).status_code, status.HTTP_201_CREATED)
+        response = self.book(3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Only 2 seats remaining', str(response.data))
+        self.assertEqual(self.book(2).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book(1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertSeats(5)
+        response = self.client.get(f'/api/sessions/{self.session.id}/')
+        self.assertEqual(response.data['seats_remaining'], 0)
+    
+    def test_cancel_releases_seats(self):
+        booking_id = self.book(5).data['id']
+        self.client.force_authenticate(user=self.creator)
+        self.client.post(f'/api/bookings/{booking_id}/cancel/')
+        self.assertSeats(0)
+        self.assertEqual(self.book(4).status_code, status.HTTP_201_CREATED)
+        
+        # Reinstating the cancelled booking needs its seats back
+        self.client.force_authenticate(user=self.creator)
+        response = self.client.patch(f'/api/bookings/{booking_id}/', {'status': 'pending'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Booking.objects.get(id=booking_id).status, 'cancelled')
+        self.assertSeats(4)
+    
+    def test_reservation_is_checked_in_the_update(self):
+        """Test a booking that passed validation on stale data is still refused"""
+        self.book(4)
+        with mock.patch.object(Session, 'seats_remaining', new_callable=mock.PropertyMock,
+                               return_value=5):
+            response = self.book(2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'][0].code, 'seats_unavailable')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertSeats(4)
+    
+    def test_expire_unpaid_bookings(self):
+        expired = self.book(2).data['id']
+        paying = self.book(2).data['id']
+        fresh = self.book(1).data['id']
+        Booking.objects.filter(id=paying).update(payment_intent_id='pi_in_flight')
+        Booking.objects.filter(id__in=[expired, paying]).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        
+        out = StringIO()
+        call_command('expire_unpaid_bookings', dry_run=True, stdout=out)
+        self.assertIn('1 unpaid bookings have expired', out.getvalue())
+        call_command('expire_unpaid_bookings', stdout=out)
+        self.assertIn('Cancelled 1 unpaid bookings', out.getvalue())
+        
+        statuses = dict(Booking.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[expired], statuses[paying], statuses[fresh]], ['cancelled', 'pending', 'pending']
+        )
+        self.assertSeats(3)
+        self.assertFalse(drifted_sessions().exists())
+
+
+class SeatInventoryStressTests(TransactionTestCase):
+    """Test concurrent bookings never oversell a session"""
+    
+    WORKERS = 32
+    
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(username='creator', password='testpass123', role='creator')
+        self.user = User.objects.create_user(username='user', password='testpass123', role='user')
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Popular Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=100,
+            status='published'
+        )
+    
+    def run_concurrently(self, tasks):
+        """Run callables on WORKERS threads, all queued before any starts, returning their results"""
+        gate = Event()
+        
+        def start(task):
+            gate.wait()
+            try:
+                return task()
+            finally:
+                connection.close()
+        
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            results = executor.map(start, tasks)
+            gate.set()
+            return list(results)
+    
+    def attempt_booking(self, attendees_count):
+        request = mock.Mock(user=self.user)
+        serializer = BookingCreateSerializer(data={
+            'session': self.session.id,
+            'booking_date': timezone.now().isoformat(),
+            'attendees_count': attendees_count,
+        }, context={'request': request})
+        try:
+            serializer.is_valid(raise_exception=True)
+            return serializer.save()
+        except ValidationError:
+            return None
+    
+    def held_seats(self):
+        return sum(
+            Booking.objects.filter(session=self.session).exclude(status='cancelled')
+            .values_list('attendees_count', flat=True)
+        )
+    
+    def test_no_oversell_under_contention(self):
+        results = self.run_concurrently(
+            [lambda: self.attempt_booking(1) for _ in range(300)]
+        )
+        booked = [booking for booking in results if booking]
+        self.assertEqual(len(booked), 100)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.reserved_seats, 100)
+        self.assertEqual(self.held_seats(), 100)
+        
+        # Cancellations and new bookings racing each other stay exact
+        tasks = [lambda booking=booking: transition_booking(booking, 'cancelled') for booking in booked[:40]]
+        tasks += [lambda size=size: self.attempt_booking(size) for size in [1, 2, 3] * 40]
+        self.run_concurrently(tasks)
+        
+        self.session.refresh_from_db()
+        self.assertLessEqual(self.session.reserved_seats, 100)
+        self.assertEqual(self.session.reserved_seats, self.held_seats())
+        self.assertFalse(drifted_sessions().exists())
+
+
+class CreatorAnalyticsTests(TestCase):
+    """Test the daily rollups and the creator analytics endpoint"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user'
+        )
+        self.session = Session.objects.create(
+            creator=self.creator,
+            title='Analysed Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=20,
+            status='published'
+        )
+        self.euro_session = Session.objects.create(
+            creator=self.creator,
+            title='Euro Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('8.00'),
+            currency='EUR',
+            max_attendees=20,
+            status='published'
+        )
+    
+    def book(self, session, attendees_count=1):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/api/bookings/', {
+            'session': session.id,
+            'booking_date': timezone.now().isoformat(),
+            'attendees_count': attendees_count
+        })
+        return response.data['id']
+    
+    def rollup_rows(self):
+        return list(SessionDailyRollup.objects.order_by('session_id', 'day').values(
+            'creator_id', 'session_id', 'day', 'currency', 'bookings', 'cancellations',
+            'confirmed_attendees', 'revenue'
+        ))
+    
+    def analytics(self, query=''):
+        self.client.force_authenticate(user=self.creator)
+        return self.client.get(f'/api/dashboard/creator/analytics/{query}')
+    
+    def test_rollups_follow_booking_writes(self):
+        confirmed = self.book(self.session, 2)
+        cancelled = self.book(self.session)
+        deleted = self.book(self.session)
+        paid = self.book(self.euro_session, 3)
+        
+        self.client.force_authenticate(user=self.creator)
+        self.client.post(f'/api/bookings/{confirmed}/confirm/')
+        self.client.post(f'/api/bookings/{cancelled}/cancel/')
+        self.client.delete(f'/api/bookings/{deleted}/')
+        self.client.post('/api/bookings/bulk/', {'action': 'confirm', 'ids': [paid]}, format='json')
+        
+        response = self.analytics()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['totals'], {
+            'bookings': 3,
+            'cancellations': 1,
+            'confirmed_attendees': 5,
+            'revenue': {'EUR': '24.00', 'USD': '20.00'},
+        })
+        self.assertEqual(len(response.data['periods']), 1)
+        self.assertEqual(response.data['periods'][0]['period'], timezone.localdate())
+        
+        # The backfill recomputes exactly what the writes maintained
+        maintained = self.rollup_rows()
+        out = StringIO()
+        call_command('backfill_creator_rollups', stdout=out)
+        self.assertIn('Wrote 2 rollup rows', out.getvalue())
+        self.assertEqual(self.rollup_rows(), maintained)
+    
+    def test_granularity_and_range(self):
+        today = timezone.localdate()
+        monday = today - timedelta(days=today.weekday())
+        days = [monday - timedelta(days=7), monday - timedelta(days=6), monday]
+        for day in days:
+            booking = Booking.objects.create(
+                user=self.user, session=self.session, booking_date=timezone.now(),
+                total_price=Decimal('10.00'), status='confirmed'
+            )
+            Booking.objects.filter(id=booking.id).update(
+                created_at=timezone.make_aware(datetime.combine(day, datetime.min.time()))
+            )
+        call_command('backfill_creator_rollups', creator=self.creator.id, stdout=StringIO())
+        
+        query = f'?from={days[0]}&to={today}'
+        response = self.analytics(query)
+        self.assertEqual([period['period'] for period in response.data['periods']], days)
+        response = self.analytics(f'{query}&granularity=week')
+        self.assertEqual(
+            [(period['period'], period['bookings']) for period in response.data['periods']],
+            [(days[0], 2), (monday, 1)]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.analytics(f'?from={days[1]}&to={today}&granularity=month&session={self.session.id}')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['totals']['bookings'], 2)
+        self.assertEqual(response.data['totals']['revenue'], {'USD': '20.00'})
+    
+    def test_invalid_queries(self):
+        self.assertEqual(self.analytics('?from=2026-02-01&to=2026-01-01').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.analytics('?granularity=hour').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.analytics('?from=2000-01-01&to=2026-01-01').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/dashboard/creator/analytics/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """
+    Google and GitHub stand-in that answers provider calls after LATENCY
+    seconds. /ping answers at once, /cookie sets a cookie and /flaky/<n> fails
+    with 503 until it has been hit n times; every call, client connection and
+    Cookie header is recorded.
+    """
+    
+    LATENCY = 0.5
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+    hits = Counter()
+    cookies = []
+    
+    @classmethod
+    def reset(cls):
+        cls.connections.clear()
+        cls.hits.clear()
+        cls.cookies.clear()
+    
+    def answer_immediately(self):
+        self.connections.add(self.client_address)
+        self.hits[self.path] += 1
+        self.cookies.append(self.headers.get('Cookie'))
+        if self.path == '/ping':
+            self.reply(200, {'pong': True})
+        elif self.path == '/cookie':
+            self.reply(200, {'ok': True}, {'Set-Cookie': 'sessionid=first-user; Path=/'})
+        elif self.path.startswith('/flaky/'):
+            if self.hits[self.path] > int(self.path.split('/')[2]):
+                self.reply(200, {'ok': True})
+            else:
+                self.reply(503, {'message': 'Try again'})
+        else:
+            return False
+        return True
+    
+    def do_GET(self):
+        if self.answer_immediately():
+            return
+        time.sleep(self.LATENCY)
+        token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+        if self.path == '/google/userinfo' and token.startswith('google-'):
+            number = token.removeprefix('google-')
+            self.reply(200, {
+                'id': number, 'email': f'learner{number}@example.com',
+                'given_name': 'Learner', 'family_name': number,
+            })
+        elif self.path == '/github/user' and token == 'github-token':
+            self.reply(200, {
+                'id': 42, 'login': 'octocat', 'name': 'Octo Cat', 'email': None,
+                'avatar_url': 'https://example.com/octocat.png', 'bio': None,
+            })
+        elif self.path == '/github/user/emails' and token == 'github-token':
+            self.reply(200, [
+                {'email': 'old@example.com', 'primary': False},
+                {'email': 'octocat@example.com', 'primary': True},
+            ])
+        else:
+            self.reply(401, {'message': 'Bad credentials'})
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        if self.answer_immediately():
+            return
+        time.sleep(self.LATENCY)
+        if self.path == '/github/token' and 'code=good-code' in body:
+            self.reply(200, {'access_token': 'github-token'})
+        else:
+            self.reply(200, {
+                'error': 'bad_verification_code',
+                'error_description': 'The code passed is incorrect or expired.',
+            })
+    
+    def reply(self, status_code, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+    
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up before the reply is written
+        pass
+
+
+class AsyncProviderViewTests(TestCase):
+    """Test the async OAuth, payment and storage views against slow providers"""
+    
+    CONCURRENT_CALLS = 200
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeProviderServer(('127.0.0.1', 0), FakeProviderHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        cls.provider_settings = override_settings(
+            GOOGLE_USERINFO_URL=f'{base_url}/google/userinfo',
+            GITHUB_OAUTH_TOKEN_URL=f'{base_url}/github/token',
+            GITHUB_API_URL=f'{base_url}/github',
+        )
+        cls.provider_settings.enable()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.provider_settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        cache.clear()
+        FakeProviderHandler.reset()
+        for throttle in (AuthRateThrottle, PaymentThrottle):
+            patcher = mock.patch.object(throttle, 'allow_request', return_value=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = AsyncClient()
+    
+    async def test_concurrent_logins_overlap_provider_latency(self):
+        """Provider calls of concurrent logins overlap instead of queueing"""
+        started = time.monotonic()
+        responses = await asyncio.gather(*[
+            self.client.post('/api/auth/oauth/login/', {
+                'provider': 'google', 'access_token': f'google-{number}'
+            }, content_type='application/json')
+            for number in range(self.CONCURRENT_CALLS)
+        ])
+        elapsed = time.monotonic() - started
+        
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertTrue(all(response.json()['is_new_user'] for response in responses))
+        self.assertEqual(
+            await User.objects.filter(oauth_provider='google').acount(), self.CONCURRENT_CALLS
+        )
+        # Serially this takes CONCURRENT_CALLS * LATENCY = 100s
+        self.assertLess(elapsed, self.CONCURRENT_CALLS * FakeProviderHandler.LATENCY / 10)
+    
+    async def test_oauth_login_updates_returning_user(self):
+        """A second login with the same provider account updates the existing user"""
+        data = {'provider': 'google', 'access_token': 'google-7', 'role': 'creator'}
+        first = await self.client.post('/api/auth/oauth/login/', data, content_type='application/json')
+        second = await self.client.post('/api/auth/oauth/login/', data, content_type='application/json')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.json()['is_new_user'])
+        self.assertFalse(second.json()['is_new_user'])
+        self.assertEqual(second.json()['user']['role'], 'creator')
+        self.assertIn('access', second.json()['tokens'])
+        
+        rejected = await self.client.post('/api/auth/oauth/login/', {
+            'provider': 'google', 'access_token': 'expired'
+        }, content_type='application/json')
+        self.assertEqual(rejected.status_code, 400)
+    
+    async def test_github_code_exchange(self):
+        """The code is exchanged and the primary email is used when the profile hides it"""
+        response = await self.client.post('/api/auth/github/callback/', {
+            'code': 'good-code'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'octocat@example.com')
+        user = await User.objects.aget(oauth_id='github_42')
+        self.assertEqual((user.first_name, user.last_name), ('Octo', 'Cat'))
+        
+        response = await self.client.post('/api/auth/github/callback/', {
+            'code': 'stale-code'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'The code passed is incorrect or expired.')
+    
+    async def test_github_login_fetches_profile_and_emails_concurrently(self):
+        """After the code exchange, profile and emails take one overlapped round trip"""
+        started = time.monotonic()
+        response = await self.client.post('/api/auth/github/callback/', {
+            'code': 'good-code'
+        }, content_type='application/json')
+        elapsed = time.monotonic() - started
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FakeProviderHandler.hits['/github/token'], 1)
+        self.assertEqual(FakeProviderHandler.hits['/github/user'], 1)
+        self.assertEqual(FakeProviderHandler.hits['/github/user/emails'], 1)
+        # Three serial round trips would take 3 * LATENCY
+        self.assertLess(elapsed, 2.5 * FakeProviderHandler.LATENCY)
+    
+    async def test_repeated_github_login_reuses_cached_profile(self):
+        """A login repeated with the same token skips GitHub"""
+        data = {'provider': 'github', 'access_token': 'github-token'}
+        first = await self.client.post('/api/auth/oauth/login/', data, content_type='application/json')
+        started = time.monotonic()
+        second = await self.client.post('/api/auth/oauth/login/', data, content_type='application/json')
+        elapsed = time.monotonic() - started
+        
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertFalse(second.json()['is_new_user'])
+        self.assertEqual(second.json()['user']['email'], 'octocat@example.com')
+        self.assertEqual(FakeProviderHandler.hits['/github/user'], 1)
+        self.assertLess(elapsed, FakeProviderHandler.LATENCY)
+        
+        # Failures are not cached, and another token is looked up afresh
+        data['access_token'] = 'revoked-token'
+        for _ in range(2):
+            response = await self.client.post('/api/auth/oauth/login/', data, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(FakeProviderHandler.hits['/github/user'], 3)
+    
+    def create_bookings(self, count):
+        creator = User.objects.create_user(username='creator', password='testpass123', role='creator')
+        user = User.objects.create_user(username='user', password='testpass123', role='user')
+        session = Session.objects.create(
+            creator=creator,
+            title='Paid Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('25.00'),
+            max_attendees=count,
+            status='published'
+        )
+        bookings = [
+            Booking.objects.create(
+                user=user,
+                session=session,
+                booking_date=timezone.now(),
+                attendees_count=1,
+                total_price=session.price
+            )
+            for _ in range(count)
+        ]
+        return user, bookings
+    
+    async def test_concurrent_payment_intents_overlap_stripe_latency(self):
+        """Stripe calls of concurrent payment intent requests overlap"""
+        count = 50
+        user, bookings = await sync_to_async(self.create_bookings)(count)
+        auth = {'Authorization': f"Bearer {get_tokens_for_user(user)['access']}"}
+        
+        def create_intent(**kwargs):
+            time.sleep(FakeProviderHandler.LATENCY)
+            booking_id = kwargs['metadata']['booking_id']
+            return mock.Mock(id=f'pi_{booking_id}', client_secret=f'secret_{booking_id}')
+        
+        started = time.monotonic()
+        with mock.patch('stripe.PaymentIntent.create', side_effect=create_intent):
+            responses = await asyncio.gather(*[
+                self.client.post('/api/payment/create-intent/', {
+                    'booking_id': booking.id
+                }, content_type='application/json', headers=auth)
+                for booking in bookings
+            ])
+        elapsed = time.monotonic() - started
+        
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(
+            await Booking.objects.filter(payment_intent_id__startswith='pi_').acount(), count
+        )
+        self.assertLess(elapsed, count * FakeProviderHandler.LATENCY / 5)
+        
+        missing = await self.client.post('/api/payment/create-intent/', {
+            'booking_id': bookings[-1].id + 1
+        }, content_type='application/json', headers=auth)
+        self.assertEqual(missing.status_code, 404)
+    
+    @override_settings(USE_S3=True, AWS_STORAGE_BUCKET_NAME='sessions',
+                       AWS_S3_CUSTOM_DOMAIN='cdn.example.com')
+    def test_upload_file_serves_sync_requests(self):
+        """Async views also serve sync (WSGI) requests"""
+        user = User.objects.create_user(username='uploader', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        upload = SimpleUploadedFile('photo.png', b'not checked here', content_type='image/png')
+        with mock.patch('backend.storage.get_s3_client', return_value=mock.Mock()), \
+                mock.patch('backend.storage.schedule_thumbnail'):
+            response = client.post('/api/storage/upload/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['image_url'], f"https://cdn.example.com/{response.data['key']}")
+
+
+@override_settings(USE_S3=True, AWS_STORAGE_BUCKET_NAME='sessions',
+                   AWS_S3_CUSTOM_DOMAIN='cdn.example.com')
+class UploadPipelineTests(TestCase):
+    """Test streamed uploads and thumbnails made after the response"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='uploader', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        image = BytesIO()
+        Image.new('RGBA', (640, 480), (255, 0, 0, 128)).save(image, format='PNG')
+        self.image = image.getvalue()
+        self.s3_client = mock.Mock()
+        self.s3_client.download_fileobj.side_effect = (
+            lambda bucket, key, target: target.write(self.image)
+        )
+        patcher = mock.patch('backend.storage.get_s3_client', return_value=self.s3_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def upload(self):
+        upload = SimpleUploadedFile('photo.png', self.image, content_type='image/png')
+        return self.client.post('/api/storage/upload/', {'file': upload}, format='multipart')
+    
+    def wait_for_thumbnail(self, key):
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            response = self.client.get('/api/storage/thumbnail/', {'key': key})
+            if response.data['status'] != 'pending':
+                return response
+            time.sleep(0.01)
+        self.fail('Thumbnail was not made in time')
+    
+    def test_original_is_streamed_and_thumbnail_follows(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['thumbnail_status'], 'pending')
+        
+        # The upload itself is handed to boto3 in parts, not copied into memory
+        original = self.s3_client.upload_fileobj.call_args_list[0]
+        self.assertEqual(original.args[2], response.data['key'])
+        self.assertNotIsInstance(original.args[0], BytesIO)
+        self.assertEqual(original.kwargs['Config'].multipart_chunksize, settings.UPLOAD_CHUNK_SIZE)
+        
+        status_response = self.wait_for_thumbnail(response.data['key'])
+        self.assertEqual(status_response.data['status'], 'ready')
+        self.assertEqual(status_response.data['thumbnail_url'], response.data['thumbnail_url'])
+        thumbnail = self.s3_client.upload_fileobj.call_args_list[1]
+        self.assertTrue(thumbnail.args[2].startswith('sessions/thumbnails/'))
+        self.assertEqual(Image.open(thumbnail.args[0]).size, (300, 225))
+        
+        renditions = status_response.data['renditions']
+        self.assertEqual({name: [r['width'] for r in sizes] for name, sizes in renditions.items()},
+                         {'webp': [320, 640], 'jpeg': [320, 640]})
+        stored = {call.args[2] for call in self.s3_client.upload_fileobj.call_args_list[2:]}
+        self.assertEqual(stored, {r['url'].split('cdn.example.com/', 1)[1]
+                                  for sizes in renditions.values() for r in sizes})
+    
+    def test_failed_thumbnail_is_reported_and_frees_its_slot(self):
+        with mock.patch('backend.storage.THUMBNAIL_SLOTS', BoundedSemaphore(1)):
+            image, self.image = self.image, b'not an image'
+            with self.assertLogs('backend.storage', 'ERROR'):
+                response = self.upload()
+                self.assertEqual(self.wait_for_thumbnail(response.data['key']).data['status'], 'failed')
+            self.image = image
+            response = self.upload()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.wait_for_thumbnail(response.data['key']).data['status'], 'ready')
+    
+    def test_full_queue_refuses_uploads_before_storing_them(self):
+        with mock.patch('backend.storage.THUMBNAIL_SLOTS', BoundedSemaphore(1)) as slots:
+            slots.acquire()
+            response = self.upload()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.s3_client.upload_fileobj.assert_not_called()
+    
+    def test_status_is_private_to_the_uploader(self):
+        response = self.upload()
+        self.wait_for_thumbnail(response.data['key'])
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        response = self.client.get('/api/storage/thumbnail/', {'key': response.data['key']})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(USE_S3=True, AWS_STORAGE_BUCKET_NAME='sessions', AWS_S3_CUSTOM_DOMAIN='',
+                   AWS_S3_ENDPOINT_URL='http://minio:9000', AWS_ACCESS_KEY_ID='minioadmin',
+                   AWS_SECRET_ACCESS_KEY='minioadmin123', AWS_S3_REGION_NAME='us-east-1')
+class PresignedUploadTests(TestCase):
+    """Test direct-to-storage uploads with presigned POST policies"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='uploader', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+    
+    def request_upload(self, **data):
+        data = {'filename': 'photo.jpg', 'content_type': 'image/jpeg', **data}
+        return self.client.post('/api/storage/upload-url/', data, format='json')
+    
+    def complete(self, key, head=None, error=None):
+        s3_client = mock.Mock()
+        s3_client.head_object.return_value = head or {'ContentLength': 2048, 'ContentType': 'image/jpeg'}
+        if error:
+            s3_client.head_object.side_effect = error
+        with mock.patch('backend.storage.get_s3_client', return_value=s3_client), \
+                mock.patch('backend.storage.schedule_thumbnail') as schedule:
+            response = self.client.post('/api/storage/complete/', {'key': key}, format='json')
+        return response, s3_client, schedule
+    
+    def test_policy_pins_key_type_and_size(self):
+        response = self.request_upload(folder='avatars')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['url'], 'http://localhost:9000/sessions')
+        fields = response.data['fields']
+        self.assertEqual(fields['key'], response.data['key'])
+        self.assertTrue(fields['key'].startswith('avatars/') and fields['key'].endswith('.jpg'))
+        policy = json.loads(base64.b64decode(fields['policy']))
+        self.assertIn(['content-length-range', 1, 10 * 1024 * 1024], policy['conditions'])
+        self.assertIn({'Content-Type': 'image/jpeg'}, policy['conditions'])
+        self.assertIn({'key': fields['key']}, policy['conditions'])
+    
+    def test_policy_refuses_other_file_types(self):
+        response = self.request_upload(filename='run.sh', content_type='text/x-shellscript')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.request_upload(filename='').status_code, 400)
+    
+    def test_complete_verifies_object_and_starts_thumbnail(self):
+        key = self.request_upload().data['key']
+        response, s3_client, schedule = self.complete(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['thumbnail_status'], 'pending')
+        self.assertEqual(response.data['image_url'], f'http://localhost:9000/sessions/{key}')
+        s3_client.head_object.assert_called_once_with(Bucket='sessions', Key=key)
+        schedule.assert_called_once()
+        _, original_key, thumbnail_key, user_id = schedule.call_args.args
+        self.assertEqual((original_key, user_id), (key, self.user.pk))
+        self.assertTrue(response.data['thumbnail_url'].endswith(thumbnail_key))
+        
+        # A second completion of the same upload is refused
+        self.assertEqual(self.complete(key)[0].status_code, 404)
+    
+    def test_complete_rejects_objects_breaking_the_rules(self):
+        key = self.request_upload().data['key']
+        response, s3_client, schedule = self.complete(
+            key, head={'ContentLength': 20 * 1024 * 1024, 'ContentType': 'image/jpeg'}
+        )
+        self.assertEqual(response.status_code, 400)
+        s3_client.delete_object.assert_called_once_with(Bucket='sessions', Key=key)
+        schedule.assert_not_called()
+    
+    def test_complete_requires_the_object_and_its_owner(self):
+        key = self.request_upload().data['key']
+        missing = ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+        self.assertEqual(self.complete(key, error=missing)[0].status_code, 400)
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.complete(key)[0].status_code, 404)
+        self.assertEqual(self.complete('sessions/unknown.jpg')[0].status_code, 404)
+
+
+class RenditionTests(TestCase):
+    """Test responsive image renditions and their srcset on sessions"""
+    
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(
+            username='renditions', email='renditions@example.com', password='testpass123', role='creator'
+        )
+    
+    def jpeg(self, size, orientation=1):
+        exif = Image.Exif()
+        exif[0x010F] = 'Test camera'
+        exif[0x0112] = orientation
+        output = BytesIO()
+        Image.new('RGB', size, (40, 120, 200)).save(output, format='JPEG', exif=exif.tobytes())
+        output.seek(0)
+        return output
+    
+    def test_widths_and_formats_without_upscaling(self):
+        rendered = render_image(self.jpeg((1200, 900)), widths=[320, 640, 1600], formats=['webp', 'jpeg'])
+        self.assertEqual(
+            [(r['format'], r['width'], r['height']) for r in rendered],
+            [('webp', 640, 480), ('jpeg', 640, 480), ('webp', 320, 240), ('jpeg', 320, 240)]
+        )
+        for rendition in rendered:
+            image = Image.open(BytesIO(rendition['data']))
+            self.assertEqual(image.format, rendition['format'].upper())
+            self.assertEqual(len(image.getexif()), 0)
+        
+        small = render_image(self.jpeg((200, 100)), widths=[320], formats=['jpeg'])
+        self.assertEqual([(r['width'], r['height']) for r in small], [(200, 100)])
+    
+    def test_jpeg_draft_decoding_and_orientation(self):
+        image = decode(self.jpeg((4000, 3000)), 640)
+        self.assertEqual(image.size, (1000, 750))
+        # Stored landscape, displayed portrait: the width applies upright
+        image = decode(self.jpeg((4000, 3000), orientation=6), 640)
+        self.assertEqual(image.size, (750, 1000))
+    
+    def test_unsupported_formats_are_skipped(self):
+        with mock.patch.dict('PIL.Image.SAVE', clear=False) as save:
+            save.pop('AVIF', None)
+            self.assertEqual(supported_formats(['avif', 'webp', 'bmp']), ['webp'])
+    
+    def test_renditions_reach_sessions_and_srcset(self):
+        image_url = 'https://cdn.example.com/sessions/photo.jpg'
+        renditions = {'webp': [
+            {'width': 320, 'height': 240, 'url': 'https://cdn.example.com/a_320w.webp'},
+            {'width': 640, 'height': 480, 'url': 'https://cdn.example.com/a_640w.webp'},
+        ]}
+        existing = Session.objects.create(
+            creator=self.creator, title='Existing', description='Has the image', category='Art',
+            duration_minutes=30, price=Decimal('0.00'), status='published', image_url=image_url
+        )
+        stale = Session.objects.get(pk=existing.pk)
+        attach_renditions(image_url, renditions)
+        existing.refresh_from_db()
+        self.assertEqual(existing.image_renditions, renditions)
+        
+        # A full save of an instance loaded before the job finished keeps them
+        stale.title = 'Existing, renamed'
+        stale.save()
+        existing.refresh_from_db()
+        self.assertEqual((existing.title, existing.image_renditions), ('Existing, renamed', renditions))
+        srcset = 'https://cdn.example.com/a_320w.webp 320w, https://cdn.example.com/a_640w.webp 640w'
+        
+        # Sessions saved with the image later pick the renditions up from the cache
+        client = APIClient()
+        client.force_authenticate(user=self.creator)
+        response = client.post('/api/sessions/', {
+            'title': 'Later', 'description': 'Reuses the image', 'category': 'Art',
+            'duration_minutes': 30, 'price': '0.00', 'status': 'published', 'image_url': image_url,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        created = Session.objects.get(title='Later')
+        self.assertEqual(created.image_renditions, renditions)
+        
+        detail = client.get(f'/api/sessions/{created.id}/')
+        self.assertEqual(detail.data['image_srcset'], {'webp': srcset})
+        listed = client.get('/api/sessions/')
+        self.assertEqual({row['image_srcset']['webp'] for row in listed.data['results']}, {srcset})
+        
+        # Changing the image drops renditions of the old one
+        response = client.patch(f'/api/sessions/{created.id}/', {
+            'image_url': 'https://cdn.example.com/sessions/other.jpg'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        created.refresh_from_db()
+        self.assertEqual(created.image_renditions, {})
+    
+    def test_attached_renditions_change_the_etag(self):
+        """Clients revalidating a session after its renditions attach get the srcset"""
+        image_url = 'https://cdn.example.com/sessions/etag.jpg'
+        session = Session.objects.create(
+            creator=self.creator, title='Etag', description='Has the image', category='Art',
+            duration_minutes=30, price=Decimal('0.00'), status='published', image_url=image_url
+        )
+        client = APIClient()
+        etag = client.get(f'/api/sessions/{session.id}/')['ETag']
+        attach_renditions(image_url, {'webp': [
+            {'width': 320, 'height': 240, 'url': 'https://cdn.example.com/e_320w.webp'},
+        ]})
+        response = client.get(f'/api/sessions/{session.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['image_srcset'], {'webp': 'https://cdn.example.com/e_320w.webp 320w'})
+    
+    def test_benchmark_reports_each_rendition(self):
+        out = StringIO()
+        call_command('benchmark_renditions', '--widths', '320', '--formats', 'webp', 'jpeg',
+                     '--repeat', '1', stdout=out)
+        output = out.getvalue()
+        self.assertIn('camera-12mp.jpg', output)
+        self.assertEqual(output.count('  320w webp'), 5)
+
+
+class OutboundClientTests(TestCase):
+    """Test the pooled, instrumented outbound HTTP client"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeProviderServer(('127.0.0.1', 0), FakeProviderHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def setUp(self):
+        FakeProviderHandler.reset()
+        outbound.metrics.reset()
+        outbound.SESSION.close()
+    
+    def test_calls_reuse_keep_alive_connections(self):
+        """Sequential calls to one host share one connection"""
+        for _ in range(5):
+            response = outbound.request('fake', 'GET', f'{self.base_url}/ping')
+            self.assertEqual(response.json(), {'pong': True})
+        self.assertEqual(FakeProviderHandler.hits['/ping'], 5)
+        self.assertEqual(len(FakeProviderHandler.connections), 1)
+    
+    def test_cookies_do_not_carry_over_between_calls(self):
+        """A cookie set for one user's call is never sent with the next"""
+        outbound.request('fake', 'GET', f'{self.base_url}/cookie')
+        outbound.request('fake', 'GET', f'{self.base_url}/ping')
+        self.assertEqual(FakeProviderHandler.cookies, [None, None])
+        self.assertEqual(len(outbound.SESSION.cookies), 0)
+    
+    def test_idempotent_calls_retry_transient_failures(self):
+        """GETs are retried on 5xx with jittered backoff"""
+        with mock.patch('backend.outbound.time.sleep') as sleep:
+            response = outbound.request('fake', 'GET', f'{self.base_url}/flaky/2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FakeProviderHandler.hits['/flaky/2'], 3)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(len(delays), 2)
+        self.assertTrue(0 <= delays[0] <= outbound.RETRY_BACKOFF_BASE)
+        self.assertTrue(0 <= delays[1] <= outbound.RETRY_BACKOFF_BASE * 2)
+        
+        stats = outbound.metrics.snapshot()['fake']
+        self.assertEqual((stats['calls'], stats['retries'], stats['errors']), (1, 2, 0))
+    
+    @override_settings(OUTBOUND_MAX_RETRIES=1)
+    def test_retries_are_bounded(self):
+        """The last failed response is returned once retries run out"""
+        with mock.patch('backend.outbound.time.sleep'):
+            response = outbound.request('fake', 'GET', f'{self.base_url}/flaky/5')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(FakeProviderHandler.hits['/flaky/5'], 2)
+        self.assertEqual(outbound.metrics.snapshot()['fake']['errors'], 1)
+    
+    def test_posts_are_not_retried_once_sent(self):
+        """A POST that reached the provider is never repeated"""
+        response = outbound.request('fake', 'POST', f'{self.base_url}/flaky/1', data={'code': 'x'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(FakeProviderHandler.hits['/flaky/1'], 1)
+    
+    @override_settings(OUTBOUND_READ_TIMEOUT=0.1, OUTBOUND_MAX_RETRIES=0)
+    def test_read_timeout(self):
+        """A provider slower than the read timeout fails fast"""
+        started = time.monotonic()
+        with self.assertRaises(requests.ReadTimeout):
+            outbound.request('fake', 'GET', f'{self.base_url}/google/userinfo')
+        self.assertLess(time.monotonic() - started, FakeProviderHandler.LATENCY)
+        self.assertEqual(outbound.metrics.snapshot()['fake']['errors'], 1)
+    
+    def test_metrics_endpoint(self):
+        """Staff can read this worker's latency histograms"""
+        outbound.request('fake', 'GET', f'{self.base_url}/ping')
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='member', password='pass'))
+        self.assertEqual(client.get('/api/metrics/outbound/').status_code, 403)
+        
+        client.force_authenticate(user=User.objects.create_user(
+            username='staff', password='pass', is_staff=True
+        ))
+        response = client.get('/api/metrics/outbound/')
+        self.assertEqual(response.status_code, 200)
+        stats = response.data['services']['fake']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['buckets']['+Inf'], 1)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """Test authenticating from access token claims without loading the user"""
+    
+    def setUp(self):
+        user_states.clear()
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator'
+        )
+    
+    def authenticate(self, user):
+        token = get_tokens_for_user(user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_requests_skip_the_user_query(self):
+        """With the user's state cached, role checks cost no query"""
+        self.authenticate(self.creator)
+        self.client.get('/api/sessions/my_sessions/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/sessions/my_sessions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('FROM "users"', queries[0]['sql'])
+    
+    def test_profile_fields_load_in_one_query(self):
+        """Reading any profile field loads them all at once"""
+        self.authenticate(self.creator)
+        self.client.get('/api/users/me/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['email'], 'creator@example.com')
+        self.assertEqual(response.data['role'], 'creator')
+        self.assertEqual(len(queries), 1)
+        
+        response = self.client.patch('/api/users/update_profile/', {'bio': 'Teaches'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.creator.refresh_from_db()
+        self.assertEqual((self.creator.bio, self.creator.email), ('Teaches', 'creator@example.com'))
+    
+    def test_claim_changes_outdate_tokens(self):
+        """Changing the role bumps the token version, so older tokens are refused"""
+        self.authenticate(self.creator)
+        self.assertEqual(self.client.get('/api/sessions/my_sessions/').status_code, 200)
+        
+        self.creator.role = 'user'
+        self.creator.save(update_fields=['role'])
+        self.assertEqual(User.objects.get(pk=self.creator.pk).token_version, 1)
+        self.assertEqual(self.client.get('/api/sessions/my_sessions/').status_code, 401)
+        
+        self.authenticate(self.creator)
+        self.assertEqual(self.client.get('/api/sessions/my_sessions/').status_code, 403)
+        
+        # Profile edits leave tokens valid
+        self.creator.bio = 'Learner now'
+        self.creator.save()
+        self.assertEqual(self.client.get('/api/bookings/my_bookings/').status_code, 200)
+    
+    def test_inactive_and_deleted_users_are_refused(self):
+        token = get_tokens_for_user(self.creator)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get('/api/bookings/my_bookings/').status_code, 200)
+        
+        User.objects.filter(pk=self.creator.pk).update(is_active=False)
+        user_states.clear()
+        self.assertEqual(self.client.get('/api/bookings/my_bookings/').status_code, 401)
+        
+        User.objects.filter(pk=self.creator.pk).delete()
+        user_states.clear()
+        self.assertEqual(self.client.get('/api/bookings/my_bookings/').status_code, 401)
+    
+    def test_tokens_without_claims_load_the_user(self):
+        """Tokens issued before claims were added still authenticate"""
+        token = RefreshToken.for_user(self.creator).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get('/api/sessions/my_sessions/')
+        self.assertEqual(response.status_code, 200)
+
+
+class RevocationTests(TestCase):
+    """Test logout, refresh token rotation and revocation compaction"""
+    
+    def setUp(self):
+        cache.clear()
+        user_states.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='revoker',
+            email='revoker@example.com',
+            password='testpass123'
+        )
+    
+    def get(self, access):
+        return self.client.get('/api/users/me/', HTTP_AUTHORIZATION=f'Bearer {access}')
+    
+    def refresh(self, refresh):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+    
+    def logout(self, access, **data):
+        return self.client.post('/api/auth/logout/', data, format='json',
+                                HTTP_AUTHORIZATION=f'Bearer {access}')
+    
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        """Both tokens stop working, while other sessions are unaffected"""
+        tokens = get_tokens_for_user(self.user)
+        other = get_tokens_for_user(self.user)
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        
+        response = self.logout(tokens['access'], refresh=tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.get(other['access']).status_code, 200)
+        self.assertEqual(TokenRevocation.objects.count(), 2)
+    
+    def test_logout_refuses_another_users_refresh_token(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        tokens = get_tokens_for_user(self.user)
+        stolen = get_tokens_for_user(other)['refresh']
+        response = self.logout(tokens['access'], refresh=stolen)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.refresh(stolen).status_code, 200)
+    
+    def test_logout_all_revokes_every_issued_token(self):
+        first, second = get_tokens_for_user(self.user), get_tokens_for_user(self.user)
+        self.assertEqual(self.logout(first['access'], all=True).status_code, 200)
+        for tokens in (first, second):
+            self.assertEqual(self.get(tokens['access']).status_code, 401)
+            self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+    
+    def test_tokens_issued_after_revoke_all_are_accepted(self):
+        token = RefreshToken(get_tokens_for_user(self.user)['refresh'])
+        revocation.revoke_all(self.user.pk)
+        self.assertTrue(revocation.is_revoked(token))
+        token.set_iat(at_time=timezone.now() + timedelta(seconds=2))
+        self.assertFalse(revocation.is_revoked(token))
+    
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = get_tokens_for_user(self.user)['refresh']
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(response.data['access']).status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+    
+    def test_revocation_check_is_one_cache_read(self):
+        """The check costs one get_many and no query, however many tokens are revoked"""
+        tokens = get_tokens_for_user(self.user)
+        revocation.revoke_tokens(*[RefreshToken(get_tokens_for_user(self.user)['refresh'])
+                                   for _ in range(20)])
+        token = RefreshToken(tokens['refresh'])
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertFalse(revocation.is_revoked(token))
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(len(queries), 0)
+    
+    def test_compaction_drops_expired_and_restores_live_entries(self):
+        tokens = get_tokens_for_user(self.user)
+        self.logout(tokens['access'], refresh=tokens['refresh'])
+        TokenRevocation.objects.create(
+            key='revoked:jti:expired', value=1.0, expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        cache.clear()
+        user_states.clear()
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        
+        out = StringIO()
+        call_command('compact_revocations', stdout=out)
+        self.assertIn('Deleted 1 expired revocations, restored 2', out.getvalue())
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+    
+    def test_rotation_writes_only_to_the_cache(self):
+        """Refreshing makes no write; the rotated token is still refused"""
+        refresh = get_tokens_for_user(self.user)['refresh']
+        user_states.get(self.user.pk)
+        with self.assertNumQueries(0):
+            response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TokenRevocation.objects.exists())
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+    
+    def test_refresh_refuses_outdated_or_inactive_users(self):
+        """Tokens issued before a password change or deactivation cannot be refreshed"""
+        refresh = get_tokens_for_user(self.user)['refresh']
+        self.user.set_password('changed123')
+        self.user.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        
+        refresh = get_tokens_for_user(self.user)['refresh']
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        refresh = get_tokens_for_user(self.user)['refresh']
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+    
+    def test_logouts_prune_expired_rows_once_per_interval(self):
+        """Explicit revocations keep the table bounded without compact_revocations"""
+        def expire(key):
+            TokenRevocation.objects.create(
+                key=key, value=1.0, expires_at=timezone.now() - timedelta(minutes=1)
+            )
+        
+        expire('revoked:jti:first')
+        self.assertEqual(self.logout(get_tokens_for_user(self.user)['access']).status_code, 200)
+        self.assertFalse(TokenRevocation.objects.filter(key='revoked:jti:first').exists())
+        
+        expire('revoked:jti:second')
+        self.assertEqual(self.logout(get_tokens_for_user(self.user)['access']).status_code, 200)
+        self.assertTrue(TokenRevocation.objects.filter(key='revoked:jti:second').exists())
+        cache.delete(revocation.PRUNED_KEY)
+        self.assertEqual(self.logout(get_tokens_for_user(self.user)['access']).status_code, 200)
+        self.assertFalse(TokenRevocation.objects.filter(key='revoked:jti:second').exists())
+        self.assertEqual(TokenRevocation.objects.count(), 3)
+
+
+class RateLimitTests(TestCase):
+    """Test the GCRA limiter and the throttles built on it"""
+    
+    def setUp(self):
+        limiter.clear()
+        self.client = APIClient()
+    
+    def test_limit_admits_a_burst_then_spaces_requests(self):
+        local = LocalLimiter()
+        with mock.patch('backend.ratelimit.time.monotonic', return_value=1000.0) as clock:
+            self.assertEqual([local.hit('key', 3, 60) for _ in range(3)], [0, 0, 0])
+            self.assertAlmostEqual(local.hit('key', 3, 60), 20.0)
+            self.assertEqual(local.hit('other', 3, 60), 0)
+            # One request is admitted per period / limit, never more than the
+            # limit in any window of one period
+            clock.return_value = 1019.0
+            self.assertGreater(local.hit('key', 3, 60), 0)
+            clock.return_value = 1020.0
+            self.assertEqual(local.hit('key', 3, 60), 0)
+            self.assertGreater(local.hit('key', 3, 60), 0)
+    
+    def test_local_limiter_forgets_least_recent_keys(self):
+        local = LocalLimiter(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            local.hit(key, 1, 60)
+        self.assertEqual(list(local.arrivals), ['b', 'c'])
+        self.assertEqual(local.hit('a', 1, 60), 0)
+    
+    def test_auth_endpoints_share_one_limit_per_ip(self):
+        """Login and code exchange draw on the same 10/minute budget, one limiter call each"""
+        with mock.patch.object(limiter, 'hit', wraps=limiter.hit) as hit:
+            for _ in range(5):
+                response = self.client.post('/api/auth/oauth/login/', {'provider': 'nope'}, format='json')
+                self.assertEqual(response.status_code, 400)
+                response = self.client.post('/api/auth/github/callback/', {}, format='json')
+                self.assertEqual(response.status_code, 400)
+            self.assertEqual(hit.call_count, 10)
+        
+        response = self.client.post('/api/auth/oauth/login/', {'provider': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        response = self.client.post(
+            '/api/auth/oauth/login/', {'provider': 'nope'}, format='json', REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_scopes_read_the_settings_rate_table(self):
+        self.assertEqual((AuthRateThrottle().num_requests, AuthRateThrottle().duration), (10, 60))
+        self.assertEqual((PaymentThrottle().num_requests, PaymentThrottle().duration), (10, 3600))
+
+
+# The admin's templates need static URLs, which the manifest storage only has after collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class BookingAdminTests(TestCase):
+    """Test seat checks on bookings edited in the admin"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        creator = User.objects.create_user(username='creator', password='testpass123', role='creator')
+        self.user = User.objects.create_user(username='user', password='testpass123')
+        self.session = Session.objects.create(
+            creator=creator,
+            title='Small Session',
+            description='Description',
+            category='Programming',
+            duration_minutes=60,
+            price=Decimal('10.00'),
+            max_attendees=3,
+            status='published'
+        )
+        self.bookings = []
+        for _ in range(2):
+            booking = Booking.objects.create(
+                user=self.user,
+                session=self.session,
+                booking_date=timezone.now(),
+                total_price=self.session.price
+            )
+            record_booking_created(booking)
+            self.bookings.append(booking)
+    
+    def change(self, booking, **fields):
+        data = {
+            'user': booking.user_id,
+            'session': booking.session_id,
+            'booking_date_0': booking.booking_date.strftime('%Y-%m-%d'),
+            'booking_date_1': booking.booking_date.strftime('%H:%M:%S'),
+            'attendees_count': booking.attendees_count,
+            'status': booking.status,
+            'payment_status': booking.payment_status,
+            'payment_intent_id': '',
+            'payment_method': '',
+            'user_notes': '',
+            'creator_notes': '',
+            '_save': 'Save',
+        }
+        data.update(fields)
+        return self.client.post(f'/admin/backend/booking/{booking.pk}/change/', data)
+    
+    def test_edit_within_capacity_is_saved(self):
+        response = self.change(self.bookings[0], attendees_count=2)
+        self.assertEqual(response.status_code, 302)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.reserved_seats, 3)
+    
+    def test_overbooking_edit_is_refused(self):
+        """The form reports the error and nothing is saved or logged"""
+        response = self.change(self.bookings[0], attendees_count=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'has 1 seats left; this booking needs 2 more')
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].attendees_count, 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.reserved_seats, 2)
+        self.assertFalse(LogEntry.objects.exists())
+    
+    def test_seats_taken_after_validation_roll_back_the_save(self):
+        """A concurrent booking that takes the seats first fails the save as a whole with an error"""
+        with mock.patch('backend.admin.BookingAdminForm.clean', lambda form: form.cleaned_data):
+            response = self.change(self.bookings[0], attendees_count=3)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, f'/admin/backend/booking/{self.bookings[0].pk}/change/')
+        errors = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(errors, ['Not enough seats remaining for this session'])
+        self.bookings[0].refresh_from_db()
+        self.assertEqual(self.bookings[0].attendees_count, 1)
+        self.assertFalse(LogEntry.objects.exists())
 
 
 class ModelTests(TestCase):
@@ -283,3 +2820,249 @@ class ModelTests(TestCase):
         booking.save()
         self.assertFalse(booking.is_active)
         self.assertTrue(booking.is_past)
+
+
+@override_settings(USE_S3=True, AWS_STORAGE_BUCKET_NAME='sessions',
+                   AWS_S3_CUSTOM_DOMAIN='cdn.example.com', AWS_S3_ENDPOINT_URL=None)
+class QueryBudgetTests(TestCase):
+    """
+    Every endpoint in backend/urls.py is served with a fixed, declared number of
+    SQL queries. Each endpoint is measured at two data sizes; the count must equal
+    its budget both times, so anything that scales with N rows fails here.
+    Budgets exclude authentication (these requests use force_authenticate;
+    test_bearer_token_budgets covers real tokens) and include the ETag
+    aggregate on conditional GET endpoints, and the SAVEPOINT/RELEASE pair that
+    TestCase turns each atomic block into. Catalog reads are measured on a
+    cache miss. Providers (OAuth, Stripe, S3) are mocked.
+    """
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = User.objects.create_user(
+            username='creator',
+            email='creator@example.com',
+            password='testpass123',
+            role='creator',
+            oauth_id='github_budget'
+        )
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='testpass123',
+            role='user',
+            oauth_id='google_budget'
+        )
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        self.sessions = []
+        self.bookings = []
+    
+    def seed(self, count):
+        """Add sessions, each booked once by the user and once by the creator"""
+        for _ in range(count):
+            session = Session.objects.create(
+                creator=self.creator,
+                title='Budget Session',
+                description='Budget Description',
+                category='Programming',
+                duration_minutes=60,
+                price=Decimal('10.00'),
+                max_attendees=10,
+                status='published'
+            )
+            self.sessions.append(session)
+            for booker in (self.user, self.creator):
+                self.bookings.append(Booking.objects.create(
+                    user=booker,
+                    session=session,
+                    booking_date=timezone.now(),
+                    attendees_count=1,
+                    total_price=session.price,
+                    payment_intent_id=f'pi_{session.id}_{booker.id}'
+                ))
+    
+    def endpoints(self):
+        """(name, user, method, url, data, budget) for every endpoint"""
+        session = self.sessions[0]
+        booking = self.bookings[0]
+        unpaid = self.bookings[-2]
+        new_session = {
+            'title': 'New Session', 'description': 'New', 'category': 'Design',
+            'duration_minutes': 30, 'price': '5.00', 'status': 'published'
+        }
+        new_booking = {
+            'session': session.id, 'booking_date': timezone.now().isoformat()
+        }
+        # Fresh rows for the destroy endpoints, so both measurements delete one
+        doomed_session = Session.objects.create(
+            creator=self.creator, title='Doomed', description='Doomed', category='Design',
+            duration_minutes=30, price=Decimal('5.00'), status='published'
+        )
+        doomed_booking = Booking.objects.create(
+            user=self.user, session=session, booking_date=timezone.now(), total_price=session.price
+        )
+        doomed_user = User.objects.create_user(username=f'doomed{doomed_session.id}', password='x')
+        # A pending booking for the webhook to confirm
+        self.webhook_booking = Booking.objects.create(
+            user=self.user, session=session, booking_date=timezone.now(), total_price=session.price,
+            payment_intent_id=f'pi_webhook_{doomed_session.id}'
+        )
+        cache.set(thumbnail_status_key('sessions/budget.png'),
+                  {'status': 'ready', 'user_id': self.user.pk}, 60)
+        cache.set(pending_upload_key('sessions/budget.png'),
+                  {'user_id': self.user.pk, 'thumbnail_key': 'sessions/budget_thumb.png',
+                   'filename': 'budget.png'}, 60)
+        upload = SimpleUploadedFile('budget.png', b'not checked here', content_type='image/png')
+        return [
+            ('oauth-login', None, 'post', '/api/auth/oauth/login/',
+             {'provider': 'google', 'access_token': 'budget'}, 2),
+            ('github-callback', None, 'post', '/api/auth/github/callback/', {'code': 'budget'}, 2),
+            ('token-refresh', None, 'post', '/api/auth/token/refresh/',
+             {'refresh': get_tokens_for_user(self.user)['refresh']}, 1),
+            ('logout', self.user, 'post', '/api/auth/logout/', None, 0),
+            ('user-dashboard', self.user, 'get', '/api/dashboard/user/', None, 3),
+            ('creator-dashboard', self.creator, 'get', '/api/dashboard/creator/', None, 5),
+            ('creator-analytics', self.creator, 'get', '/api/dashboard/creator/analytics/', None, 1),
+            ('confirm-payment', self.user, 'post', '/api/payment/confirm/',
+             {'payment_intent_id': booking.payment_intent_id}, 6),
+            ('create-payment-intent', self.user, 'post', '/api/payment/create-intent/',
+             {'booking_id': unpaid.id}, 2),
+            ('stripe-webhook', None, 'post', '/api/payment/webhook/', {}, 6),
+            ('upload-file', self.user, 'post', '/api/storage/upload/', {'file': upload}, 0),
+            ('upload-url', self.user, 'post', '/api/storage/upload-url/',
+             {'filename': 'budget.png', 'content_type': 'image/png'}, 0),
+            ('complete-upload', self.user, 'post', '/api/storage/complete/',
+             {'key': 'sessions/budget.png'}, 0),
+            ('thumbnail-status', self.user, 'get', '/api/storage/thumbnail/?key=sessions/budget.png',
+             None, 0),
+            ('delete-file', self.user, 'delete', '/api/storage/delete/',
+             {'key': 'sessions/budget.png'}, 0),
+            ('outbound-metrics', self.admin, 'get', '/api/metrics/outbound/', None, 0),
+            ('user-list', self.user, 'get', '/api/users/', None, 1),
+            ('user-detail', self.user, 'get', f'/api/users/{self.user.id}/', None, 1),
+            ('user-update', self.user, 'patch', f'/api/users/{self.user.id}/', {'bio': 'Budget'}, 2),
+            ('user-destroy', doomed_user, 'delete', f'/api/users/{doomed_user.id}/', None, 9),
+            ('user-me', self.user, 'get', '/api/users/me/', None, 0),
+            ('user-update-profile', self.user, 'patch', '/api/users/update_profile/',
+             {'bio': 'Budget'}, 1),
+            ('session-list', None, 'get', '/api/sessions/', None, 2),
+            ('session-detail', None, 'get', f'/api/sessions/{session.id}/', None, 2),
+            ('session-search', None, 'get', '/api/sessions/search/?q=budget', None, 2),
+            ('session-facets', None, 'get', '/api/sessions/facets/', None, 1),
+            ('session-create', self.creator, 'post', '/api/sessions/', new_session, 1),
+            ('session-import', self.creator, 'post', '/api/sessions/import/',
+             [new_session] * 3, 3),
+            ('session-series', self.creator, 'post', '/api/sessions/series/',
+             dict(new_session, starts_at='2026-11-02T18:00:00Z', recurrence='FREQ=WEEKLY;COUNT=4'), 3),
+            ('session-update', self.creator, 'patch', f'/api/sessions/{session.id}/',
+             {'title': 'Renamed'}, 2),
+            ('session-destroy', self.creator, 'delete', f'/api/sessions/{doomed_session.id}/',
+             None, 4),
+            ('session-my-sessions', self.creator, 'get', '/api/sessions/my_sessions/', None, 1),
+            ('session-bookings', self.creator, 'get', f'/api/sessions/{session.id}/bookings/',
+             None, 2),
+            ('booking-export', self.creator, 'get', '/api/bookings/export/?format=csv', None, 1),
+            ('booking-list', self.creator, 'get', '/api/bookings/', None, 2),
+            ('booking-detail', self.user, 'get', f'/api/bookings/{booking.id}/', None, 2),
+            ('booking-create', self.user, 'post', '/api/bookings/', new_booking, 6),
+            ('booking-update', self.creator, 'patch', f'/api/bookings/{booking.id}/',
+             {'creator_notes': 'Noted'}, 5),
+            ('booking-destroy', self.user, 'delete', f'/api/bookings/{doomed_booking.id}/',
+             None, 7),
+            ('booking-my-bookings', self.user, 'get', '/api/bookings/my_bookings/', None, 1),
+            ('booking-active', self.user, 'get', '/api/bookings/active/', None, 1),
+            ('booking-past', self.user, 'get', '/api/bookings/past/', None, 1),
+            ('booking-confirm', self.creator, 'post', f'/api/bookings/{booking.id}/confirm/',
+             None, 4),
+            ('booking-cancel', self.user, 'post', f'/api/bookings/{booking.id}/cancel/',
+             None, 6),
+            ('booking-bulk', self.creator, 'post', '/api/bookings/bulk/',
+             {'action': 'confirm', 'ids': [row.id for row in self.bookings]}, 6),
+        ]
+    
+    def measure(self):
+        # Both measurements start from the same cache state
+        cache.clear()
+        user_states.clear()
+        intent = mock.Mock(id='pi_budget', client_secret='secret', status='succeeded',
+                           payment_method='pm_card')
+        
+        def construct_event(*args):
+            return {'type': 'payment_intent.succeeded',
+                    'data': {'object': {'id': self.webhook_booking.payment_intent_id}}}
+        
+        s3_client = mock.Mock()
+        s3_client.generate_presigned_post.return_value = {'url': 'https://s3.example.com', 'fields': {}}
+        s3_client.head_object.return_value = {'ContentLength': 100, 'ContentType': 'image/png'}
+        github_token = mock.Mock()
+        github_token.json.return_value = {'access_token': 'budget'}
+        results = {}
+        with mock.patch('stripe.PaymentIntent.create', return_value=intent), \
+                mock.patch('stripe.PaymentIntent.retrieve', return_value=intent), \
+                mock.patch('stripe.Webhook.construct_event', side_effect=construct_event), \
+                mock.patch('backend.storage.get_s3_client', return_value=s3_client), \
+                mock.patch('backend.storage.schedule_thumbnail',
+                           side_effect=lambda *args: THUMBNAIL_SLOTS.release()), \
+                mock.patch('backend.views.outbound.apost', mock.AsyncMock(return_value=github_token)), \
+                mock.patch('backend.authentication.GoogleOAuthProvider.get_user_info',
+                           mock.AsyncMock(return_value={'id': 'budget', 'email': 'user@example.com'})), \
+                mock.patch('backend.authentication.GitHubOAuthProvider.get_user_info',
+                           mock.AsyncMock(return_value={'id': 'budget', 'login': 'creator'})), \
+                mock.patch.object(AuthRateThrottle, 'allow_request', return_value=True), \
+                mock.patch.object(UploadThrottle, 'allow_request', return_value=True):
+            for name, user, method, url, data, budget in self.endpoints():
+                self.client.force_authenticate(user=user)
+                body_format = 'multipart' if name == 'upload-file' else 'json'
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.client, method)(url, data, format=body_format)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertLess(response.status_code, 400, name)
+                results[name] = (len(queries), budget)
+        return results
+    
+    def test_bearer_token_budgets(self):
+        """
+        Real access tokens cost no query once the process has cached the
+        user's token version, and one while it has not; views that read
+        profile fields load them all in one more query
+        """
+        self.seed(2)
+        # (user, method, url, data, budget with the token version cached, budget without)
+        endpoints = [
+            (self.user, 'get', '/api/users/me/', None, 1, 2),
+            (self.user, 'get', '/api/bookings/my_bookings/', None, 1, 2),
+            (self.creator, 'get', '/api/dashboard/creator/', None, 6, 7),
+            # Saving the user drops its cached token version
+            (self.user, 'patch', '/api/users/update_profile/', {'bio': 'Bearer'}, 3, 3),
+            # The access token's revocation, and the first prune of expired ones
+            (self.user, 'post', '/api/auth/logout/', None, 2, 3),
+        ]
+        for user, method, url, data, warm_budget, cold_budget in endpoints:
+            user_states.clear()
+            for cached, budget in ((False, cold_budget), (True, warm_budget)):
+                cache.clear()
+                access = get_tokens_for_user(user)['access']
+                with self.subTest(url=url, cached=cached):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = getattr(self.client, method)(
+                            url, data, format='json', HTTP_AUTHORIZATION=f'Bearer {access}'
+                        )
+                    self.assertLess(response.status_code, 400)
+                    self.assertEqual(len(queries), budget)
+    
+    def test_query_counts_are_fixed_and_within_budget(self):
+        """Query counts match the declared budget at both data sizes"""
+        self.seed(2)
+        small = self.measure()
+        self.seed(8)
+        large = self.measure()
+        
+        for name, (count, budget) in small.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(count, budget, f'{name} used {count} queries at N=2')
+                self.assertEqual(large[name][0], budget, f'{name} used {large[name][0]} queries at N=10')
@@ -4,10 +4,10 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     oauth_login, github_code_exchange, logout,
     UserViewSet, SessionViewSet, BookingViewSet,
-    user_dashboard, creator_dashboard
+    user_dashboard, creator_dashboard, creator_analytics, outbound_metrics
 )
 from .payment import create_payment_intent, confirm_payment, stripe_webhook
-from .storage import upload_file, delete_file
+from .storage import upload_file, upload_url, complete_upload, delete_file, thumbnail_status
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -24,6 +24,7 @@ urlpatterns = [
     # Dashboards
     path('dashboard/user/', user_dashboard, name='user-dashboard'),
     path('dashboard/creator/', creator_dashboard, name='creator-dashboard'),
+    path('dashboard/creator/analytics/', creator_analytics, name='creator-analytics'),
     
     # Payment (Bonus)
     path('payment/create-intent/', create_payment_intent, name='create-payment-intent'),
@@ -32,7 +33,13 @@ urlpatterns = [
     
     # File Storage (Bonus)
     path('storage/upload/', upload_file, name='upload-file'),
+    path('storage/upload-url/', upload_url, name='upload-url'),
+    path('storage/complete/', complete_upload, name='complete-upload'),
     path('storage/delete/', delete_file, name='delete-file'),
+    path('storage/thumbnail/', thumbnail_status, name='thumbnail-status'),
+    
+    # Monitoring
+    path('metrics/outbound/', outbound_metrics, name='outbound-metrics'),
     
     # Router URLs
     path('', include(router.urls)),
@@ -1,50 +1,87 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q, Count, Max, Sum
 from django.utils import timezone
 from django.conf import settings
-from django_ratelimit.decorators import ratelimit
-from django.views.decorators.cache import cache_page
-import requests
+from adrf.decorators import api_view as async_api_view
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+import os
+import uuid
 from .models import Session, Booking
 from .serializers import (
     UserSerializer, UserProfileUpdateSerializer,
     SessionListSerializer, SessionDetailSerializer, SessionCreateUpdateSerializer,
+    SessionSearchSerializer, SessionSeriesSerializer,
     BookingListSerializer, BookingDetailSerializer, BookingCreateSerializer,
-    BookingUpdateSerializer, OAuthLoginSerializer
+    BookingUpdateSerializer, BookingBulkActionSerializer, OAuthLoginSerializer,
+    CreatorAnalyticsQuerySerializer
 )
 from .authentication import OAuthProvider, get_tokens_for_user
 from .permissions import IsCreator, IsOwnerOrReadOnly, IsBookingOwnerOrSessionCreator
+from .pagination import NamedKeysetPagination, RankedPagination
+from .search import FullTextSearchFilter, search_sessions, highlight_sessions
+from .cache import CatalogCacheMixin, cached_catalog_value
+from .facets import session_facets
+from .filters import SessionFilter, BookingExportFilter
+from .exports import booking_export_response
+from .bulk import bulk_transition_bookings, validate_session_rows, create_sessions
+from .parsers import CSVParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .conditional import ConditionalGetMixin, conditional_response
+from .fast_serializers import RowListMixin, session_list_rows, booking_list_rows
+from .fieldsets import FieldsetMixin
+from .analytics import rollup_periods
+from .idempotency import idempotent
+from .ratelimit import AuthRateThrottle, BookingCreateThrottle, SessionCreateThrottle
+from . import outbound, revocation
+from .counters import (
+    transition_booking, lock_booking_state, record_booking_changed, record_booking_deleted
+)
 
 User = get_user_model()
 
 
-# Custom throttle classes
-class AuthRateThrottle(UserRateThrottle):
-    rate = '10/minute'
-
-
-class BookingCreateThrottle(UserRateThrottle):
-    rate = '20/hour'
-
+def paginated_list(request, name, queryset, rows):
+    """Serialize one page of a dashboard list with a RowSerializer, returning (rows, links)"""
+    paginator = NamedKeysetPagination(name)
+    page = paginator.paginate_queryset(rows.values(queryset), request)
+    return rows.serialize(page), paginator.get_links()
 
-class SessionCreateThrottle(UserRateThrottle):
-    rate = '10/hour'
 
-
-class PaymentThrottle(UserRateThrottle):
-    rate = '10/hour'
+async def oauth_login_response(provider_class, access_token, role):
+    """Log in (or sign up) the provider's user for an access token and issue JWT tokens"""
+    user_info = await provider_class.get_user_info(access_token)
+    user, created = await provider_class.create_or_update_user(user_info)
+    
+    # Set role if new user
+    if created:
+        user.role = role
+        await user.asave(update_fields=['role', 'updated_at'])
+    
+    # Generate JWT tokens
+    tokens = get_tokens_for_user(user)
+    
+    return Response({
+        'tokens': tokens,
+        'user': UserSerializer(user).data,
+        'is_new_user': created
+    }, status=status.HTTP_200_OK)
 
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([AllowAny])
 @throttle_classes([AuthRateThrottle])
-@ratelimit(key='ip', rate='10/m', method='POST', block=True)
-def oauth_login(request):
+async def oauth_login(request):
     """
     OAuth login endpoint
     Accepts provider (google/github) and access_token
@@ -67,25 +104,7 @@ def oauth_login(request):
         )
     
     try:
-        # Get user info from OAuth provider
-        user_info = provider_class.get_user_info(access_token)
-        
-        # Create or update user
-        user, created = provider_class.create_or_update_user(user_info)
-        
-        # Set role if new user
-        if created:
-            user.role = role
-            user.save()
-        
-        # Generate JWT tokens
-        tokens = get_tokens_for_user(user)
-        
-        return Response({
-            'tokens': tokens,
-            'user': UserSerializer(user).data,
-            'is_new_user': created
-        }, status=status.HTTP_200_OK)
+        return await oauth_login_response(provider_class, access_token, role)
     
     except Exception as e:
         return Response(
@@ -94,11 +113,10 @@ def oauth_login(request):
         )
 
 
-@api_view(['POST'])
+@async_api_view(['POST'])
 @permission_classes([AllowAny])
 @throttle_classes([AuthRateThrottle])
-@ratelimit(key='ip', rate='10/m', method='POST', block=True)
-def github_code_exchange(request):
+async def github_code_exchange(request):
     """
     Exchange GitHub authorization code for access token
     Then perform OAuth login
@@ -115,7 +133,6 @@ def github_code_exchange(request):
     
     try:
         # Exchange code for access token
-        token_url = 'https://github.com/login/oauth/access_token'
         token_data = {
             'client_id': settings.GITHUB_CLIENT_ID,
             'client_secret': settings.GITHUB_CLIENT_SECRET,
@@ -123,7 +140,9 @@ def github_code_exchange(request):
         }
         headers = {'Accept': 'application/json'}
         
-        token_response = requests.post(token_url, data=token_data, headers=headers)
+        token_response = await outbound.apost(
+            'github', settings.GITHUB_OAUTH_TOKEN_URL, data=token_data, headers=headers
+        )
         token_json = token_response.json()
         
         if 'error' in token_json:
@@ -141,21 +160,7 @@ def github_code_exchange(request):
             )
         
         # Now use the access token to log in
-        provider_class = OAuthProvider.get_provider('github')
-        user_info = provider_class.get_user_info(access_token)
-        user, created = provider_class.create_or_update_user(user_info)
-        
-        if created:
-            user.role = role
-            user.save()
-        
-        tokens = get_tokens_for_user(user)
-        
-        return Response({
-            'tokens': tokens,
-            'user': UserSerializer(user).data,
-            'is_new_user': created
-        }, status=status.HTTP_200_OK)
+        return await oauth_login_response(OAuthProvider.get_provider('github'), access_token, role)
         
     except Exception as e:
         return Response(
@@ -165,14 +170,46 @@ def github_code_exchange(request):
 
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def outbound_metrics(request):
+    """Provider call counts, retries and latency histograms of the worker serving this request"""
+    return Response({'pid': os.getpid(), 'services': outbound.metrics.snapshot()})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
-    """Logout endpoint (client should discard tokens)"""
+    """
+    Revoke the access token used for this request and, if given, the refresh
+    token in "refresh". With "all": true every token issued to the user so
+    far is revoked, logging out all their devices.
+    """
+    tokens = []
+    if isinstance(request.auth, Token):
+        tokens.append(request.auth)
+    
+    raw_refresh = request.data.get('refresh')
+    if raw_refresh:
+        try:
+            refresh = RefreshToken(raw_refresh)
+        except TokenError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+            return Response(
+                {'error': 'Refresh token belongs to another user'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        tokens.append(refresh)
+    
+    if request.data.get('all') in (True, 'true', '1'):
+        revocation.revoke_all(request.user.pk)
+    if tokens:
+        revocation.revoke_tokens(*tokens)
     return Response({'message': 'Logged out successfully'}, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(FieldsetMixin, viewsets.ModelViewSet):
     """
     ViewSet for User operations
     """
@@ -201,11 +238,17 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(UserSerializer(request.user).data)
 
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(ConditionalGetMixin, CatalogCacheMixin, FieldsetMixin, RowListMixin,
+                     viewsets.ModelViewSet):
     """
     ViewSet for Session CRUD operations
+    list/retrieve check ETags first, then fall back to the catalog cache
     """
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_class = SessionFilter
+    private_validators = False
+    row_serializer = session_list_rows
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -215,12 +258,28 @@ class SessionViewSet(viewsets.ModelViewSet):
         return SessionDetailSerializer
     
     def get_queryset(self):
-        queryset = Session.objects.select_related('creator').annotate(
-            bookings_count=Count('bookings')
+        # bookings_count is a maintained column, so this stays a plain scan
+        return self.filter_sessions(Session.objects.select_related('creator'))
+    
+    def get_validator_aggregates(self):
+        return {
+            'updated': Max('updated_at'),
+            'creator_updated': Max('creator__updated_at'),
+            # Counter updates also move updated_at
+            'sessions': Count('id'),
+        }
+    
+    def aggregate_validators(self, queryset):
+        # Validators change with the same writes as the catalog version, so
+        # they are cached with the payloads and a warm 304 costs no queries
+        return cached_catalog_value(
+            'validators', self.request,
+            lambda: super(SessionViewSet, self).aggregate_validators(queryset)
         )
-        
+    
+    def filter_sessions(self, queryset):
         # Public catalog: only published sessions
-        if self.action == 'list':
+        if self.action in ['list', 'search', 'facets']:
             queryset = queryset.filter(status='published')
         
         # Creator can see their own sessions
@@ -232,7 +291,7 @@ class SessionViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Allow anyone to list/retrieve sessions, but only creators to create/modify"""
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search', 'facets']:
             return [AllowAny()]
         elif self.action in ['create']:
             return [IsAuthenticated(), IsCreator()]
@@ -241,14 +300,8 @@ class SessionViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
     
     def get_throttles(self):
-        """Apply stricter throttling for session creation"""
-        if self.action == 'create':
-            return [SessionCreateThrottle()]
-        return super().get_throttles()
-    
-    def get_throttles(self):
-        """Apply stricter throttling for session creation"""
-        if self.action == 'create':
+        """Apply stricter throttling for session creation (an import or series counts once)"""
+        if self.action in ['create', 'import_sessions', 'series']:
             return [SessionCreateThrottle()]
         return super().get_throttles()
     
@@ -262,29 +315,103 @@ class SessionViewSet(viewsets.ModelViewSet):
     def my_sessions(self, request):
         """Get all sessions created by current user"""
         sessions = self.get_queryset().filter(creator=request.user)
-        serializer = SessionListSerializer(sessions, many=True)
-        return Response(serializer.data)
+        rows = self.get_row_serializer(session_list_rows)
+        page = self.paginate_queryset(rows.values(sessions))
+        return self.get_paginated_response(rows.serialize(page))
+    
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsAuthenticated, IsCreator], parser_classes=[JSONParser, CSVParser])
+    def import_sessions(self, request):
+        """
+        Create many sessions from a JSON array or a CSV file (header row of field names)
+        All rows are validated first; nothing is created unless every row is valid
+        """
+        rows = validate_session_rows(SessionCreateUpdateSerializer, request.data)
+        sessions = create_sessions(request.user, rows)
+        return Response(
+            {'created': len(sessions), 'ids': [session.id for session in sessions]},
+            status=status.HTTP_201_CREATED
+        )
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsCreator])
+    def series(self, request):
+        """
+        Create a recurring series: session fields plus starts_at and an RFC 5545
+        recurrence rule, e.g. {"recurrence": "FREQ=WEEKLY;BYDAY=MO;COUNT=12", ...}
+        """
+        serializer = SessionSeriesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        template = dict(serializer.validated_data)
+        occurrences = template.pop('occurrences')
+        series_id = uuid.uuid4()
+        sessions = create_sessions(
+            request.user,
+            [dict(template, starts_at=starts_at) for starts_at in occurrences],
+            series_id=series_id
+        )
+        return Response({
+            'series_id': str(series_id),
+            'created': len(sessions),
+            'sessions': [
+                {'id': session.id, 'starts_at': session.starts_at} for session in sessions
+            ],
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Ranked full-text search over published sessions
+        Matches title, category, creator name and description (in that weight order)
+        and returns highlighted title/description snippets
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response(
+                {'error': 'Search query (q) is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        paginator = RankedPagination()
+        page = paginator.paginate_queryset(
+            search_sessions(self.get_queryset(), text), request, view=self
+        )
+        highlight_sessions(page, text)
+        serializer = SessionSearchSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Facet counts for the published catalog under the applied filters
+        (category, session_type, currency, min/max_price, min/max_duration, search)
+        Cached per filter combination under the catalog version
+        """
+        facets = cached_catalog_value(
+            'facets', request, lambda: session_facets(self.filter_queryset(self.get_queryset()))
+        )
+        return Response(facets)
     
     @action(detail=True, methods=['get'])
     def bookings(self, request, pk=None):
         """Get all bookings for a session (only for session creator)"""
         session = self.get_object()
-        if request.user != session.creator:
+        if request.user.id != session.creator_id:
             return Response(
                 {'error': 'You do not have permission to view bookings for this session'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        bookings = session.bookings.select_related('user').all()
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = self.get_row_serializer(booking_list_rows)
+        page = self.paginate_queryset(rows.values(session.bookings.all()))
+        return self.get_paginated_response(rows.serialize(page))
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ConditionalGetMixin, FieldsetMixin, RowListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Booking operations
     """
     permission_classes = [IsAuthenticated]
+    row_serializer = booking_list_rows
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -308,6 +435,16 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def get_validator_aggregates(self):
+        return {
+            'updated': Max('updated_at'),
+            'bookings': Count('id'),
+            'user_updated': Max('user__updated_at'),
+            # Also covers the nested session's bookings_count
+            'session_updated': Max('session__updated_at'),
+            'creator_updated': Max('session__creator__updated_at'),
+        }
+    
     def get_permissions(self):
         """Check permissions based on action"""
         if self.action in ['update', 'partial_update', 'destroy']:
@@ -320,53 +457,110 @@ class BookingViewSet(viewsets.ModelViewSet):
             return [BookingCreateThrottle()]
         return super().get_throttles()
     
-    def get_throttles(self):
-        """Apply stricter throttling for booking creation"""
-        if self.action == 'create':
-            return [BookingCreateThrottle()]
-        return super().get_throttles()
+    @idempotent('booking-create')
+    def create(self, request, *args, **kwargs):
+        """Create a booking; retries carrying the same Idempotency-Key replay the first response"""
+        return super().create(request, *args, **kwargs)
     
     def perform_create(self, serializer):
         """Create booking with current user"""
         serializer.save(user=self.request.user)
     
+    def perform_update(self, serializer):
+        """Save the booking and move its session's counters in the same transaction"""
+        with transaction.atomic():
+            previous = lock_booking_state(serializer.instance.pk)
+            booking = serializer.save()
+            record_booking_changed(previous, booking)
+    
+    def perform_destroy(self, instance):
+        """Delete the booking and release its share of the session's counters"""
+        with transaction.atomic():
+            instance.session_id, instance.status, instance.attendees_count = (
+                lock_booking_state(instance.pk)
+            )
+            instance.delete()
+            record_booking_deleted(instance)
+    
     @action(detail=False, methods=['get'])
     def my_bookings(self, request):
         """Get all bookings for current user"""
         bookings = self.get_queryset().filter(user=request.user)
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = self.get_row_serializer()
+        page = self.paginate_queryset(rows.values(bookings))
+        return self.get_paginated_response(rows.serialize(page))
     
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get active bookings (pending/confirmed)"""
         bookings = self.get_queryset().filter(
-            status__in=['pending', 'confirmed']
+            status__in=Booking.ACTIVE_STATUSES
         )
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = self.get_row_serializer()
+        page = self.paginate_queryset(rows.values(bookings))
+        return self.get_paginated_response(rows.serialize(page))
     
     @action(detail=False, methods=['get'])
     def past(self, request):
         """Get past bookings (completed/cancelled)"""
         bookings = self.get_queryset().filter(
-            status__in=['completed', 'cancelled']
+            status__in=Booking.PAST_STATUSES
         )
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        rows = self.get_row_serializer()
+        page = self.paginate_queryset(rows.values(bookings))
+        return self.get_paginated_response(rows.serialize(page))
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsCreator],
+            renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream bookings for the creator's sessions as CSV or NDJSON (?format=csv|ndjson)
+        Filters (applied in SQL): date_from, date_to (booking_date), status (repeatable), session
+        """
+        filterset = BookingExportFilter(
+            request.query_params,
+            queryset=Booking.objects.filter(session__creator=request.user)
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return booking_export_response(
+            filterset.qs, request.accepted_renderer.format, 'bookings',
+            asynchronous=isinstance(request._request, ASGIRequest)
+        )
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Confirm, cancel or complete many bookings at once
+        Body: {"action": "confirm|cancel|complete", "ids": [...]}; responds with a result per ID
+        (updated, unchanged, invalid_status, forbidden, not_found)
+        """
+        serializer = BookingBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        results, updated = bulk_transition_bookings(
+            request.user, ids, serializer.validated_data['action']
+        )
+        return Response({
+            'action': serializer.validated_data['action'],
+            'updated': updated,
+            'results': [
+                {'id': booking_id, 'result': results[booking_id][0], 'status': results[booking_id][1]}
+                for booking_id in ids
+            ],
+        })
     
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """Confirm a booking (creator only)"""
         booking = self.get_object()
-        if request.user != booking.session.creator:
+        if request.user.id != booking.session.creator_id:
             return Response(
                 {'error': 'Only session creator can confirm bookings'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        booking.status = 'confirmed'
-        booking.save()
+        transition_booking(booking, 'confirmed')
         serializer = BookingDetailSerializer(booking)
         return Response(serializer.data)
     
@@ -376,14 +570,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking = self.get_object()
         
         # User can cancel their own booking, creator can cancel any booking for their session
-        if request.user != booking.user and request.user != booking.session.creator:
+        if request.user.id not in (booking.user_id, booking.session.creator_id):
             return Response(
                 {'error': 'You do not have permission to cancel this booking'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        booking.status = 'cancelled'
-        booking.save()
+        transition_booking(booking, 'cancelled')
         serializer = BookingDetailSerializer(booking)
         return Response(serializer.data)
 
@@ -394,25 +587,53 @@ class BookingViewSet(viewsets.ModelViewSet):
 def user_dashboard(request):
     """
     User dashboard with bookings and profile
+    Answers 304 when the user's bookings and profile are unchanged
     """
     user = request.user
     
+    # One aggregate gives both the validators and the booking total
+    values = Booking.objects.filter(user=user).aggregate(
+        updated=Max('updated_at'),
+        bookings=Count('id'),
+        session_updated=Max('session__updated_at'),
+        creator_updated=Max('session__creator__updated_at'),
+    )
+    values['user_updated'] = user.updated_at
+    return conditional_response(
+        request, values, lambda: build_user_dashboard(request, values), snapshot='user-dashboard'
+    )
+
+
+def build_user_dashboard(request, values):
+    user = request.user
+    
     # Get user bookings
     active_bookings = Booking.objects.filter(
         user=user,
-        status__in=['pending', 'confirmed']
-    ).select_related('session', 'session__creator')
+        status__in=Booking.ACTIVE_STATUSES
+    )
     
     past_bookings = Booking.objects.filter(
         user=user,
-        status__in=['completed', 'cancelled']
-    ).select_related('session', 'session__creator')
+        status__in=Booking.PAST_STATUSES
+    )
+    
+    active_page, active_links = paginated_list(
+        request, 'active_bookings', active_bookings, booking_list_rows
+    )
+    past_page, past_links = paginated_list(
+        request, 'past_bookings', past_bookings, booking_list_rows
+    )
     
     return Response({
         'user': UserSerializer(user).data,
-        'active_bookings': BookingListSerializer(active_bookings, many=True).data,
-        'past_bookings': BookingListSerializer(past_bookings, many=True).data,
-        'total_bookings': active_bookings.count() + past_bookings.count()
+        'active_bookings': active_page,
+        'past_bookings': past_page,
+        'total_bookings': values['bookings'],
+        'pagination': {
+            'active_bookings': active_links,
+            'past_bookings': past_links,
+        }
     })
 
 
@@ -421,6 +642,7 @@ def user_dashboard(request):
 def creator_dashboard(request):
     """
     Creator dashboard with sessions and bookings overview
+    Answers 304 when the creator's sessions and their bookings are unchanged
     """
     user = request.user
     
@@ -430,30 +652,93 @@ def creator_dashboard(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Get creator's sessions
-    sessions = Session.objects.filter(creator=user).annotate(
-        bookings_count=Count('bookings')
+    # Two conditional aggregations give both the validators and the stats
+    session_values = Session.objects.filter(creator=user).aggregate(
+        updated=Max('updated_at'),
+        sessions=Count('id'),
+        published=Count('id', filter=Q(status='published')),
     )
+    booking_values = Booking.objects.filter(session__creator=user).aggregate(
+        updated=Max('updated_at'),
+        user_updated=Max('user__updated_at'),
+        bookings=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        confirmed=Count('id', filter=Q(status='confirmed')),
+        revenue=Sum('total_price', filter=Q(status='confirmed')),
+    )
+    values = {f'session_{key}': value for key, value in session_values.items()}
+    values.update({f'booking_{key}': value for key, value in booking_values.items()})
+    values['user_updated'] = user.updated_at
+    return conditional_response(
+        request, values, lambda: build_creator_dashboard(request, values), snapshot='creator-dashboard'
+    )
+
+
+def build_creator_dashboard(request, values):
+    user = request.user
+    
+    # Get creator's sessions
+    sessions = Session.objects.filter(creator=user)
     
     # Get bookings for creator's sessions
-    all_bookings = Booking.objects.filter(
-        session__creator=user
-    ).select_related('user', 'session')
+    all_bookings = Booking.objects.filter(session__creator=user)
     
     pending_bookings = all_bookings.filter(status='pending')
     confirmed_bookings = all_bookings.filter(status='confirmed')
     
+    sessions_page, sessions_links = paginated_list(
+        request, 'sessions', sessions, session_list_rows
+    )
+    pending_page, pending_links = paginated_list(
+        request, 'pending_bookings', pending_bookings, booking_list_rows
+    )
+    confirmed_page, confirmed_links = paginated_list(
+        request, 'confirmed_bookings', confirmed_bookings, booking_list_rows
+    )
+    
     return Response({
         'user': UserSerializer(user).data,
-        'sessions': SessionListSerializer(sessions, many=True).data,
-        'pending_bookings': BookingListSerializer(pending_bookings, many=True).data,
-        'confirmed_bookings': BookingListSerializer(confirmed_bookings, many=True).data,
+        'sessions': sessions_page,
+        'pending_bookings': pending_page,
+        'confirmed_bookings': confirmed_page,
+        'pagination': {
+            'sessions': sessions_links,
+            'pending_bookings': pending_links,
+            'confirmed_bookings': confirmed_links,
+        },
         'stats': {
-            'total_sessions': sessions.count(),
-            'published_sessions': sessions.filter(status='published').count(),
-            'total_bookings': all_bookings.count(),
-            'pending_bookings': pending_bookings.count(),
-            'confirmed_bookings': confirmed_bookings.count(),
+            'total_sessions': values['session_sessions'],
+            'published_sessions': values['session_published'],
+            'total_bookings': values['booking_bookings'],
+            'pending_bookings': values['booking_pending'],
+            'confirmed_bookings': values['booking_confirmed'],
+            # Over every confirmed booking, not only the first page of them
+            'revenue': str(values['booking_revenue'] or '0.00'),
         }
     })
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsCreator])
+def creator_analytics(request):
+    """
+    Bookings, cancellations, confirmed attendees and revenue (per currency)
+    by day, week or month, counted on the day each booking was made
+    Read only from the daily rollups, so the cost follows the date range
+    """
+    params = CreatorAnalyticsQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    query = params.validated_data
+    
+    periods, totals = rollup_periods(
+        request.user, query['from'], query['to'],
+        granularity=query['granularity'], session_id=query.get('session')
+    )
+    return Response({
+        'from': query['from'],
+        'to': query['to'],
+        'granularity': query['granularity'],
+        'periods': periods,
+        'totals': totals,
+    })
+
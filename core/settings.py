@@ -2,7 +2,7 @@ import os
 import sys
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import config, Csv
 
 # Build paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -43,7 +44,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.middleware.AsyncWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,6 +75,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+ASGI_APPLICATION = 'core.asgi.application'
 
 # Custom User Model
 AUTH_USER_MODEL = 'backend.User'
@@ -128,36 +130,79 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'backend.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'backend.pagination.KeysetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
-        'rest_framework.filters.OrderingFilter',
     ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
 }
 
-# Only enable throttling when not testing
+# Requests per period for each throttle scope (backend.ratelimit), shared by
+# all workers when REDIS_URL is set
+REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
+    'anon': '100/hour',  # Anonymous users: 100 requests per hour
+    'user': '1000/hour',  # Authenticated users: 1000 requests per hour
+    'auth': '10/minute',  # Auth endpoints: 10 attempts per minute per IP
+    'booking': '20/hour',  # Booking creation: 20 per hour
+    'session_create': '10/hour',  # Session creation: 10 per hour
+    'payment': '10/hour',  # Payment operations: 10 per hour
+    'upload': '30/hour',  # File uploads: 30 per hour
+}
+
+# Only enable the global limits when not testing
 if not TESTING:
     REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'backend.ratelimit.AnonRateThrottle',
+        'backend.ratelimit.UserRateThrottle',
     ]
-    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {
-        'anon': '100/hour',  # Anonymous users: 100 requests per hour
-        'user': '1000/hour',  # Authenticated users: 1000 requests per hour
-        'auth': '10/minute',  # Auth endpoints: 10 attempts per minute
-        'booking': '20/hour',  # Booking creation: 20 per hour
-        'session_create': '10/hour',  # Session creation: 10 per hour
-        'payment': '10/hour',  # Payment operations: 10 per hour
+
+# Cache
+# Shared Redis cache when REDIS_URL is set (run Redis with an allkeys-lru
+# maxmemory policy); otherwise an in-process LRU cache bounded by MAX_ENTRIES
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'sessions_marketplace',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sessions-marketplace',
+            'OPTIONS': {
+                'MAX_ENTRIES': config('LOCAL_CACHE_MAX_ENTRIES', default=5000, cast=int),
+            },
+        }
     }
 
+# Seconds a cached catalog page or session detail may live
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a dashboard snapshot may live; it is keyed by the dashboard's ETag
+SNAPSHOT_CACHE_TIMEOUT = config('SNAPSHOT_CACHE_TIMEOUT', default=600, cast=int)
+
+# Seconds an unpaid booking holds its seats before expire_unpaid_bookings releases them
+BOOKING_SEAT_HOLD_TIMEOUT = config('BOOKING_SEAT_HOLD_TIMEOUT', default=1800, cast=int)
+
+# Seconds a response is replayed for retries carrying the same Idempotency-Key
+IDEMPOTENCY_KEY_TIMEOUT = config('IDEMPOTENCY_KEY_TIMEOUT', default=86400, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
@@ -171,8 +216,18 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Revocation is checked against backend.revocation, not the token_blacklist app
+    'TOKEN_REFRESH_SERIALIZER': 'backend.serializers.RevocableTokenRefreshSerializer',
 }
 
+# Seconds between the deletions of expired token revocation rows done by logouts and refreshes
+TOKEN_REVOCATION_PRUNE_INTERVAL = config('TOKEN_REVOCATION_PRUNE_INTERVAL', default=3600, cast=int)
+
+# Seconds, and number of users, that each process caches a user's token
+# version and active flag for; a change reaches other processes within the timeout
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -187,11 +242,13 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
+CORS_EXPOSE_HEADERS = ['idempotent-replayed']
 
 # OAuth Configuration
 # Google OAuth
@@ -206,6 +263,25 @@ GITHUB_OAUTH_CLIENT_SECRET = config('GITHUB_OAUTH_CLIENT_SECRET', default='')
 GITHUB_CLIENT_ID = GITHUB_OAUTH_CLIENT_ID
 GITHUB_CLIENT_SECRET = GITHUB_OAUTH_CLIENT_SECRET
 
+# Provider endpoints, overridable to point at a stand-in
+GOOGLE_USERINFO_URL = config('GOOGLE_USERINFO_URL', default='https://www.googleapis.com/oauth2/v2/userinfo')
+GITHUB_OAUTH_TOKEN_URL = config('GITHUB_OAUTH_TOKEN_URL', default='https://github.com/login/oauth/access_token')
+GITHUB_API_URL = config('GITHUB_API_URL', default='https://api.github.com')
+
+# Seconds a GitHub profile is reused for repeated logins with the same access token
+OAUTH_PROFILE_CACHE_TIMEOUT = config('OAUTH_PROFILE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Threads for blocking provider calls (OAuth, Stripe, S3) made by async views;
+# one per in-flight call, so this bounds concurrent provider calls per worker
+PROVIDER_IO_THREADS = config('PROVIDER_IO_THREADS', default=256, cast=int)
+
+# Outbound provider HTTP: seconds to connect and to wait for a response,
+# retries of a failed call, and idle keep-alive connections kept per host
+OUTBOUND_CONNECT_TIMEOUT = config('OUTBOUND_CONNECT_TIMEOUT', default=3.05, cast=float)
+OUTBOUND_READ_TIMEOUT = config('OUTBOUND_READ_TIMEOUT', default=10, cast=float)
+OUTBOUND_MAX_RETRIES = config('OUTBOUND_MAX_RETRIES', default=2, cast=int)
+OUTBOUND_POOL_SIZE = config('OUTBOUND_POOL_SIZE', default=64, cast=int)
+
 # Social Auth Configuration
 AUTHENTICATION_BACKENDS = (
     'social_core.backends.google.GoogleOAuth2',
@@ -244,6 +320,29 @@ if USE_S3:
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
     STATICFILES_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
+# Uploads: bytes sent to storage per multipart part, so an upload is streamed
+# rather than buffered whole
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+
+# Presigned uploads: seconds a POST policy is valid, and how much longer
+# after that the upload may be completed
+UPLOAD_URL_EXPIRY = config('UPLOAD_URL_EXPIRY', default=900, cast=int)
+UPLOAD_COMPLETION_GRACE = config('UPLOAD_COMPLETION_GRACE', default=3600, cast=int)
+
+# Thumbnails are made after the upload responds: worker threads per process,
+# uploads that may be waiting for a thumbnail before new ones get a 503, bytes
+# of an original buffered in memory before spilling to disk, and seconds a
+# thumbnail's status is kept
+THUMBNAIL_WORKERS = config('THUMBNAIL_WORKERS', default=2, cast=int)
+THUMBNAIL_QUEUE_SIZE = config('THUMBNAIL_QUEUE_SIZE', default=32, cast=int)
+THUMBNAIL_SPOOL_SIZE = config('THUMBNAIL_SPOOL_SIZE', default=5 * 1024 * 1024, cast=int)
+THUMBNAIL_STATUS_TIMEOUT = config('THUMBNAIL_STATUS_TIMEOUT', default=86400, cast=int)
+
+# Responsive renditions made alongside each thumbnail: widths in pixels and
+# formats (avif is skipped unless Pillow can write it)
+IMAGE_RENDITION_WIDTHS = config('IMAGE_RENDITION_WIDTHS', default='320,640,1024,1600', cast=Csv(int))
+IMAGE_RENDITION_FORMATS = config('IMAGE_RENDITION_FORMATS', default='avif,webp,jpeg', cast=Csv())
+
 # Swagger/OpenAPI Configuration
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -256,3 +355,19 @@ SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
 }
 
+
+# Logging
+# backend.outbound writes one line per provider call at INFO
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend': {
+            'handlers': ['console'],
+            'level': config('BACKEND_LOG_LEVEL', default='WARNING' if TESTING else 'INFO'),
+        },
+    },
+}
@@ -30,4 +30,4 @@ python manage.py collectstatic --noinput
 
 # Start server
 echo "Starting server..."
-exec gunicorn core.wsgi:application --bind 0.0.0.0:8000 --workers 3 --timeout 120
+exec gunicorn core.asgi:application --worker-class uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000 --workers 3 --timeout 120
@@ -6,8 +6,8 @@ import './Navbar.css';
 function Navbar() {
   const { user, isAuthenticated, isCreator, isStudent, logout } = useAuth();
 
-  const handleLogout = () => {
-    logout();
+  const handleLogout = async () => {
+    await logout();
     window.location.href = '/';
   };
 
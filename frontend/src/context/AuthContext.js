@@ -1,5 +1,5 @@
 import React, { createContext, useState, useContext, useEffect } from 'react';
-import { getCurrentUser } from '../services/api';
+import { getCurrentUser, logout as revokeTokens } from '../services/api';
 
 const AuthContext = createContext();
 
@@ -40,7 +40,15 @@ export const AuthProvider = ({ children }) => {
     setUser(userData);
   };
 
-  const logout = () => {
+  const logout = async () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (localStorage.getItem('access_token')) {
+      try {
+        await revokeTokens(refreshToken);
+      } catch (error) {
+        console.error('Logout failed:', error);
+      }
+    }
     localStorage.removeItem('access_token');
     localStorage.removeItem('refresh_token');
     setUser(null);
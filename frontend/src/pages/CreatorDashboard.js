@@ -12,6 +12,7 @@ function CreatorDashboard() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [activeTab, setActiveTab] = useState('sessions');
+  const [loadingMore, setLoadingMore] = useState(null);
 
   useEffect(() => {
     fetchDashboard();
@@ -30,6 +31,40 @@ function CreatorDashboard() {
     }
   };
 
+  // Append the next page of one list (sessions, pending_bookings or
+  // confirmed_bookings), following that list's own cursor
+  const loadMore = async (list) => {
+    const next = dashboard?.pagination?.[list]?.next;
+    if (!next) {
+      return;
+    }
+    setLoadingMore(list);
+    try {
+      const data = await getCreatorDashboard(next);
+      setDashboard((current) => ({
+        ...current,
+        [list]: [...current[list], ...data[list]],
+        pagination: { ...current.pagination, [list]: data.pagination[list] },
+      }));
+    } catch (err) {
+      setError('Failed to load more');
+      console.error(err);
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
+  const loadMoreButton = (list, label = 'Load more') =>
+    dashboard?.pagination?.[list]?.next && (
+      <button
+        className="btn btn-outline"
+        onClick={() => loadMore(list)}
+        disabled={loadingMore === list}
+      >
+        {loadingMore === list ? 'Loading...' : label}
+      </button>
+    );
+
   if (loading) {
     return <div className="container loading">Loading dashboard...</div>;
   }
@@ -40,13 +75,13 @@ function CreatorDashboard() {
     ...(dashboard?.confirmed_bookings || [])
   ];
   
-  const totalBookings = allBookings.length;
-  const confirmedBookings = dashboard?.confirmed_bookings?.length || 0;
-  const pendingBookings = dashboard?.pending_bookings?.length || 0;
+  // Lists are paginated, so counts come from the server-side stats
+  const confirmedBookings = dashboard?.stats?.confirmed_bookings || 0;
+  const pendingBookings = dashboard?.stats?.pending_bookings || 0;
+  const totalBookings = confirmedBookings + pendingBookings;
   
-  // Calculate revenue from confirmed bookings only
-  const totalRevenue = (dashboard?.confirmed_bookings || [])
-    .reduce((sum, b) => sum + parseFloat(b.total_price || 0), 0);
+  // Revenue of every confirmed booking, summed by the server
+  const totalRevenue = parseFloat(dashboard?.stats?.revenue || 0);
 
   return (
     <div className="dashboard creator-dashboard">
@@ -65,7 +100,7 @@ function CreatorDashboard() {
 
         <div className="dashboard-stats">
           <div className="stat-card card">
-            <div className="stat-value">{dashboard?.sessions?.length || 0}</div>
+            <div className="stat-value">{dashboard?.stats?.total_sessions || 0}</div>
             <div className="stat-label">Total Sessions</div>
           </div>
           <div className="stat-card card">
@@ -87,7 +122,7 @@ function CreatorDashboard() {
             className={`tab ${activeTab === 'sessions' ? 'active' : ''}`}
             onClick={() => setActiveTab('sessions')}
           >
-            My Sessions ({dashboard?.sessions?.length || 0})
+            My Sessions ({dashboard?.stats?.total_sessions || 0})
           </button>
           <button
             className={`tab ${activeTab === 'bookings' ? 'active' : ''}`}
@@ -124,6 +159,7 @@ function CreatorDashboard() {
                 ))}
               </div>
             )}
+            {loadMoreButton('sessions')}
           </div>
         )}
 
@@ -146,6 +182,8 @@ function CreatorDashboard() {
                 ))}
               </div>
             )}
+            {loadMoreButton('pending_bookings', 'Load more pending')}
+            {loadMoreButton('confirmed_bookings', 'Load more confirmed')}
           </div>
         )}
 
@@ -168,6 +206,7 @@ function CreatorDashboard() {
                 ))}
               </div>
             )}
+            {loadMoreButton('pending_bookings')}
           </div>
         )}
       </div>
@@ -38,8 +38,12 @@ api.interceptors.response.use(
           refresh: refreshToken,
         });
 
-        const { access } = response.data;
+        // Refresh tokens rotate: the one just sent is revoked
+        const { access, refresh } = response.data;
         localStorage.setItem('access_token', access);
+        if (refresh) {
+          localStorage.setItem('refresh_token', refresh);
+        }
 
         originalRequest.headers.Authorization = `Bearer ${access}`;
         return api(originalRequest);
@@ -73,6 +77,13 @@ export const githubCodeExchange = async (code, role) => {
   return response.data;
 };
 
+export const logout = async (refreshToken) => {
+  const response = await api.post('/auth/logout/', {
+    refresh: refreshToken,
+  });
+  return response.data;
+};
+
 export const getCurrentUser = async () => {
   const response = await api.get('/users/me/');
   return response.data;
@@ -146,8 +157,9 @@ export const getUserDashboard = async () => {
   return response.data;
 };
 
-export const getCreatorDashboard = async () => {
-  const response = await api.get('/dashboard/creator/');
+// url: a pagination link from a previous response, to fetch the next page of one list
+export const getCreatorDashboard = async (url = '/dashboard/creator/') => {
+  const response = await api.get(url);
   return response.data;
 };
 